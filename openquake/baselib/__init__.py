@@ -99,8 +99,8 @@ def boolean(flag):
         return False
     raise ValueError('Unknown flag %r' % s)
 
-config.read(soft_mem_limit=int, hard_mem_limit=int, port=int,
-            multi_user=boolean)
+config.read(soft_mem_limit=int, hard_mem_limit=int, max_export_mb=int,
+            port=int, multi_user=boolean)
 
 if config.directory.custom_tmp:
     os.environ['TMPDIR'] = config.directory.custom_tmp
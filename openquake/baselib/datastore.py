@@ -345,17 +345,22 @@ class DataStore(collections.MutableMapping):
         return self.export_path(fname, export_dir)
 
     def flush(self):
-        """Flush the underlying hdf5 file"""
+        """
+        Flush the underlying hdf5 file, after waiting for the operations
+        pending in the background writer, if any
+        """
         if self.parent != ():
             self.parent.flush()
+        hdf5.flush_writer(self.hdf5path)
         if self.hdf5:  # is open
             self.hdf5.flush()
 
     def close(self):
-        """Close the underlying hdf5 file"""
+        """Close the underlying hdf5 file and the background writer, if any"""
         if self.parent != ():
             self.parent.flush()
             self.parent.close()
+        hdf5.close_writer(self.hdf5path)
         if self.hdf5:  # is open
             self.hdf5.flush()
             self.hdf5.close()
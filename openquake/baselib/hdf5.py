@@ -19,25 +19,88 @@
 import os
 import sys
 import ast
+import atexit
 import logging
 import operator
 import tempfile
 import importlib
 import itertools
+import threading
 try:  # with Python 3
     from urllib.parse import quote_plus, unquote_plus
+    import queue
 except ImportError:  # with Python 2
     from urllib import quote_plus, unquote_plus
+    import Queue as queue
 import collections
 import numpy
 import h5py
+from openquake.baselib import config
 from openquake.baselib.python3compat import pickle, decode
+try:  # optional dependency providing the fast lz4 and blosc filters
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
 
 vbytes = h5py.special_dtype(vlen=bytes)
 vstr = h5py.special_dtype(vlen=str)
 vuint32 = h5py.special_dtype(vlen=numpy.uint32)
 
 
+def _filter_opts(filt):
+    # returns the keyword arguments of create_dataset for the given filter
+    if filt == 'none':
+        return {}
+    elif filt in ('gzip', 'lzf'):
+        return dict(compression=filt, shuffle=True)
+    elif filt in ('lz4', 'blosc'):
+        if hdf5plugin is None:
+            logging.warn('hdf5plugin is not installed, using lzf instead '
+                         'of %s', filt)
+            return dict(compression='lzf', shuffle=True)
+        filter_id = hdf5plugin.LZ4_ID if filt == 'lz4' else \
+            hdf5plugin.BLOSC_ID
+        return dict(compression=filter_id, shuffle=filt == 'lz4')
+    raise ValueError('Unknown filter %r, expected one of none, gzip, lzf, '
+                     'lz4, blosc' % filt)
+
+
+def get_storage_opts(name, dtype, shape=(None,), policy=None):
+    """
+    Determine the chunk shape and the filters of an extendable dataset
+    from a policy string of the form "<chunk size in KB> <filter>".
+    If the policy is not given, it is read from the section [hdf5] of
+    openquake.cfg, by looking at the dataset name or at the `default` key.
+
+    >>> dt = numpy.dtype([('sid', numpy.uint32), ('gmv', numpy.float32)])
+    >>> opts = get_storage_opts('gmf_data/data', dt, policy='64 gzip')
+    >>> sorted(opts.items())
+    [('chunks', (8192,)), ('compression', 'gzip'), ('shuffle', True)]
+    >>> get_storage_opts('events', dt, policy='0 none')
+    {'chunks': True}
+
+    :param name: name of the dataset
+    :param dtype: dtype of the dataset
+    :param shape: shape of the dataset, with shape[0] None
+    :param policy: a policy string or None
+    :returns: a dictionary of keyword arguments for h5py create_dataset
+    """
+    if policy is None:
+        section = config.get('hdf5', {})
+        policy = section.get(name, section.get('default', '0 none'))
+    chunk_kb, filt = policy.split()
+    dtype = numpy.dtype(dtype)
+    rowsize = dtype.itemsize * int(numpy.prod(shape[1:]))
+    if int(chunk_kb):
+        opts = dict(chunks=(max(1, int(chunk_kb) * 1024 // rowsize),) +
+                    tuple(shape[1:]))
+    else:  # automatic chunking by h5py
+        opts = dict(chunks=True)
+    if not dtype.hasobject:  # variable-length data cannot be compressed
+        opts.update(_filter_opts(filt))
+    return opts
+
+
 def create(hdf5, name, dtype, shape=(None,), compression=None,
            fillvalue=0, attrs=None):
     """
@@ -45,14 +108,19 @@ def create(hdf5, name, dtype, shape=(None,), compression=None,
     :param name: an hdf5 key string
     :param dtype: dtype of the dataset (usually composite)
     :param shape: shape of the dataset (can be extendable)
-    :param compression: None or 'gzip' are recommended
+    :param compression:
+        None or 'gzip' are recommended; for extendable datasets, None
+        means that the policy in openquake.cfg is used
     :param attrs: dictionary of attributes of the dataset
     :returns: a HDF5 dataset
     """
     if shape[0] is None:  # extendable dataset
+        if compression is None:
+            opts = get_storage_opts(name, dtype, shape)
+        else:
+            opts = dict(chunks=True, compression=compression)
         dset = hdf5.create_dataset(
-            name, (0,) + shape[1:], dtype, chunks=True, maxshape=shape,
-            compression=compression)
+            name, (0,) + shape[1:], dtype, maxshape=shape, **opts)
     else:  # fixed-shape dataset
         dset = hdf5.create_dataset(name, shape, dtype, fillvalue=fillvalue,
                                    compression=compression)
@@ -94,6 +162,240 @@ def extend3(hdf5path, key, array, **attrs):
     return length
 
 
+def iter_blocks(dset, maxrows):
+    """
+    Read a dataset in blocks of at most `maxrows` rows.
+
+    :param dset: an h5py dataset (or any sliceable object with a length)
+    :param maxrows: the maximum number of rows per block
+    :yields: the blocks, in order
+    """
+    for start in range(0, len(dset), maxrows):
+        yield dset[start:start + maxrows]
+
+
+def _sort(array, order):
+    # sort a composite array by the given fields
+    return array[numpy.lexsort([array[f] for f in reversed(order)])]
+
+
+def _key(array, order):
+    # a copy of the given fields of a composite array
+    key = numpy.zeros(len(array), [(f, array.dtype[f]) for f in order])
+    for f in order:
+        key[f] = array[f]
+    return key
+
+
+def sorted_blocks(arrays, order, maxrows):
+    """
+    Sort a sequence of composite arrays by the given fields with an external
+    merge sort, by keeping in memory at most `maxrows` records: sorted runs
+    are stored in a temporary file and then merged. If all the records fit
+    in memory no temporary file is created.
+
+    :param arrays: an iterable over composite arrays with the same dtype
+    :param order: a list of field names
+    :param maxrows: the maximum number of records in memory
+    :yields: sorted composite arrays of at most `maxrows` records
+
+    >>> arrays = [numpy.array([(3, 1), (1, 2), (2, 3)], 'i,i'),
+    ...           numpy.array([(1, 4), (4, 5)], 'i,i')]
+    >>> [a['f0'].tolist() for a in sorted_blocks(arrays, ['f0', 'f1'], 2)]
+    [[1], [1], [2], [3], [4]]
+    """
+    runs, buf, nrows = [], [], 0
+    tmp = None
+    try:
+        for array in itertools.chain(arrays, [None]):
+            chunks = [] if array is None else iter_blocks(array, maxrows)
+            for chunk in chunks:
+                if nrows + len(chunk) > maxrows:  # store a sorted run
+                    if tmp is None:
+                        fh, tmp = tempfile.mkstemp(suffix='.hdf5')
+                        os.close(fh)
+                    with h5py.File(tmp, 'a') as h5:
+                        runs.append('run-%d' % len(runs))
+                        h5[runs[-1]] = _sort(numpy.concatenate(buf), order)
+                    buf, nrows = [], 0
+                buf.append(chunk)
+                nrows += len(chunk)
+        if tmp is None:  # everything fits in memory
+            if nrows:
+                for block in iter_blocks(
+                        _sort(numpy.concatenate(buf), order), maxrows):
+                    yield block
+            return
+        with h5py.File(tmp, 'a') as h5:
+            runs.append('run-%d' % len(runs))
+            h5[runs[-1]] = _sort(numpy.concatenate(buf), order)
+        del buf[:]
+        # merge the runs by reading them in buffers; at each step all the
+        # records not greater than the smallest of the last keys in the
+        # buffers can be emitted, since the runs are sorted
+        bufrows = max(maxrows // (2 * len(runs)), 1)
+        with h5py.File(tmp, 'r') as h5:
+            dsets = [h5[run] for run in runs]
+            offsets = [0] * len(dsets)
+            buffers = [dset[:0] for dset in dsets]
+            while True:
+                for i, dset in enumerate(dsets):
+                    if len(buffers[i]) == 0 and offsets[i] < len(dset):
+                        buffers[i] = dset[offsets[i]:offsets[i] + bufrows]
+                        offsets[i] += len(buffers[i])
+                active = [i for i, b in enumerate(buffers) if len(b)]
+                if not active:
+                    break
+                lastkeys = numpy.concatenate(
+                    [_key(buffers[i][-1:], order) for i in active])
+                threshold = numpy.sort(lastkeys)[:1]
+                out = []
+                for i in active:
+                    n = numpy.searchsorted(
+                        _key(buffers[i], order), threshold, 'right')[0]
+                    out.append(buffers[i][:n])
+                    buffers[i] = buffers[i][n:]
+                yield _sort(numpy.concatenate(out), order)
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+
+class Writer(object):
+    """
+    A writer owning a single open handle on an HDF5 file and performing
+    `extend` and `set_attrs` operations in a background thread, so that
+    the caller can go on while the I/O happens. The file is flushed
+    only when there are no pending operations; `.flush()` is a barrier
+    waiting for all the operations sent so far. Errors happening in
+    the background are raised by the next call to `.flush()` or `.close()`.
+
+    >>> writer = Writer('/tmp/w.h5', 'w')
+    >>> writer.extend('data', numpy.array([1, 2, 3]))
+    >>> writer.extend('data', numpy.array([4]), nbytes=32)
+    >>> writer.close()
+    >>> with File('/tmp/w.h5', 'r') as f:
+    ...     print(list(f['data'][()]), f['data'].attrs['nbytes'])
+    [1, 2, 3, 4] 32
+    """
+    def __init__(self, hdf5path, mode='a'):
+        self.hdf5path = hdf5path
+        self.mode = mode
+        self.pid = os.getpid()
+        self._queue = queue.Queue()
+        self._exc = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            h5 = h5py.File(self.hdf5path, self.mode)
+        except Exception as exc:
+            h5 = None
+            self._exc = exc
+        while True:
+            op, key, array, attrs = self._queue.get()
+            try:
+                if op == 'close':
+                    break
+                elif self._exc is not None:
+                    continue  # skip the operations after a failure
+                elif h5 is None:
+                    raise IOError('Could not open %s' % self.hdf5path)
+                elif op == 'extend':
+                    try:
+                        dset = h5[key]
+                    except KeyError:
+                        dset = create(h5, key, array.dtype,
+                                      shape=(None,) + array.shape[1:])
+                    extend(dset, array)
+                else:  # set_attrs
+                    dset = h5[key]
+                for k, v in attrs.items():
+                    dset.attrs[k] = v
+                if self._queue.empty():  # flush a batch of operations
+                    h5.flush()
+            except Exception as exc:
+                self._exc = exc
+            finally:
+                self._queue.task_done()
+        if h5 is not None:
+            h5.close()
+
+    def extend(self, key, array, **attrs):
+        """
+        Extend the dataset associated to the given key, creating it if
+        needed, and then set the given attributes on it.
+
+        :param key: name of the dataset
+        :param array: array to store
+        :param attrs: a dictionary of attributes
+        """
+        self._queue.put(('extend', key, array, attrs))
+
+    def set_attrs(self, key, **attrs):
+        """
+        Set the HDF5 attributes of the given key
+        """
+        self._queue.put(('set_attrs', key, None, attrs))
+
+    def flush(self):
+        """
+        Wait for the pending operations to be saved
+        """
+        self._queue.join()
+        if self._exc is not None:
+            exc, self._exc = self._exc, None
+            raise exc
+
+    def close(self):
+        """
+        Save the pending operations and close the underlying file
+        """
+        self._queue.put(('close', None, None, {}))
+        self._thread.join()
+        self.flush()
+
+
+_writers = {}  # hdf5path -> Writer instance in the current process
+
+
+def get_writer(hdf5path):
+    """
+    :param hdf5path: path of an HDF5 file
+    :returns: the :class:`Writer` associated to the path in this process
+    """
+    writer = _writers.get(hdf5path)
+    if writer is None or writer.pid != os.getpid():  # new or forked
+        writer = _writers[hdf5path] = Writer(hdf5path)
+    return writer
+
+
+def flush_writer(hdf5path):
+    """
+    Wait for the pending operations on the given path, if any
+    """
+    writer = _writers.get(hdf5path)
+    if writer is not None and writer.pid == os.getpid():
+        writer.flush()
+
+
+def close_writer(hdf5path):
+    """
+    Close the writer associated to the given path, if any
+    """
+    writer = _writers.pop(hdf5path, None)
+    if writer is not None and writer.pid == os.getpid():
+        writer.close()
+
+
+@atexit.register
+def _close_writers():
+    for hdf5path in list(_writers):
+        close_writer(hdf5path)
+
+
 class LiteralAttrs(object):
     """
     A class to serialize a set of parameters in HDF5 format. The goal is to
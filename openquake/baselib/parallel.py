@@ -389,7 +389,8 @@ class IterResult(object):
             duration = mon.children[0].duration  # the task is the first child
             tup = (mon.task_no, mon.weight, duration)
             data = numpy.array([tup], self.task_data_dt)
-            hdf5.extend3(mon.hdf5path, 'task_info/' + self.name, data)
+            hdf5.get_writer(mon.hdf5path).extend(
+                'task_info/' + self.name, data)
         mon.flush()
 
     def reduce(self, agg=operator.add, acc=None):
@@ -175,7 +175,7 @@ class Monitor(object):
             data = numpy.array(
                 _pairs(dic.items()),
                 [('par_name', hdf5.vstr), ('par_value', hdf5.vstr)])
-            hdf5.extend3(self.hdf5path, 'job_info', data)
+            hdf5.get_writer(self.hdf5path).extend('job_info', data)
 
     def flush(self):
         """
@@ -191,7 +191,7 @@ class Monitor(object):
         if len(data) == 0:  # no information
             return []
         elif self.hdf5path:
-            hdf5.extend3(self.hdf5path, 'performance_data', data)
+            hdf5.get_writer(self.hdf5path).extend('performance_data', data)
 
         # reset monitor
         self.duration = 0
@@ -22,6 +22,7 @@ import sys
 import unittest
 import tempfile
 import numpy
+from openquake.baselib import hdf5
 from openquake.baselib.datastore import DataStore, read
 
 
@@ -60,6 +61,39 @@ class DataStoreTestCase(unittest.TestCase):
         self.dstore['a/b'] = 42
         self.assertTrue('a/b' in self.dstore)
 
+    def test_writer(self):
+        # extend a dataset in the background while the datastore is open
+        writer = hdf5.get_writer(self.dstore.hdf5path)
+        for i in range(3):
+            writer.extend('data', numpy.array([i, i]), nbytes=16 * (i + 1))
+        self.dstore.flush()  # wait for the background writer
+        numpy.testing.assert_equal(self.dstore['data'][()], [0, 0, 1, 1, 2, 2])
+        self.assertEqual(self.dstore.get_attr('data', 'nbytes'), 48)
+
+        # errors in the background are raised by the barrier
+        writer.set_attrs('missing', nbytes=0)
+        with self.assertRaises(KeyError):
+            self.dstore.flush()
+        self.dstore.close()
+        self.assertIs(hdf5._writers.get(self.dstore.hdf5path), None)
+
+    def test_sorted_blocks(self):
+        # sort a dataset larger than the memory limit by merging runs
+        dt = numpy.dtype([('rlzi', numpy.uint16), ('sid', numpy.uint32),
+                          ('gmv', numpy.float32)])
+        rng = numpy.random.RandomState(42)
+        arr = numpy.zeros(1000, dt)
+        arr['rlzi'] = rng.randint(0, 3, 1000)
+        arr['sid'] = rng.randint(0, 50, 1000)
+        arr['gmv'] = rng.random_sample(1000)
+        self.dstore['gmfs'] = arr
+        dset = self.dstore['gmfs']
+        blocks = list(hdf5.sorted_blocks(
+            hdf5.iter_blocks(dset, 100), ['rlzi', 'sid', 'gmv'], 100))
+        self.assertLessEqual(max(map(len, blocks)), 100)
+        arr.sort(order=['rlzi', 'sid', 'gmv'])
+        numpy.testing.assert_equal(numpy.concatenate(blocks), arr)
+
     def test_export_path(self):
         path = self.dstore.export_path('hello.txt', tempfile.mkdtemp())
         mo = re.search('hello_\d+', path)
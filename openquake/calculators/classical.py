@@ -17,12 +17,13 @@
 # along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import division
+import os
 import math
 import logging
 import operator
 import numpy
 
-from openquake.baselib import parallel
+from openquake.baselib import parallel, datastore
 from openquake.baselib.python3compat import encode
 from openquake.baselib.general import AccumDict
 from openquake.hazardlib.calc.hazard_curve import classical, ProbabilityMap
@@ -91,6 +92,7 @@ class PSHACalculator(base.HazardCalculator):
         """
         with self.monitor('aggregate curves', autoflush=True):
             acc.eff_ruptures += pmap_by_grp.eff_ruptures
+            acc.discarded += pmap_by_grp.discarded
             for grp_id in pmap_by_grp:
                 if pmap_by_grp[grp_id]:
                     acc[grp_id] |= pmap_by_grp[grp_id]
@@ -115,6 +117,7 @@ class PSHACalculator(base.HazardCalculator):
             zd[grp.id] = ProbabilityMap(num_levels, num_gsims)
         zd.calc_times = []
         zd.eff_ruptures = AccumDict()  # grp_id -> eff_ruptures
+        zd.discarded = AccumDict()  # stage -> site-rupture pairs
         return zd
 
     def execute(self):
@@ -128,22 +131,33 @@ class PSHACalculator(base.HazardCalculator):
         except AttributeError:
             raise RuntimeError('No CompositeSourceModel, did you forget to '
                                'run the hazard or the --hc option?')
-        with self.monitor('managing sources', autoflush=True):
-            allargs = self.gen_args(self.monitor('classical'))
-            iterargs = saving_sources_by_task(allargs, self.datastore)
-            if isinstance(allargs, list):
-                # there is a trick here: if the arguments are known
-                # (a list, not an iterator), keep them as a list
-                # then the Starmap will understand the case of a single
-                # argument tuple and it will run in core the task
-                iterargs = list(iterargs)
-            ires = parallel.Starmap(
-                self.core_task.__func__, iterargs).submit_all()
-        self.nsites = []
-        acc = ires.reduce(self.agg_dicts, self.zerodict())
+        self.index_paths = []
+        try:
+            with self.monitor('managing sources', autoflush=True):
+                allargs = self.gen_args(self.monitor('classical'))
+                iterargs = saving_sources_by_task(allargs, self.datastore)
+                if isinstance(allargs, list):
+                    # there is a trick here: if the arguments are known
+                    # (a list, not an iterator), keep them as a list
+                    # then the Starmap will understand the case of a single
+                    # argument tuple and it will run in core the task
+                    iterargs = list(iterargs)
+                ires = parallel.Starmap(
+                    self.core_task.__func__, iterargs).submit_all()
+            self.nsites = []
+            acc = ires.reduce(self.agg_dicts, self.zerodict())
+        finally:
+            for index_path in self.index_paths:  # the tasks do not need them
+                for ext in ('.idx', '.dat'):
+                    if os.path.exists(index_path + ext):
+                        os.remove(index_path + ext)
         if not self.nsites:
             raise RuntimeError('All sources were filtered out!')
         logging.info('Effective sites per task: %d', numpy.mean(self.nsites))
+        if acc.discarded:
+            logging.info('Discarded site-rupture pairs: %d by the approximate '
+                         'distance filter, %d by the exact distance filter',
+                         acc.discarded['approx'], acc.discarded['exact'])
         with self.monitor('store source_info', autoflush=True):
             self.store_source_info(self.csm.infos, acc)
         return acc
@@ -163,14 +177,24 @@ class PSHACalculator(base.HazardCalculator):
             tiles = self.sitecol.split_in_tiles(num_tiles)
         else:
             tiles = [self.sitecol]
-        param = dict(truncation_level=oq.truncation_level, imtls=oq.imtls)
+        param = dict(
+            truncation_level=oq.truncation_level, imtls=oq.imtls,
+            pointsource_collapse_factor=oq.pointsource_collapse_factor,
+            poe_table_tolerance=oq.poe_table_tolerance,
+            poe_table_dir=os.path.join(datastore.get_datadir(), 'poe_tables'))
         minweight = source.MINWEIGHT * math.sqrt(len(self.sitecol))
         for tile_i, tile in enumerate(tiles, 1):
             num_tasks = 0
             num_sources = 0
             with self.monitor('prefiltering'):
                 logging.info('Prefiltering tile %d of %d', tile_i, len(tiles))
-                src_filter = SourceFilter(tile, oq.maximum_distance)
+                # the rtree index is stored next to the datastore
+                # so that the workers can read it
+                src_filter = SourceFilter(
+                    tile, oq.maximum_distance, index_path='%s_sites_%d' % (
+                        self.datastore.calc_dir, tile_i))
+                if src_filter.index_path:
+                    self.index_paths.append(src_filter.index_path)
                 csm = self.csm.filter(src_filter)
             if tile_i == 1:  # set it only on the first tile
                 maxweight = csm.get_maxweight(tasks_per_tile, minweight)
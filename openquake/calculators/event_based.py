@@ -153,10 +153,12 @@ def _build_eb_ruptures(
     Filter the ruptures stored in the dictionary num_occ_by_rup and
     yield pairs (rupture, <list of associated EBRuptures>)
     """
+    dist_cache = {}  # distances shared by the ruptures of the source
     for rup in sorted(num_occ_by_rup, key=operator.attrgetter('rup_no')):
         with rup_mon:
             try:
-                rup.ctx = cmaker.make_contexts(s_sites, rup)
+                rup.ctx = cmaker.make_contexts(
+                    s_sites, rup, dist_cache=dist_cache)
                 indices = rup.ctx[0].sids
             except FarAwayRupture:
                 # ignore ruptures which are far away
@@ -425,11 +427,6 @@ def save_gmdata(calc, n_rlzs):
     logging.info('Generated %s of GMFs', humansize(array['nbytes'].sum()))
 
 
-def update_nbytes(dstore, key, array):
-    nbytes = dstore.get_attr(key, 'nbytes', 0)
-    dstore.set_attrs(key, nbytes=nbytes + array.nbytes)
-
-
 @base.calculators.add('event_based')
 class EventBasedCalculator(base.HazardCalculator):
     """
@@ -453,16 +450,18 @@ class EventBasedCalculator(base.HazardCalculator):
         """
         sav_mon = self.monitor('saving gmfs')
         agg_mon = self.monitor('aggregating hcurves')
-        hdf5path = self.datastore.hdf5path
+        writer = hdf5.get_writer(self.datastore.hdf5path)
         for res in results:
             self.gmdata += res['gmdata']
             data = res['gmfdata']
             if data is not None:
                 with sav_mon:
-                    hdf5.extend3(hdf5path, 'gmf_data/data', data)
-                    # it is important to save the number of bytes while the
-                    # computation is going, to see the progress
-                    update_nbytes(self.datastore, 'gmf_data/data', data)
+                    # the data are saved in the background; it is important
+                    # to save the number of bytes while the computation is
+                    # going, to see the progress
+                    self.gmf_nbytes += data.nbytes
+                    writer.extend('gmf_data/data', data,
+                                  nbytes=self.gmf_nbytes)
                     for sid, start, stop in res['indices']:
                         self.indices[sid].append(
                             (start + self.offset, stop + self.offset))
@@ -475,7 +474,6 @@ class EventBasedCalculator(base.HazardCalculator):
                     array[:] = 1. - (1. - array) * (1. - poes)
             sav_mon.flush()
             agg_mon.flush()
-            self.datastore.flush()
             if 'ruptures' in res:
                 vars(EventBasedRuptureCalculator)['save_ruptures'](
                     self, res['ruptures'])
@@ -545,11 +543,13 @@ class EventBasedCalculator(base.HazardCalculator):
         R = self.datastore['csm_info'].get_num_rlzs()
         self.gmdata = {}
         self.offset = 0
+        self.gmf_nbytes = 0
         self.indices = collections.defaultdict(list)  # sid -> indices
         acc = parallel.Starmap(
             self.core_task.__func__, self.gen_args()
         ).reduce(self.combine_pmaps_and_save_gmfs, {
             r: ProbabilityMap(L) for r in range(R)})
+        self.datastore.flush()  # wait for the gmfs to be saved
         save_gmdata(self, R)
         if self.indices:
             logging.info('Saving gmf_data/indices')
@@ -16,6 +16,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
 
+import logging
+import numpy
+from openquake.baselib import config
 from openquake.baselib.general import import_all, CallableDict
 from openquake.commonlib.writers import write_csv
 
@@ -45,6 +48,44 @@ def export_csv(ekey, dstore):
     return [write_csv(dstore.export_path(name), array)]
 
 
+def get_maxrows(dtype):
+    """
+    :param dtype: the dtype of the records to export
+    :returns: the number of records that can be kept in memory by the
+              exporters, according to the parameter `max_export_mb` in the
+              section [memory] of openquake.cfg
+    """
+    maxbytes = config.memory.max_export_mb * 1024 ** 2
+    return max(1, maxbytes // numpy.dtype(dtype).itemsize)
+
+
+def write_csv_blocks(dest, blocks, total, dtype, fmt='%.6E', comment=None):
+    """
+    Write blocks of records on a single CSV file, by logging the progress.
+
+    :param dest: the path of the file to write
+    :param blocks: an iterable over composite arrays of the given dtype
+    :param total: the total number of records, for the progress report
+    :param dtype: the dtype of the records, used to build the header
+    :param fmt: formatting string for the floats
+    :param comment: optional first line starting with a # character
+    :returns: the path of the file
+    """
+    header = None
+    done = percent = 0
+    with open(dest, 'wb') as f:
+        for block in blocks:
+            write_csv(f, block, fmt=fmt, header=header, comment=comment)
+            header, comment = 'no-header', None
+            done += len(block)
+            if done * 100 // total >= percent + 10:
+                percent = done * 100 // total
+                logging.info('Exported %d%% of %s', percent, dest)
+        if header is None:  # there were no records, only write the header
+            write_csv(f, numpy.zeros(0, dtype), fmt=fmt, comment=comment)
+    return dest
+
+
 def keyfunc(ekey):
     """
     Extract the name before the colons:
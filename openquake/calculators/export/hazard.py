@@ -24,13 +24,15 @@ import collections
 
 import numpy
 
+from openquake.baselib import hdf5
 from openquake.baselib.general import humansize, group_array, DictArray
 from openquake.hazardlib import valid
 from openquake.hazardlib.imt import from_string
 from openquake.hazardlib.calc import disagg
 from openquake.calculators.views import view
 from openquake.calculators.extract import extract, get_mesh
-from openquake.calculators.export import export
+from openquake.calculators.export import (
+    export, get_maxrows, write_csv_blocks)
 from openquake.calculators.getters import GmfGetter, PmapGetter
 from openquake.commonlib import writers, hazard_writers, calc, util, source
 
@@ -584,18 +586,25 @@ def export_gmf_data_csv(ekey, dstore):
     imts = list(oq.imtls)
     sitemesh = get_mesh(dstore['sitecol'])
     eid = int(ekey[0].split('/')[1]) if '/' in ekey[0] else None
-    gmfa = dstore['gmf_data']['data'].value
+    gmf_data = dstore['gmf_data']['data']
+    maxrows = get_maxrows(gmf_data.dtype)
     if eid is None:  # new format
         f = dstore.build_fname('sitemesh', '', 'csv')
         sids = numpy.arange(len(sitemesh), dtype=U32)
         sites = util.compose_arrays(sids, sitemesh, 'site_id')
         writers.write_csv(f, sites)
         fname = dstore.build_fname('gmf', 'data', 'csv')
-        gmfa.sort(order=['rlzi', 'sid', 'eid'])
-        writers.write_csv(fname, _expand_gmv(gmfa, imts))
+        # the GMFs are sorted in chunks and merged, to save memory
+        blocks = hdf5.sorted_blocks(hdf5.iter_blocks(gmf_data, maxrows),
+                                    ['rlzi', 'sid', 'eid'], maxrows)
+        write_csv_blocks(
+            fname, (_expand_gmv(block, imts) for block in blocks),
+            len(gmf_data), _expand_gmv(gmf_data[:0], imts).dtype)
         return [fname, f]
     # old format for single eid
-    gmfa = gmfa[gmfa['eid'] == eid]
+    gmfa = numpy.concatenate([
+        block[block['eid'] == eid]
+        for block in hdf5.iter_blocks(gmf_data, maxrows)] or [gmf_data[:0]])
     fnames = []
     for rlzi, array in group_array(gmfa, 'rlzi').items():
         rlz = rlzs_assoc.realizations[rlzi]
@@ -24,11 +24,12 @@ import numpy
 from openquake.baselib import hdf5, parallel, performance
 from openquake.baselib.python3compat import decode, encode
 from openquake.baselib.general import (
-    group_array, split_in_blocks, deprecated as depr)
+    split_in_blocks, deprecated as depr)
 from openquake.hazardlib import nrml
 from openquake.hazardlib.stats import compute_stats2
 from openquake.risklib import scientific
-from openquake.calculators.export import export, loss_curves
+from openquake.calculators.export import (
+    export, loss_curves, get_maxrows, write_csv_blocks)
 from openquake.calculators.export.hazard import savez, get_mesh
 from openquake.calculators import getters
 from openquake.commonlib import writers, calc, hazard_writers
@@ -145,14 +146,17 @@ def export_losses_by_event(ekey, dstore):
     :param dstore: datastore object
     """
     loss_dt = dstore['oqparam'].loss_dt()
-    all_losses = dstore[ekey[0]].value
+    all_losses = dstore[ekey[0]]  # shape (E, R, LI)
     rlzs = dstore['csm_info'].get_rlzs_assoc().realizations
-    writer = writers.CsvWriter(fmt=writers.FIVEDIGITS)
+    maxrows = get_maxrows(loss_dt)
+    fnames = []
     for rlz in rlzs:
         dest = dstore.build_fname('losses_by_event', rlz, 'csv')
-        data = all_losses[:, rlz.ordinal].copy().view(loss_dt)
-        writer.save(data, dest)
-    return writer.getsaved()
+        blocks = (all_losses[start:start + maxrows, rlz.ordinal].view(loss_dt)
+                  for start in range(0, len(all_losses), maxrows))
+        fnames.append(write_csv_blocks(dest, blocks, len(all_losses),
+                                       loss_dt, fmt=writers.FIVEDIGITS))
+    return sorted(fnames)
 
 
 @export.add(('losses_by_asset', 'npz'))
@@ -244,37 +248,39 @@ def export_agg_losses_ebr(ekey, dstore):
     dtlist = ([('event_id', U64), ('rup_id', U32), ('year', U32),
                ('rlzi', U16)] + extra_list + oq.loss_dt_list())
     elt_dt = numpy.dtype(dtlist)
-    elt = numpy.zeros(len(agg_losses), elt_dt)
-    writer = writers.CsvWriter(fmt=writers.FIVEDIGITS)
-    the_events = dstore['events'].value
-    all_events = group_array(the_events, 'grp_id')
-    rup_data = {}
-    event_by_eid = {}  # eid -> event
-    # populate rup_data and event_by_eid
-    ruptures_by_grp = calc.get_ruptures_by_grp(dstore)
-    # TODO: avoid reading the events twice
-    for grp_id, events in all_events.items():
-        for event in events:
-            event_by_eid[event['eid']] = event
-        if has_rup_data:
-            ruptures = ruptures_by_grp.get(grp_id, [])
-            rup_data.update(get_rup_data(ruptures))
-    for r, row in enumerate(agg_losses):
-        rec = elt[r]
-        event = event_by_eid[row['eid']]
-        rec['event_id'] = event['eid']
-        rec['year'] = event['year']
-        rec['rlzi'] = row['rlzi']
+    events = dstore['events'].value
+    events = events[numpy.argsort(events['eid'])]
+    rup_data = {}  # serial -> (mag, lon, lat, depth)
+    if has_rup_data:
+        for ebruptures in calc.get_ruptures_by_grp(dstore).values():
+            rup_data.update(get_rup_data(ebruptures))
+    serials = numpy.array(sorted(rup_data), U32)
+    rdata = numpy.array([rup_data[s] for s in serials], F32)
+
+    def build_elt(losses):
+        # build the event loss table for a chunk of aggregate losses
+        elt = numpy.zeros(len(losses), elt_dt)
+        event = events[numpy.searchsorted(events['eid'], losses['eid'])]
+        elt['event_id'] = event['eid']
+        elt['year'] = event['year']
+        elt['rlzi'] = losses['rlzi']
         if rup_data:
-            rec['rup_id'] = rup_id = event['rup_id']
-            (rec['magnitude'], rec['centroid_lon'], rec['centroid_lat'],
-             rec['centroid_depth']) = rup_data[rup_id]
+            elt['rup_id'] = event['rup_id']
+            (elt['magnitude'], elt['centroid_lon'], elt['centroid_lat'],
+             elt['centroid_depth']) = rdata[
+                 numpy.searchsorted(serials, event['rup_id'])].T
         for lt, i in lti.items():
-            rec[lt] = row['loss'][i]
-    elt.sort(order=['year', 'event_id', 'rlzi'])
+            elt[lt] = losses['loss'][:, i]
+        return elt
+
+    # the table is built and sorted in chunks and merged, to save memory
+    maxrows = get_maxrows(elt_dt)
+    chunks = hdf5.iter_blocks(agg_losses, maxrows)
+    blocks = hdf5.sorted_blocks((build_elt(chunk) for chunk in chunks),
+                                ['year', 'event_id', 'rlzi'], maxrows)
     dest = dstore.build_fname('agg_losses', 'all', 'csv')
-    writer.save(elt, dest)
-    return writer.getsaved()
+    return [write_csv_blocks(dest, blocks, len(agg_losses), elt_dt,
+                             fmt=writers.FIVEDIGITS)]
 
 
 # this is used by classical_risk and event_based_risk
@@ -29,11 +29,13 @@ else:
 from openquake.baselib.hdf5 import ArrayWrapper
 from openquake.baselib.general import DictArray
 from openquake.baselib.python3compat import encode
+from openquake.hazardlib.probability_map import ProbabilityMap
 from openquake.calculators import getters
 from openquake.commonlib import calc, util
 
 F32 = numpy.float32
 F64 = numpy.float64
+U32 = numpy.uint32
 
 
 def barray(iterlines):
@@ -221,35 +223,164 @@ def hazard_items(dic, mesh, *extras, **kw):
     yield 'all', util.compose_arrays(mesh, array)
 
 
+def _parse(param, value, cast, expected, n=None):
+    # convert a comma-separated list of values, raising a clear error
+    try:
+        values = [cast(v) for v in value.split(',')]
+    except ValueError:
+        values = None
+    if values is None or n is not None and len(values) != n:
+        raise ValueError('Invalid %s: expected %s' % (param, expected))
+    return values
+
+
+def get_site_window(sitecol, what):
+    """
+    Split a string of the form `<kind>?<params>` into the kind and the
+    IDs of the sites selected by the parameters, which can be
+
+    - bbox=<minlon>,<minlat>,<maxlon>,<maxlat> (with minlon > maxlon
+      for a box crossing the international date line)
+    - sids=<sid1>,<sid2>,...,<sidN>
+    - stride=<n> to select one site every n
+
+    >>> from openquake.hazardlib.geo import Point
+    >>> from openquake.hazardlib.site import Site, SiteCollection
+    >>> sitecol = SiteCollection([
+    ...     Site(Point(lon, lat), 760., True, 100., 2.)
+    ...     for lon, lat in [(178, 0), (179, 1), (-179, 2), (10, 3)]])
+    >>> kind, sids = get_site_window(sitecol, 'mean?bbox=178.5,0,-178,5')
+    >>> kind, sids.tolist()
+    ('mean', [1, 2])
+    >>> get_site_window(sitecol, 'rlz-0?sids=3,0&stride=2')[1].tolist()
+    [0]
+    >>> get_site_window(sitecol, 'mean')
+    ('mean', None)
+
+    Invalid parameters raise a ValueError:
+
+    >>> get_site_window(sitecol, 'mean?sids=4')
+    Traceback (most recent call last):
+      ...
+    ValueError: Invalid sids=4: the site IDs must be in the range 0..3
+
+    :param sitecol: a SiteCollection instance
+    :param what: a string of the form `<kind>?<params>`
+    :returns: a pair (kind, sids) with sids None if there are no parameters
+    """
+    try:
+        kind, query_string = what.split('?', 1)
+    except ValueError:  # no question mark
+        return what, None
+    sitecol = sitecol.complete
+    mask = numpy.ones(len(sitecol), bool)
+    stride = 1
+    for param in query_string.split('&'):
+        try:
+            name, value = param.split('=', 1)
+        except ValueError:
+            raise ValueError('Invalid parameter %r in %s' % (param, what))
+        if name == 'bbox':
+            bbox = _parse(param, value, float, 'four finite floats', 4)
+            if not numpy.isfinite(bbox).all():
+                raise ValueError('Invalid %s: expected four finite floats'
+                                 % param)
+            minlon, minlat, maxlon, maxlat = bbox
+            lons, lats = sitecol.lons, sitecol.lats
+            if minlon <= maxlon:
+                mask &= (lons >= minlon) & (lons <= maxlon)
+            else:  # crossing the international date line
+                mask &= (lons >= minlon) | (lons <= maxlon)
+            mask &= (lats >= minlat) & (lats <= maxlat)
+        elif name == 'sids':
+            sids = _parse(param, value, int, 'integers')
+            if min(sids) < 0 or max(sids) >= len(sitecol):
+                raise ValueError(
+                    'Invalid %s: the site IDs must be in the range 0..%d' %
+                    (param, len(sitecol) - 1))
+            selected = numpy.zeros(len(sitecol), bool)
+            selected[sids] = True
+            mask &= selected
+        elif name == 'stride':
+            [stride] = _parse(param, value, int, 'a positive integer', 1)
+            if stride < 1:
+                raise ValueError('Invalid %s: expected a positive integer'
+                                 % param)
+        else:
+            raise ValueError('Unknown parameter %s in %s' % (name, what))
+    return kind, sitecol.sids[mask][::stride]
+
+
+def _renumber(pmap, sids):
+    # returns a ProbabilityMap with the curves of the given sites
+    # renumbered as 0, 1, ..., len(sids) - 1
+    renumbered = ProbabilityMap(pmap.shape_y, pmap.shape_z)
+    for i, sid in enumerate(sids):
+        if sid in pmap:
+            renumbered[i] = pmap[sid]
+    return renumbered
+
+
+def _gen_pmaps(getter, kind, sids):
+    for k, pmap in getter.items(kind):
+        yield k, pmap if sids is None else _renumber(pmap, sids)
+
+
+def hazard_pmaps(dstore, what):
+    """
+    :param dstore: a DataStore instance
+    :param what: a string of the form `<kind>?<params>`
+    :returns: (mesh, sids, pairs (kind, pmap)) for the selected sites
+    """
+    sitecol = dstore['sitecol']
+    mesh = get_mesh(sitecol)
+    kind, sids = get_site_window(sitecol, what)
+    if sids is not None:
+        mesh = mesh[sids]
+    getter = getters.PmapGetter(dstore, sids)  # read only the needed sites
+    return mesh, sids, _gen_pmaps(getter, kind, sids)
+
+
 @extract.add('hcurves')
 def extract_hcurves(dstore, what):
     """
     Extracts hazard curves. Use it as /extract/hcurves/mean or
-    /extract/hcurves/rlz-0, /extract/hcurves/stats, /extract/hcurves/rlzs etc
+    /extract/hcurves/rlz-0, /extract/hcurves/stats, /extract/hcurves/rlzs etc.
+    A subset of sites can be selected with the parameters described in
+    :func:`get_site_window`, i.e. /extract/hcurves/mean?bbox=9,45,10,46
     """
     oq = dstore['oqparam']
-    mesh = get_mesh(dstore['sitecol'])
+    mesh, sids, items = hazard_pmaps(dstore, what)
     dic = {}
-    for kind, hcurves in getters.PmapGetter(dstore).items(what):
+    for kind, hcurves in items:
         dic[kind] = hcurves.convert_npy(oq.imtls, len(mesh))
-    return hazard_items(dic, mesh, investigation_time=oq.investigation_time)
+    extras = [] if sids is None else [('sid', U32, sids)]
+    return hazard_items(dic, mesh, *extras,
+                        investigation_time=oq.investigation_time)
 
 
 @extract.add('hmaps')
 def extract_hmaps(dstore, what):
     """
     Extracts hazard maps. Use it as /extract/hmaps/mean or
-    /extract/hmaps/rlz-0, etc
+    /extract/hmaps/rlz-0, etc. A subset of sites can be selected
+    with the parameters described in :func:`get_site_window`,
+    i.e. /extract/hmaps/mean?bbox=9,45,10,46&stride=10
     """
     oq = dstore['oqparam']
-    sitecol = dstore['sitecol']
-    mesh = get_mesh(sitecol)
+    vs30 = dstore['sitecol'].vs30
+    mesh, sids, items = hazard_pmaps(dstore, what)
     pdic = DictArray({imt: oq.poes for imt in oq.imtls})
     dic = {}
-    for kind, hcurves in getters.PmapGetter(dstore).items(what):
+    for kind, hcurves in items:
         hmap = calc.make_hmap(hcurves, oq.imtls, oq.poes)
         dic[kind] = calc.convert_to_array(hmap, len(mesh), pdic)
-    return hazard_items(dic, mesh, ('vs30', F32, sitecol.vs30),
+    if sids is None:
+        extras = [('vs30', F32, vs30)]
+    else:
+        extras = [('vs30', F32, dstore['sitecol'].complete.vs30[sids]),
+                  ('sid', U32, sids)]
+    return hazard_items(dic, mesh, *extras,
                         investigation_time=oq.investigation_time)
 
 
@@ -257,14 +388,18 @@ def extract_hmaps(dstore, what):
 def extract_uhs(dstore, what):
     """
     Extracts uniform hazard spectra. Use it as /extract/uhs/mean or
-    /extract/uhs/rlz-0, etc
+    /extract/uhs/rlz-0, etc. A subset of sites can be selected
+    with the parameters described in :func:`get_site_window`,
+    i.e. /extract/uhs/mean?sids=0,10,20
     """
     oq = dstore['oqparam']
-    mesh = get_mesh(dstore['sitecol'])
+    mesh, sids, items = hazard_pmaps(dstore, what)
     dic = {}
-    for kind, hcurves in getters.PmapGetter(dstore).items(what):
+    for kind, hcurves in items:
         dic[kind] = calc.make_uhs(hcurves, oq.imtls, oq.poes, len(mesh))
-    return hazard_items(dic, mesh, investigation_time=oq.investigation_time)
+    extras = [] if sids is None else [('sid', U32, sids)]
+    return hazard_items(dic, mesh, *extras,
+                        investigation_time=oq.investigation_time)
 
 
 def _agg(losses, idxs):
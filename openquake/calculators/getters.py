@@ -152,7 +152,7 @@ class PmapGetter(object):
         if not kind:  # use default
             if 'hcurves' in self.dstore:
                 for k in sorted(self.dstore['hcurves']):
-                    yield k, self.dstore['hcurves/' + k]
+                    yield k, self.get_hcurves_pmap(k)
             elif num_rlzs == 1:
                 yield 'rlz-000', self.get(0)
             return
@@ -164,7 +164,31 @@ class PmapGetter(object):
             yield kind, self.get(int(kind[4:]))
         if 'hcurves' in self.dstore and kind in ('stats', 'all'):
             for k in sorted(self.dstore['hcurves']):
-                yield k, self.dstore['hcurves/' + k]
+                yield k, self.get_hcurves_pmap(k)
+
+    def get_hcurves_pmap(self, kind):
+        """
+        :param kind: the name of a dataset in the group hcurves, i.e. 'mean'
+        :returns: a ProbabilityMap restricted to the sites of the getter;
+                  only the corresponding rows of the dataset are read
+        """
+        dset = self.dstore.getitem('hcurves/' + kind)
+        dsids = dset.attrs['sids']  # sorted site IDs
+        sids = numpy.unique(self.sids)
+        idxs = numpy.searchsorted(dsids, sids)
+        ok = idxs < len(dsids)
+        ok[ok] = dsids[idxs[ok]] == sids[ok]
+        idxs = idxs[ok]
+        pmap = probability_map.ProbabilityMap(*dset.shape[1:])
+        if len(idxs) == len(dsids):  # read everything
+            array = dset.value
+        elif len(idxs):  # read only the rows of the given sites
+            array = dset[idxs]
+        else:
+            return pmap
+        for sid, poes in zip(dsids[idxs], array):
+            pmap[sid] = probability_map.ProbabilityCurve(poes)
+        return pmap
 
     def get_mean(self, grp=None):
         """
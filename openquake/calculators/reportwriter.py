@@ -49,6 +49,7 @@ def count_ruptures(sources, srcfilter, gsims, param, monitor):
     acc = AccumDict({grp_id: {} for grp_id in dic})
     acc.eff_ruptures = {grp_id: 0 for grp_id in dic}
     acc.calc_times = AccumDict(accum=numpy.zeros(4))
+    acc.discarded = AccumDict()  # no site-rupture pairs are discarded
     for grp_id in dic:
         for src in sources:
             t0 = time.time()
@@ -16,13 +16,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
 
-import itertools
 import numpy
 
 from openquake.commonlib import riskmodels
-from openquake.risklib import scientific
 from openquake.calculators import base, event_based
 
+U16 = numpy.uint16
+U32 = numpy.uint32
 F32 = numpy.float32
 F64 = numpy.float64
 
@@ -36,12 +36,20 @@ def dist_by_asset(data, multi_stat_dt):
     N, R, L = data.shape[:3]
     out = numpy.zeros((N, R), multi_stat_dt)
     for l, lt in enumerate(multi_stat_dt.names):
-        out_lt = out[lt]
-        for n, r in itertools.product(range(N), range(R)):
-            out_lt[n, r] = tuple(data[n, r, l])  # (mean, stddev)
+        out[lt]['mean'] = data[:, :, l, 0]
+        out[lt]['stddev'] = data[:, :, l, 1]
     return out
 
 
+def build_stat_dt(shape=()):
+    """
+    :param shape: the shape of the mean and stddev arrays
+    :returns: the dtype of the outputs per asset, loss type and realization
+    """
+    return numpy.dtype([('lid', U16), ('rlzi', U16), ('aid', U32),
+                        ('stat', (F32, (2,) + shape))])
+
+
 def scenario_damage(riskinput, riskmodel, param, monitor):
     """
     Core function for a damage computation.
@@ -55,9 +63,9 @@ def scenario_damage(riskinput, riskmodel, param, monitor):
     :param param:
         dictionary of extra parameters
     :returns:
-        a dictionary {'d_asset': [(l, r, a, mean-stddev), ...],
+        a dictionary {'d_asset': [array of dtype build_stat_dt((D,)), ...],
                       'd_tag': damage array of shape T, R, L, E, D,
-                      'c_asset': [(l, r, a, mean-stddev), ...],
+                      'c_asset': [array of dtype build_stat_dt(), ...],
                       'c_tag': damage array of shape T, R, L, E}
 
     `d_asset` and `d_tag` are related to the damage distributions
@@ -71,31 +79,52 @@ def scenario_damage(riskinput, riskmodel, param, monitor):
     D = len(riskmodel.damage_states)
     E = param['number_of_ground_motion_fields']
     T = len(param['tags'])
+    tagidx = param['tagidx']  # shape (T, 2)
+    d_dt = build_stat_dt((D,))
+    c_dt = build_stat_dt()
     result = dict(d_asset=[], d_tag=numpy.zeros((T, R, L, E, D), F64),
                   c_asset=[], c_tag=numpy.zeros((T, R, L, E), F64))
     for outputs in riskmodel.gen_outputs(riskinput, monitor):
+        # the assets of an output have the same site and taxonomy, so the
+        # vectorization is per output and not per taxonomy across the sites
         r = outputs.rlzi
-        for l, damages in enumerate(outputs):
+        assets = outputs.assets
+        A = len(assets)
+        taxo = riskmodel.taxonomy[assets[0].taxonomy]
+        aids = numpy.array([asset.ordinal for asset in assets], U32)
+        numbers = numpy.array([asset.number for asset in assets], F64)
+        tagidxs = numpy.array([asset.tagidxs for asset in assets], U32)
+        # pairs (asset index, tag index) for the tags of each asset
+        a_idx, t_idx = (tagidxs[:, tagidx[:, 0]] == tagidx[:, 1]).nonzero()
+        for l, fractions in enumerate(outputs):  # shape (A, E, D)
             loss_type = riskmodel.loss_types[l]
             c_model = c_models.get(loss_type)
-            for a, fraction in enumerate(damages):
-                asset = outputs.assets[a]
-                taxo = riskmodel.taxonomy[asset.taxonomy]
-                damages = fraction * asset.number
-                t = asset.tagmask(param['tags'])
-                result['d_tag'][t, r, l] += damages  # shape (E, D)
-                if c_model:  # compute consequences
-                    means = [par[0] for par in c_model[taxo].params]
-                    # NB: we add a 0 in front for nodamage state
-                    c_ratio = numpy.dot(fraction, [0] + means)
-                    consequences = c_ratio * asset.value(loss_type)
-                    result['c_asset'].append(
-                        (l, r, asset.ordinal,
-                         scientific.mean_std(consequences)))
-                    result['c_tag'][t, r, l] += consequences
-                    # TODO: consequences for the occupants
-                result['d_asset'].append(
-                    (l, r, asset.ordinal, scientific.mean_std(damages)))
+            damages = fractions * numbers[:, None, None]
+            numpy.add.at(result['d_tag'][:, r, l], t_idx, damages[a_idx])
+            d_asset = numpy.zeros(A, d_dt)
+            d_asset['lid'] = l
+            d_asset['rlzi'] = r
+            d_asset['aid'] = aids
+            d_asset['stat'][:, 0] = damages.mean(axis=1)
+            d_asset['stat'][:, 1] = damages.std(axis=1, ddof=1)
+            result['d_asset'].append(d_asset)
+            if c_model:  # compute consequences
+                means = [par[0] for par in c_model[taxo].params]
+                # NB: we add a 0 in front for nodamage state
+                c_ratio = numpy.dot(fractions, [0] + means)  # shape (A, E)
+                values = numpy.array([asset.value(loss_type)
+                                      for asset in assets])
+                consequences = c_ratio * values[:, None]
+                c_asset = numpy.zeros(A, c_dt)
+                c_asset['lid'] = l
+                c_asset['rlzi'] = r
+                c_asset['aid'] = aids
+                c_asset['stat'][:, 0] = consequences.mean(axis=1)
+                c_asset['stat'][:, 1] = consequences.std(axis=1, ddof=1)
+                result['c_asset'].append(c_asset)
+                numpy.add.at(result['c_tag'][:, r, l], t_idx,
+                             consequences[a_idx])
+                # TODO: consequences for the occupants
     result['gmdata'] = riskinput.gmdata
     return result
 
@@ -119,7 +148,9 @@ class ScenarioDamageCalculator(base.RiskCalculator):
         self.param['consequence_models'] = riskmodels.get_risk_models(
             self.oqparam, 'consequence')
         self.riskinputs = self.build_riskinputs('gmf', eids=eids)
-        self.param['tags'] = list(self.assetcol.tagcol)
+        tagcol = self.assetcol.tagcol
+        self.param['tags'] = list(tagcol)
+        self.param['tagidx'] = tagcol.get_tagidx()
 
     def post_execute(self, result):
         """
@@ -140,8 +171,8 @@ class ScenarioDamageCalculator(base.RiskCalculator):
                                                 ('stddev', (F32, D))])))
         multi_stat_dt = numpy.dtype(dt_list)
         d_asset = numpy.zeros((N, R, L, 2, D), F32)
-        for (l, r, a, stat) in result['d_asset']:
-            d_asset[a, r, l] = stat
+        for arr in result['d_asset']:
+            d_asset[arr['aid'], arr['rlzi'], arr['lid']] = arr['stat']
         self.datastore['dmg_by_asset'] = dist_by_asset(
             d_asset, multi_stat_dt)
 
@@ -149,8 +180,10 @@ class ScenarioDamageCalculator(base.RiskCalculator):
         if result['c_asset']:
             stat_dt = numpy.dtype([('mean', F32), ('stddev', F32)])
             c_asset = numpy.zeros((N, R, L), stat_dt)
-            for (l, r, a, stat) in result['c_asset']:
-                c_asset[a, r, l] = stat
+            for arr in result['c_asset']:
+                idx = arr['aid'], arr['rlzi'], arr['lid']
+                c_asset['mean'][idx] = arr['stat'][:, 0]
+                c_asset['stddev'][idx] = arr['stat'][:, 1]
             multi_stat_dt = self.oqparam.loss_dt(stat_dt)
             self.datastore['losses_by_asset'] = c_asset
 
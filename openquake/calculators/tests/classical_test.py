@@ -326,6 +326,12 @@ hazard_uhs-mean.csv
             hmaps.dtype.names,
             ('PGA-0.002105', 'SA(0.2)-0.002105', 'SA(1.0)-0.002105'))
 
+        # extracting the hmaps on a subset of the sites
+        win = dict(extract(self.calc.datastore, 'hmaps/stats?stride=2'))
+        numpy.testing.assert_equal(
+            win['all']['sid'], numpy.arange(0, len(hmaps), 2))
+        numpy.testing.assert_equal(win['all']['mean'], hmaps[::2])
+
     @attr('qa', 'hazard', 'classical')
     def test_case_19(self):
         self.assert_curves_ok([
@@ -17,10 +17,14 @@
 # along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import unittest
 import numpy
 from nose.plugins.attrib import attr
 
+from openquake.baselib.hdf5 import ArrayWrapper
+from openquake.baselib.performance import Monitor
 from openquake.hazardlib import InvalidFile
+from openquake.risklib.asset import Asset, CostCalculator, TagCollection
 from openquake.commonlib.writers import write_csv
 from openquake.qa_tests_data.scenario_damage import (
     case_1, case_1c, case_1h, case_2, case_3, case_4, case_4b, case_5, case_5a,
@@ -30,10 +34,85 @@ from openquake.calculators.tests import (
 from openquake.calculators.extract import extract
 from openquake.calculators.export import export
 from openquake.calculators.views import view
+from openquake.calculators.scenario_damage import scenario_damage
 
 aae = numpy.testing.assert_almost_equal
 
 
+class FakeRiskModel(object):
+    loss_types = ['structural']
+    damage_states = ['no_damage', 'slight', 'complete']
+
+    def __init__(self, taxonomy, outputs):
+        self.taxonomy = taxonomy
+        self.outputs = outputs
+
+    def gen_outputs(self, riskinput, monitor):
+        return iter(self.outputs)
+
+
+class FakeHazardGetter(object):
+    num_rlzs = 1
+
+
+class FakeRiskInput(object):
+    hazard_getter = FakeHazardGetter()
+    gmdata = None
+
+
+class FakeConsequenceFunction(object):
+    params = [(0.2, 0.1), (0.9, 0.1)]  # (mean, stddev) per damage state
+
+
+class TagAggregationTestCase(unittest.TestCase):
+    def test_repeated_tags(self):
+        # the vectorized accumulation by tag gives the same results as
+        # the loop on the assets; several assets share taxonomy and state
+        tagcol = TagCollection(['taxonomy', 'state'])
+        calc = CostCalculator(
+            dict(structural='aggregated'), dict(structural='per_asset'),
+            dict(structural='EUR'), tagi={'taxonomy': 0, 'state': 1})
+        E, D = 3, 3
+        rng = numpy.random.RandomState(42)
+        outputs, tags_by_asset = [], []
+        for taxo, states in [('RC', ['A', 'B', 'A']), ('RM', ['B', 'B'])]:
+            assets = []
+            for state in states:
+                a = len(tags_by_asset)
+                tagidxs = tagcol.add_tags(dict(taxonomy=taxo, state=state))
+                assets.append(Asset('a%d' % a, tagidxs, 2, (0, 0),
+                                    {'structural': 100. * (a + 1)},
+                                    calc=calc, ordinal=a))
+                tags_by_asset.append(['taxonomy=' + taxo, 'state=' + state])
+            fractions = rng.dirichlet(numpy.ones(D), (len(assets), E))
+            out = ArrayWrapper(numpy.array([fractions]), dict(assets=assets))
+            out.rlzi = 0
+            outputs.append(out)
+        tags = list(tagcol)
+        cfunc = FakeConsequenceFunction()
+        param = dict(consequence_models=dict(
+            structural={'RC': cfunc, 'RM': cfunc}),
+            number_of_ground_motion_fields=E, tags=tags,
+            tagidx=tagcol.get_tagidx())
+        res = scenario_damage(FakeRiskInput(), FakeRiskModel(
+            tagcol.taxonomy, outputs), param, Monitor())
+
+        # the previous loop on the assets
+        d_tag = numpy.zeros((len(tags), 1, 1, E, D))
+        c_tag = numpy.zeros((len(tags), 1, 1, E))
+        means = [0] + [par[0] for par in cfunc.params]
+        for out in outputs:
+            for asset, fraction in zip(out.assets, out[0]):
+                t = numpy.array([tag in tags_by_asset[asset.ordinal]
+                                 for tag in tags])
+                d_tag[t, 0, 0] += fraction * asset.number
+                c_tag[t, 0, 0] += (numpy.dot(fraction, means) *
+                                   asset.value('structural'))
+        self.assertGreater(c_tag[tags.index('state=B')].sum(), 0)
+        aae(res['d_tag'], d_tag)
+        aae(res['c_tag'], c_tag)
+
+
 class ScenarioDamageTestCase(CalculatorTestCase):
     def assert_ok(self, pkg, job_ini, exports='csv', kind='dmg'):
         test_dir = os.path.dirname(pkg.__file__)
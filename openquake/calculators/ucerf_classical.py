@@ -94,15 +94,11 @@ def ucerf_classical(rupset_idx, ucerf_source, src_filter, gsims, monitor):
     imtls = monitor.oqparam.imtls
     ucerf_source.src_filter = src_filter  # so that .iter_ruptures() work
     grp_id = ucerf_source.src_group_id
-    mag = ucerf_source.mags[rupset_idx].max()
-    ridx = set()
-    for idx in rupset_idx:
-        ridx.update(ucerf_source.get_ridx(idx))
     ucerf_source.rupset_idx = rupset_idx
     ucerf_source.num_ruptures = nruptures = len(rupset_idx)
 
     # prefilter the sites close to the rupture set
-    s_sites = ucerf_source.get_rupture_sites(ridx, src_filter, mag)
+    s_sites = ucerf_source.get_close_sites(rupset_idx, src_filter)
     if s_sites is None:  # return an empty probability map
         pm = ProbabilityMap(len(imtls.array), len(gsims))
         acc = AccumDict({grp_id: pm})
@@ -110,6 +106,7 @@ def ucerf_classical(rupset_idx, ucerf_source, src_filter, gsims, monitor):
             ucerf_source.source_id:
             numpy.array([nruptures, 0, time.time() - t0, 1])}
         acc.eff_ruptures = {grp_id: 0}
+        acc.discarded = AccumDict()  # stage -> site-rupture pairs
         return acc
 
     # compute the ProbabilityMap
@@ -125,6 +122,7 @@ def ucerf_classical(rupset_idx, ucerf_source, src_filter, gsims, monitor):
         ucerf_source.source_id:
         numpy.array([nruptures * nsites, nsites, time.time() - t0, 1])}
     acc.eff_ruptures = {grp_id: ucerf_source.num_ruptures}
+    acc.discarded = cmaker.discarded  # site-rupture pairs
     return acc
 
 
@@ -163,6 +161,7 @@ class UcerfPSHACalculator(PSHACalculator):
             for grp_id, gsims in self.gsims_by_grp.items()})
         acc.calc_times = {}
         acc.eff_ruptures = AccumDict()  # grp_id -> eff_ruptures
+        acc.discarded = AccumDict()  # stage -> site-rupture pairs
         acc.bb_dict = {}  # just for API compatibility
         param = dict(imtls=oq.imtls, truncation_level=oq.truncation_level)
         for sm in self.csm.source_models:  # one branch at the time
@@ -39,7 +39,8 @@ from openquake.calculators.event_based_risk import (
 from openquake.hazardlib.geo.surface.multi import MultiSurface
 from openquake.hazardlib.pmf import PMF
 from openquake.hazardlib.geo.point import Point
-from openquake.hazardlib.geo.geodetic import min_idx_dst, min_geodetic_distance
+from openquake.hazardlib.geo.geodetic import (
+    min_idx_dst, pure_distances, EARTH_RADIUS)
 from openquake.hazardlib.geo.surface.planar import PlanarSurface
 from openquake.hazardlib.geo.nodalplane import NodalPlane
 from openquake.hazardlib.tom import PoissonTOM
@@ -349,6 +350,82 @@ def sample_background_model(
     return background_ruptures, background_n_occ
 
 
+def _aranges(starts, stops):
+    # concatenation of the ranges start:stop, without a Python loop
+    lens = stops - starts
+    offsets = numpy.cumsum(lens) - lens
+    return numpy.arange(lens.sum()) + numpy.repeat(starts - offsets, lens)
+
+
+class UCERFSections(object):
+    """
+    The fault sections of a UCERF fault model, read from the HDF5 file
+    only once. The centroids and the rupture planes of all the sections
+    are stored in two flat arrays, indexed by the arrays of offsets
+    `.cstart`, `.cstop` and `.pstart`, `.pstop` (by section index);
+    the rupture indices are stored in the array `.rupture_index`.
+
+    :param source_file: path to the UCERF HDF5 file
+    :param sec_key: path of the sections, for instance FM0_0/MEANFS/Sections
+    :param geol_key: name of the fault model, for instance FM0_0
+    """
+    def __init__(self, source_file, sec_key, geol_key):
+        with h5py.File(source_file, "r") as hdf5:
+            self.rupture_index = hdf5[geol_key + "/RuptureIndex"].value
+            sections = hdf5[sec_key]
+            sec_ids = sorted(int(idx) for idx in sections)
+            n = sec_ids[-1] + 1 if sec_ids else 0
+            self.cstart, self.cstop = numpy.zeros((2, n), int)
+            self.pstart, self.pstop = numpy.zeros((2, n), int)
+            centroids, planes = [], []
+            cstart = pstart = 0
+            for idx in sec_ids:
+                sec = sections[str(idx)]
+                cen = sec["Centroids"].value
+                # the planes are stored with shape (4, 3, P)
+                plane = sec["RupturePlanes"].value.transpose(2, 0, 1)
+                self.cstart[idx] = cstart
+                self.pstart[idx] = pstart
+                cstart = self.cstop[idx] = cstart + len(cen)
+                pstart = self.pstop[idx] = pstart + len(plane)
+                centroids.append(cen)
+                planes.append(plane)
+            self.centroids = numpy.concatenate(centroids)
+            self.planes = numpy.concatenate(planes).astype("float64")
+
+    def get_centroids(self, ridx):
+        """
+        :returns: array of centroids for the given section indices
+        """
+        ridx = numpy.array(list(ridx), int)
+        return self.centroids[_aranges(self.cstart[ridx], self.cstop[ridx])]
+
+    def get_planes(self, idx):
+        """
+        :returns: array of shape (4, 3, P) with the planes of the section
+        """
+        return self.planes[self.pstart[idx]:self.pstop[idx]].transpose(
+            1, 2, 0)
+
+
+_sections = {}  # (source_file, sec_key, geol_key) -> UCERFSections
+
+
+def get_sections(source_file, sec_key, geol_key):
+    """
+    :returns:
+        a :class:`UCERFSections` instance, cached in the process; only
+        the sections of the last branch are kept, to bound the memory
+    """
+    key = source_file, sec_key, geol_key
+    try:
+        return _sections[key]
+    except KeyError:
+        _sections.clear()
+        sections = _sections[key] = UCERFSections(*key)
+        return sections
+
+
 class UCERFSource(object):
     """
     :param source_file:
@@ -446,31 +523,32 @@ class UCERFSource(object):
         """
         return PoissonTOM(self.inv_time)
 
+    @property
+    def sections(self):
+        """
+        The :class:`UCERFSections` of the current branch
+        """
+        return get_sections(self.source_file, self.idx_set["sec"],
+                            self.idx_set["geol"])
+
     def get_ridx(self, iloc):
         """List of rupture indices for the given iloc"""
-        with h5py.File(self.source_file, "r") as hdf5:
-            return hdf5[self.idx_set["geol"] + "/RuptureIndex"][iloc]
+        return self.sections.rupture_index[iloc]
 
     def get_centroids(self, ridx):
         """
         :returns: array of centroids for the given rupture index
         """
-        centroids = []
-        with h5py.File(self.source_file, "r") as hdf5:
-            for idx in ridx:
-                trace = "{:s}/{:s}".format(self.idx_set["sec"], str(idx))
-                centroids.append(hdf5[trace + "/Centroids"].value)
-        return numpy.concatenate(centroids)
+        return self.sections.get_centroids(ridx)
 
     def gen_trace_planes(self, ridx):
         """
         :yields: trace and rupture planes for the given rupture index
         """
-        with h5py.File(self.source_file, "r") as hdf5:
-            for idx in ridx:
-                trace = "{:s}/{:s}".format(self.idx_set["sec"], str(idx))
-                plane = hdf5[trace + "/RupturePlanes"][:].astype("float64")
-                yield trace, plane
+        sections = self.sections
+        for idx in ridx:
+            trace = "{:s}/{:s}".format(self.idx_set["sec"], str(idx))
+            yield trace, sections.get_planes(idx)
 
     @property
     def weight(self):
@@ -479,27 +557,89 @@ class UCERFSource(object):
         """
         return self.num_ruptures
 
-    def get_rupture_sites(self, ridx, src_filter, mag):
+    def _gen_distances(self, ilocs, sitecol, maxsize):
+        # yield (start, stop, dists) where dists is an array of shape
+        # (stop - start, N) with the minimum distances between the fault
+        # plane centroids of the ruptures ilocs[start:stop] and the sites;
+        # the blocks contain at most `maxsize` centroid-site pairs
+        sections = self.sections
+        slons = numpy.radians(sitecol.lons)
+        slats = numpy.radians(sitecol.lats)
+        sizes = numpy.array(
+            [(sections.cstop[ridx] - sections.cstart[ridx]).sum()
+             for ridx in sections.rupture_index[ilocs]]) * len(sitecol)
+        start = 0
+        while start < len(ilocs):
+            # the block contains at least one rupture
+            stop = start + max(1, numpy.searchsorted(
+                sizes[start:].cumsum(), maxsize, 'right'))
+            ridxs = sections.rupture_index[ilocs[start:stop]]
+            centroids = [sections.get_centroids(ridx) for ridx in ridxs]
+            offsets = numpy.cumsum([0] + [len(c) for c in centroids[:-1]])
+            cen = numpy.radians(numpy.concatenate(centroids))
+            dists = numpy.minimum.reduceat(
+                pure_distances(cen[:, 0], cen[:, 1], slons, slats),
+                offsets) * (2 * EARTH_RADIUS)
+            yield start, stop, dists
+            start = stop
+
+    def get_close_ruptures(self, ilocs, src_filter, maxsize=10 ** 7):
         """
-        Determines if a rupture is likely to be inside the integration distance
-        by considering the set of fault plane centroids and returns the
-        affected sites if any.
+        Determines which ruptures are likely to be inside the integration
+        distance, by considering the fault plane centroids; the distances
+        are computed for many ruptures at once, in blocks of at most
+        `maxsize` centroid-site pairs.
 
-        :param ridx:
-            List of indices composing the rupture sections
+        :param ilocs:
+            Locations of the ruptures in the hdf5 file
         :param src_filter:
             SourceFilter instance
-        :param mag:
-            Magnitude of the rupture for consideration
         :returns:
-            The sites affected by the rupture (or None)
+            An array of booleans, True for the ruptures close to the sites
         """
-        centroids = self.get_centroids(ridx)
-        distance = min_geodetic_distance(
-            centroids[:, 0], centroids[:, 1],
-            src_filter.sitecol.lons, src_filter.sitecol.lats)
-        idist = src_filter.integration_distance(DEFAULT_TRT, mag)
-        return src_filter.sitecol.filter(distance <= idist)
+        ilocs = numpy.array(ilocs, int)
+        close = numpy.zeros(len(ilocs), bool)
+        for start, stop, dists in self._gen_distances(
+                ilocs, src_filter.sitecol, maxsize):
+            idists = numpy.array(
+                [src_filter.integration_distance(DEFAULT_TRT, mag)
+                 for mag in self.mags[ilocs[start:stop]]])
+            close[start:stop] = (dists <= idists[:, None]).any(axis=1)
+        return close
+
+    def get_close_sites(self, ilocs, src_filter, maxsize=10 ** 7):
+        """
+        Determines the sites which are likely to be inside the integration
+        distance of the given ruptures, by considering the fault plane
+        centroids and the integration distance of the largest magnitude.
+        The sections shared by the ruptures are considered only once and
+        the distances are computed in blocks of at most `maxsize`
+        centroid-site pairs.
+
+        :param ilocs:
+            Locations of the ruptures in the hdf5 file
+        :param src_filter:
+            SourceFilter instance
+        :returns:
+            The sites affected by the ruptures (or None)
+        """
+        ilocs = numpy.array(ilocs, int)
+        sitecol = src_filter.sitecol
+        idist = src_filter.integration_distance(
+            DEFAULT_TRT, self.mags[ilocs].max())
+        sections = self.sections
+        ridx = numpy.unique(numpy.concatenate(
+            list(sections.rupture_index[ilocs])))
+        cen = numpy.radians(sections.get_centroids(ridx))
+        slons = numpy.radians(sitecol.lons)
+        slats = numpy.radians(sitecol.lats)
+        close = numpy.zeros(len(sitecol), bool)
+        step = max(1, maxsize // len(sitecol))
+        for start in range(0, len(cen), step):
+            block = cen[start:start + step]
+            dists = pure_distances(block[:, 0], block[:, 1], slons, slats)
+            close |= (dists * (2 * EARTH_RADIUS) <= idist).any(axis=0)
+        return sitecol.filter(close)
 
     def get_background_sids(self, src_filter):
         """
@@ -532,14 +672,17 @@ class UCERFSource(object):
         :param src_filter:
             Sites for consideration and maximum distance
         """
+        if not self.get_close_ruptures([iloc], src_filter)[0]:
+            return None
+        return self._build_rupture(iloc)
+
+    def _build_rupture(self, iloc):
+        # build the rupture associated to the given location
         mesh_spacing = self.mesh_spacing
         trt = self.tectonic_region_type
         ridx = self.get_ridx(iloc)
         mag = self.mags[iloc]
         surface_set = []
-        r_sites = self.get_rupture_sites(ridx, src_filter, mag)
-        if r_sites is None:
-            return None
         for trace, plane in self.gen_trace_planes(ridx):
             # build simple fault surface
             for jloc in range(0, plane.shape[2]):
@@ -583,11 +726,11 @@ class UCERFSource(object):
             # get ruptures from the indices
             ruptures = []
             rupture_occ = []
-            for iloc, n_occ in zip(indices, occurrences[indices]):
-                ucerf_rup = self.get_ucerf_rupture(iloc, src_filter)
-                if ucerf_rup:
-                    ruptures.append(ucerf_rup)
-                    rupture_occ.append(n_occ)
+            close = self.get_close_ruptures(indices, src_filter)
+            n_occs = occurrences[indices]
+            for iloc, n_occ in zip(indices[close], n_occs[close]):
+                ruptures.append(self._build_rupture(iloc))
+                rupture_occ.append(n_occ)
 
             # sample background sources
             background_ruptures, background_n_occ = sample_background_model(
@@ -606,11 +749,11 @@ class UCERFSource(object):
             rupset_idx = self.rupset_idx
         except AttributeError:  # use all indices
             rupset_idx = numpy.arange(self.num_ruptures)
-        for ridx in rupset_idx:
-            if self.rate[ridx]:  # ruptures may have have zero rate
-                rup = self.get_ucerf_rupture(ridx, self.src_filter)
-                if rup:
-                    yield rup
+        # ruptures may have have zero rate
+        rupset_idx = numpy.array(rupset_idx)[self.rate[rupset_idx] > 0]
+        close = self.get_close_ruptures(rupset_idx, self.src_filter)
+        for ridx in rupset_idx[close]:
+            yield self._build_rupture(ridx)
 
     def get_background_sources(self, src_filter):
         """
@@ -123,6 +123,7 @@ def _run(job_ini, concurrent_tasks, pdb, loglevel, hc, exports, params):
     logging.info('Total time spent: %s s', monitor.duration)
     logging.info('Memory allocated: %s', general.humansize(monitor.mem))
     monitor.flush()
+    calc.datastore.close()  # save the performance_data
     print('See the output with hdfview %s' % calc.datastore.hdf5path)
     calc_path = calc.datastore.calc_dir  # used for the .pstat filename
     return calc
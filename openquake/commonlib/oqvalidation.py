@@ -114,6 +114,9 @@ class OqParam(valid.ParamSet):
     region_constraint = valid.Param(valid.wkt_polygon, None)
     region_grid_spacing = valid.Param(valid.positivefloat, None)
     optimize_same_id_sources = valid.Param(valid.boolean, False)
+    pointsource_collapse_factor = valid.Param(
+        valid.NoneOr(valid.positivefloat), None)
+    poe_table_tolerance = valid.Param(valid.NoneOr(valid.positivefloat), None)
     risk_imtls = valid.Param(valid.intensity_measure_types_and_levels, {})
     risk_investigation_time = valid.Param(valid.positivefloat, None)
     rupture_mesh_spacing = valid.Param(valid.positivefloat)
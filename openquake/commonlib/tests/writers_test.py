@@ -22,8 +22,9 @@ import tempfile
 from io import BytesIO
 import psutil
 from openquake.baselib.performance import memory_info
-from openquake.commonlib.writers import write_csv
-from openquake.baselib.node import Node, tostring, StreamingXMLWriter
+from openquake.commonlib.writers import write_csv, format_block
+from openquake.baselib.node import (
+    Node, tostring, StreamingXMLWriter, scientificformat)
 from xml.etree import ElementTree as etree
 
 import numpy
@@ -129,3 +130,23 @@ class WriteCsvTestCase(unittest.TestCase):
         self.assert_export(
             a, 'A~PGA:int32:3,A~PGV:int32:4,B~PGA:int32:3,B~PGV:int32:4,'
             'idx:int32\n1 2 3,4 5 6 7,1 2 4,3 5 6 7,8\n')
+
+    def test_format_block(self):
+        # the block formatter must agree with scientificformat
+        dt = numpy.dtype([('lon', float), ('eid', numpy.uint64),
+                          ('tag', (bytes, 4)), ('gmv', numpy.float32, 2),
+                          ('poes', float, (2, 2))])
+        a = numpy.zeros(3, dt)
+        a['lon'] = [10.1, -0., 12]
+        a['eid'] = [1, 2, 2 ** 40]
+        a['tag'] = [b'a', b'bb', b'ccc']
+        a['gmv'] = [[-0., 0.1], [numpy.nan, 1E-30], [3, -2]]
+        a['poes'][1] = [[.1, -0.], [.3, .4]]
+        all_fields = [[name] for name in dt.names]
+        for fmt in ('%.6E', '%.5e', '%+.3E', '%.3f'):
+            expected = ''.join(
+                '%.5f,' % rec['lon'] + ','.join(
+                    scientificformat(rec[f], fmt) for f in dt.names[1:]) +
+                '\n' for rec in a)
+            self.assertEqual(format_block(a, all_fields, ',', fmt),
+                             expected.encode('utf8'))
@@ -22,10 +22,11 @@ import logging
 import tempfile
 import numpy  # this is needed by the doctests, don't remove it
 from openquake.hazardlib import InvalidFile
-from openquake.baselib.node import scientificformat
+from openquake.baselib.node import scientificformat, zeroset
 from openquake.baselib.python3compat import encode
 
 FIVEDIGITS = '%.5E'
+BLOCKSIZE = 100000  # number of rows formatted at once by write_csv
 
 
 class HeaderTranslator(object):
@@ -203,6 +204,70 @@ def extract_from(data, fields):
     return data
 
 
+def _columns(col, fmt):
+    # returns a conversion specifier and a list of scalar columns formatted
+    # by the specifier exactly as scientificformat would format `col`
+    kind = col.dtype.kind
+    floating = kind == 'f' and col.dtype.itemsize in (4, 8)
+    if floating and fmt[-1:] in ('e', 'E'):
+        negzero = fmt % -0.
+        if set(negzero) <= zeroset:
+            # in scientific notation only zero is rendered with zeros;
+            # adding 0. converts -0. into 0., as scientificformat does
+            if fmt % 0. != negzero.replace('-', ''):
+                return '%s', [[scientificformat(val, fmt) for val in col]]
+            col = col + 0.
+        spec = fmt
+        for i, n in enumerate(reversed(col.shape[1:]), 1):
+            spec = (' ' if i == col.ndim - 1 else ':').join([spec] * n)
+        return spec, col.reshape(len(col), -1).T.tolist()
+    elif col.ndim > 1:
+        pass
+    elif kind in 'iu':
+        return '%d', [col.tolist()]
+    elif kind in 'bU':
+        return '%s', [col.tolist()]
+    elif kind == 'S':
+        return '%s', [[val.decode('utf8') for val in col.tolist()]]
+    return '%s', [[scientificformat(val, fmt) for val in col]]
+
+
+def format_block(data, all_fields, sep=',', fmt='%.6E'):
+    """
+    Convert a block of records into text by formatting all the rows with
+    a single template. The output is identical to the one obtained by
+    calling `scientificformat` on each field, but much faster.
+
+    :param data: a composite array or a 2D array
+    :param all_fields: a list of field paths, or None for a 2D array
+    :param sep: separator to use (default comma)
+    :param fmt: formatting string for the floats (default '%.6E')
+    :returns: a string with a line for each record
+
+    >>> dt = numpy.dtype([('lon', float), ('eid', int), ('v', (float, 2))])
+    >>> a = numpy.array([(1, 2, (3, -0.)), (4, 5, (6, 7))], dt)
+    >>> print(format_block(a, [['lon'], ['eid'], ['v']]).decode('ascii'))
+    1.00000,2,3.000000E+00 0.000000E+00
+    4.00000,5,6.000000E+00 7.000000E+00
+    <BLANKLINE>
+    """
+    if all_fields is None:  # 2D array
+        all_fields = [[]] * data.shape[1]
+        cols = [data[:, i] for i in range(data.shape[1])]
+    else:
+        cols = [extract_from(data, fields) for fields in all_fields]
+    specs, columns = [], []
+    for fields, col in zip(all_fields, cols):
+        if fields and fields[0] in ('lon', 'lat', 'depth'):
+            spec, values = '%.5f', [col.tolist()]
+        else:
+            spec, values = _columns(col, fmt)
+        specs.append(spec)
+        columns.extend(values)
+    template = sep.replace('%', '%%').join(specs) + '\n'
+    return encode(''.join(template % row for row in zip(*columns)))
+
+
 def write_csv(dest, data, sep=',', fmt='%.6E', header=None, comment=None):
     """
     :param dest: None, file, filename or io.BytesIO instance
@@ -246,15 +311,13 @@ def write_csv(dest, data, sep=',', fmt='%.6E', header=None, comment=None):
     if autoheader:
         all_fields = [col.split(':', 1)[0].split('~')
                       for col in autoheader]
-        for record in data:
-            row = []
-            for fields in all_fields:
-                val = extract_from(record, fields)
-                if fields[0] in ('lon', 'lat', 'depth'):
-                    row.append('%.5f' % val)
-                else:
-                    row.append(scientificformat(val, fmt))
-            dest.write(encode(sep.join(row) + u'\n'))
+        for start in range(0, len(data), BLOCKSIZE):
+            block = data[start:start + BLOCKSIZE]
+            dest.write(format_block(block, all_fields, sep, fmt))
+    elif isinstance(data, numpy.ndarray) and data.ndim == 2:
+        for start in range(0, len(data), BLOCKSIZE):
+            block = data[start:start + BLOCKSIZE]
+            dest.write(format_block(block, None, sep, fmt))
     else:
         for row in data:
             dest.write(encode(sep.join(scientificformat(col, fmt)
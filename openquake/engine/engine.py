@@ -239,6 +239,7 @@ def run_calc(job_id, oqparam, log_level, log_file, exports,
             duration = monitor.duration
             expose_outputs(calc.datastore)
             monitor.flush()
+            calc.datastore.flush()  # wait for the performance_data
             records = views.performance_view(calc.datastore)
             logs.dbcmd('save_performance', job_id, records)
             calc.datastore.close()
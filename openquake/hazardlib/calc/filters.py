@@ -58,9 +58,13 @@ faster if there are a lot of sources, i.e. if the initial time to prepare
 the index can be compensed. Finally, there is a function
 `filter_sites_by_distance_to_rupture` based on the Joyner-Boore distance.
 """
+import os
 import sys
 import math
+import atexit
+import shutil
 import logging
+import tempfile
 import collections
 from contextlib import contextmanager
 import numpy
@@ -70,11 +74,18 @@ try:
 except ImportError:
     rtree = None
 from openquake.baselib.python3compat import raise_
+from openquake.hazardlib.geo import geodetic
+from openquake.hazardlib.geo.utils import (
+    spherical_to_cartesian, cartesian_to_spherical)
 from openquake.hazardlib.site import SiteCollection
 
 KM_TO_DEGREES = 0.0089932  # 1 degree == 111 km
 DEGREES_TO_RAD = 0.01745329252  # 1 radians = 57.295779513 degrees
 MAX_DISTANCE = 2000  # km, ultra big distance used if there is no filter
+APPROX_TOLERANCE = 1  # km, safety margin for the approximate distances
+
+# index_path -> (directory of the private copy, rtree index), see open_rtree
+_rtree_copy = {}
 
 
 def angular_distance(km, lat):
@@ -176,6 +187,80 @@ def get_distances(rupture, mesh, param):
     return dist
 
 
+def _surface_points(surface):
+    # points whose convex hull contains the projection of the surface
+    if hasattr(surface, 'corner_lons'):  # planar surface
+        return surface.corner_lons, surface.corner_lats
+    elif hasattr(surface, 'surfaces'):  # multi surface
+        lonlats = [_surface_points(surf) for surf in surface.surfaces]
+        return (numpy.concatenate([lons for lons, _ in lonlats]),
+                numpy.concatenate([lats for _, lats in lonlats]))
+    mesh = getattr(surface, 'mesh', None)
+    if mesh is None:
+        mesh = surface.get_mesh()
+    return mesh.lons.flatten(), mesh.lats.flatten()
+
+
+def get_bounding_circle(surface):
+    """
+    :param surface: a rupture surface
+    :returns: (lon, lat, radius) of a circle containing its projection
+    """
+    lons, lats = _surface_points(surface)
+    vector = spherical_to_cartesian(lons, lats, None).mean(axis=0)
+    lon, lat, _ = cartesian_to_spherical(vector)
+    radius = geodetic.geodetic_distance(lon, lat, lons, lats).max()
+    return lon, lat, radius
+
+
+def get_approx_distances(rupture, mesh):
+    """
+    Compute cheap lower bounds of the Joyner-Boore distances, i.e. the
+    distances from the center of the bounding circle of the rupture minus
+    its radius (and a small safety margin). It is much faster than
+    computing the exact distances from the surface of the rupture.
+
+    :param rupture: a rupture
+    :param mesh: a mesh of points
+    :returns: an array of distances from the given mesh
+    """
+    lon, lat, radius = get_bounding_circle(rupture.surface)
+    dists = geodetic.geodetic_distance(lon, lat, mesh.lons, mesh.lats)
+    return dists - radius - APPROX_TOLERANCE
+
+
+def get_close_ruptures(rupture_array, mesh, maxdist, chunksize=100000):
+    """
+    Vectorized version of :func:`get_approx_distances` for arrays of
+    ruptures with planar surfaces.
+
+    :param rupture_array:
+        an array of dtype
+        :data:`openquake.hazardlib.source.point.planar_rupture_dt`
+    :param mesh: a mesh of points
+    :param maxdist: the maximum distance, a scalar or one per rupture
+    :param chunksize: maximum number of rupture-point distances in memory
+    :returns:
+        a boolean array which is False for the ruptures surely beyond the
+        maximum distance from all the points
+    """
+    lons, lats = rupture_array['lons'], rupture_array['lats']
+    vectors = spherical_to_cartesian(lons, lats, None).mean(axis=1)
+    clons, clats, _ = cartesian_to_spherical(vectors)
+    radius = geodetic.geodetic_distance(
+        clons[:, None], clats[:, None], lons, lats).max(axis=1)
+    maxdist = numpy.zeros(len(rupture_array)) + maxdist
+    close = numpy.zeros(len(rupture_array), bool)
+    step = max(chunksize // len(mesh), 1)
+    for start in range(0, len(rupture_array), step):
+        slc = slice(start, start + step)
+        dists = geodetic.geodetic_distance(
+            clons[slc, None], clats[slc, None], mesh.lons, mesh.lats
+        ) - radius[slc, None] - APPROX_TOLERANCE
+        close[slc] = (dists <= maxdist[slc, None]).any(axis=1)
+    return close
+
+
 class FarAwayRupture(Exception):
     """Raised if the rupture is outside the maximum distance for all sites"""
 
@@ -304,6 +389,102 @@ class IntegrationDistance(collections.Mapping):
         return repr(self.dic)
 
 
+def _ranges(starts, stops):
+    """
+    :param starts: array of start indices
+    :param stops: array of stop indices (exclusive)
+    :returns: the concatenation of the ranges start:stop, as an array
+    """
+    lens = stops - starts
+    total = lens.sum()
+    if total == 0:
+        return numpy.zeros(0, int)
+    offsets = numpy.repeat(starts - lens.cumsum() + lens, lens)
+    return numpy.arange(total) + offsets
+
+
+class SiteIndex(object):
+    """
+    A pure-NumPy spatial index over a site collection, based on a regular
+    longitude-latitude grid. The sites are sorted by grid cell, so that the
+    sites within a bounding box can be found with a few binary searches
+    instead of computing the distances to all of them. The index contains
+    only two integer arrays, so it is cheap to pickle. Longitudes are
+    normalized in the range [0, 360), thus bounding boxes crossing the
+    international date line (either with min_lon > max_lon or with
+    longitudes outside [-180, 180]) are managed correctly. The depths of
+    the sites are ignored, since the index is meant to be used on
+    horizontal bounding boxes. The index returns positions in the
+    underlying array of the site collection, not site IDs: the two differ
+    for the tiles generated by
+    :meth:`openquake.hazardlib.site.SiteCollection.split_in_tiles`, which
+    keep the global site IDs.
+
+    :param sitecol: a :class:`openquake.hazardlib.site.SiteCollection`
+    :param cellsize: the size of the grid cells, in degrees
+    """
+    def __init__(self, sitecol, cellsize=.5):
+        self.array = sitecol.array
+        self.cellsize = cellsize
+        self.ncols = int(math.ceil(360. / cellsize))
+        keys = (self._rows(sitecol.lats) * self.ncols +
+                self._cols(sitecol.lons))
+        order = keys.argsort(kind='mergesort')
+        self.keys = keys[order]
+        self.indices = (order if sitecol.indices is None
+                        else sitecol.indices[order])
+
+    def _cols(self, lons):
+        cols = (numpy.asarray(lons) % 360. // self.cellsize).astype(int)
+        return cols % self.ncols
+
+    def _rows(self, lats):
+        lats = numpy.clip(lats, -90., 90.)
+        return ((lats + 90.) // self.cellsize).astype(int)
+
+    def get_indices(self, bbox):
+        """
+        :param bbox: a bounding box (min_lon, min_lat, max_lon, max_lat)
+        :returns:
+            the sorted array of the positions in the site collection array
+            of the sites inside the bounding box
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if min_lon > max_lon:  # crossing the international date line
+            width = (max_lon - min_lon) % 360.
+        else:
+            width = max_lon - min_lon
+        rows = numpy.arange(self._rows(min_lat), self._rows(max_lat) + 1)
+        if width > 180.:  # ambiguous box, consider all the longitudes
+            width = 360.
+            cols = [(0, self.ncols)]
+        else:
+            col = int(self._cols(min_lon))
+            ncols = min(int(width // self.cellsize) + 2, self.ncols)
+            cols = [(col, min(col + ncols, self.ncols))]
+            if col + ncols > self.ncols:  # wrap around
+                cols.append((0, col + ncols - self.ncols))
+        starts, stops = [], []
+        for start, stop in cols:
+            starts.append(self.keys.searchsorted(
+                rows * self.ncols + start, 'left'))
+            stops.append(self.keys.searchsorted(
+                rows * self.ncols + stop, 'left'))
+        indices = self.indices[_ranges(numpy.concatenate(starts),
+                                       numpy.concatenate(stops))]
+        lons = self.array['lons'][indices]
+        lats = self.array['lats'][indices]
+        ok = (min_lat <= lats) & (lats <= max_lat)
+        if width < 360.:
+            ok &= (lons - min_lon) % 360. <= width
+        return numpy.sort(indices[ok])
+
+    def __getstate__(self):
+        # the array is not stored, since it is already in the SourceFilter
+        return dict(cellsize=self.cellsize, ncols=self.ncols,
+                    keys=self.keys, indices=self.indices)
+
+
 class SourceFilter(object):
     """
     The SourceFilter uses the rtree library if available. The index is
@@ -320,6 +501,13 @@ class SourceFilter(object):
     instances can be pickled, but when unpickled the `use_rtree` flag is set to
     false and the index is lost: the reason is that libspatialindex indices
     cannot be properly pickled (https://github.com/Toblerity/rtree/issues/65).
+    However, if an `index_path` is given, the rtree index is stored on disk
+    and it is reopened when unpickling, so that the workers on the same
+    filesystem can use it. When the rtree index is not used in the
+    controller (in the workers, when rtree is missing or when the sites
+    are not at sea level) the filter selects the sites in the bounding box
+    of the source (with the rtree index, if any, or with a
+    :class:`SiteIndex`) and then filters them by distance to the source.
 
     :param sitecol:
         :class:`openquake.hazardlib.site.SiteCollection` instance (or None)
@@ -329,8 +517,11 @@ class SourceFilter(object):
         which is what is actually used for filtering.
     :param use_rtree:
         by default True, i.e. try to use the rtree module if available
+    :param index_path:
+        if given, the base name of the files where to store the rtree index
     """
-    def __init__(self, sitecol, integration_distance, use_rtree=True):
+    def __init__(self, sitecol, integration_distance, use_rtree=True,
+                 index_path=None):
         self.integration_distance = (
             IntegrationDistance(integration_distance)
             if isinstance(integration_distance, dict)
@@ -339,13 +530,44 @@ class SourceFilter(object):
         self.use_rtree = use_rtree and rtree and (
             integration_distance and sitecol is not None and
             sitecol.at_sea_level())
-        if self.use_rtree:
-            self.index = rtree.index.Index()
-            for sid, lon, lat in zip(sitecol.sids, sitecol.lons, sitecol.lats):
-                self.index.insert(sid, (lon, lat, lon, lat))
+        self.index_path = index_path if self.use_rtree else None
+        if self.use_rtree and index_path:
+            props = rtree.index.Property()
+            props.overwrite = True
+            # closing the index flushes it on disk
+            rtree.index.Index(index_path, self._stream(sitecol),
+                              properties=props).close()
+            self.index = rtree.index.Index(index_path)
+        elif self.use_rtree:
+            self.index = rtree.index.Index(self._stream(sitecol))
+        if integration_distance and sitecol is not None:
+            self.site_index = SiteIndex(sitecol)
+        else:
+            self.site_index = None
         if sitecol is not None and rtree is None:
             logging.info('Using distance filtering [no rtree]')
 
+    @staticmethod
+    def _stream(sitecol):
+        # the index stores the positions of the sites in sitecol.array,
+        # which are not the site IDs for the tiles of a site collection;
+        # NB: stream loading requires Python ints and floats, with numpy
+        # scalars the index can return duplicated and wrong positions
+        indices = (numpy.arange(len(sitecol)) if sitecol.indices is None
+                   else sitecol.indices)
+        for idx, lon, lat in zip(indices.tolist(), sitecol.lons.tolist(),
+                                 sitecol.lats.tolist()):
+            yield idx, (lon, lat, lon, lat), None
+
+    def _close_indices(self, bbox):
+        # the sites in the bounding box, by using the rtree index if
+        # available and the box does not cross the international date line
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if (getattr(self, 'index', None) is not None and
+                -180. <= min_lon <= max_lon <= 180.):
+            return numpy.array(sorted(self.index.intersection(bbox)), int)
+        return self.site_index.get_indices(bbox)
+
     def get_affected_box(self, src):
         """
         Get the enlarged bounding box of a source.
@@ -399,30 +621,93 @@ class SourceFilter(object):
                 yield src, sites
             elif self.use_rtree:  # Rtree filtering, used in the controller
                 box = self.get_affected_box(src)
-                sids = numpy.array(sorted(self.index.intersection(box)))
-                if len(set(sids)) < len(sids):
-                    # MS: sanity check against rtree bugs; what happened to me
-                    # is that by following the advice in http://toblerity.org/rtree/performance.html#use-stream-loading
-                    # self.index.intersection(box) started reporting duplicate
-                    # and wrong sids!
-                    raise ValueError('sids=%s' % sids)
-                if len(sids):
-                    src.nsites = len(sids)
-                    yield src, SiteCollection.filtered(sids, sites.array)
+                indices = numpy.array(sorted(self.index.intersection(box)))
+                if len(set(indices)) < len(indices):
+                    # sanity check against rtree bugs: stream loading with
+                    # numpy scalars made self.index.intersection(box)
+                    # report duplicate and wrong indices, see ._stream
+                    raise ValueError('indices=%s' % indices)
+                if len(indices):
+                    src.nsites = len(indices)
+                    yield src, SiteCollection.filtered(indices, sites.array)
             else:  # normal filtering, used in the workers
                 _, maxmag = src.get_min_max_mag()
                 maxdist = self.integration_distance(
                     src.tectonic_region_type, maxmag)
                 with context(src):
+                    close_sites = sites
+                    if self.site_index is not None and sites is self.sitecol:
+                        indices = self._close_indices(self._enlarge(
+                            src.get_bounding_box(maxdist), maxdist))
+                        if len(indices) == 0:
+                            continue
+                        close_sites = SiteCollection.filtered(
+                            indices, sites.array)
                     s_sites = src.filter_sites_by_distance_to_source(
-                        maxdist, sites)
+                        maxdist, close_sites)
                 if s_sites is not None:
                     src.nsites = len(s_sites)
                     yield src, s_sites
 
+    @staticmethod
+    def _enlarge(bbox, maxdist):
+        # the longitudinal extent of the bounding boxes is computed at the
+        # latitude of the source, where a degree of longitude is longer than
+        # at the border of the box: the boxes are enlarged by maxdist at the
+        # largest latitude of the box, to be sure to include all the sites
+        # at the border; in the polar regions all the longitudes are
+        # considered
+        min_lon, min_lat, max_lon, max_lat = bbox
+        maxlat = max(abs(min_lat), abs(max_lat))
+        if maxlat >= 89.:
+            return -180., min_lat, 180., max_lat
+        dlon = angular_distance(maxdist, maxlat)
+        if (max_lon - min_lon) % 360. + 2 * dlon >= 360.:
+            return -180., min_lat, 180., max_lat
+        return min_lon - dlon, min_lat, max_lon + dlon, max_lat
+
     def __getstate__(self):
         return dict(integration_distance=self.integration_distance,
-                    sitecol=self.sitecol, use_rtree=False)
+                    sitecol=self.sitecol, site_index=self.site_index,
+                    index_path=self.index_path, use_rtree=False)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.site_index is not None:
+            self.site_index.array = self.sitecol.array
+        if (self.index_path and rtree and
+                os.path.exists(self.index_path + '.idx')):
+            self.index = open_rtree(self.index_path)
+
+
+def open_rtree(index_path):
+    """
+    Open a private copy of the rtree index saved by the controller in
+    `index_path`. libspatialindex rewrites the header of an index when
+    closing it, so the workers never open the shared files; the copy is
+    made once per process and only the last one is kept.
+
+    :param index_path: the base name of the .idx and .dat files
+    :returns: an rtree index, or None if the files cannot be copied
+    """
+    if index_path in _rtree_copy:
+        return _rtree_copy[index_path][1]
+    for tmpdir, _ in _rtree_copy.values():
+        # filters still referencing the old index keep their open handles
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    _rtree_copy.clear()
+    tmpdir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, tmpdir, True)
+    copy = os.path.join(tmpdir, os.path.basename(index_path))
+    try:
+        for ext in ('.idx', '.dat'):
+            shutil.copy(index_path + ext, copy + ext)
+    except (IOError, OSError):  # removed by the controller, use SiteIndex
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        return
+    index = rtree.index.Index(copy)
+    _rtree_copy[index_path] = tmpdir, index
+    return index
 
 
 source_site_noop_filter = SourceFilter(None, {})
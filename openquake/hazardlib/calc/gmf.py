@@ -99,6 +99,7 @@ class GmfComputer(object):
         except AttributeError:
             self.ctx = cmaker.make_contexts(sitecol, rupture)
         self.sids = self.ctx[0].sids
+        self.dctxs = {}  # minimum_distance -> distances context
         if correlation_model:  # store the filtered sitecol
             self.sites = sitecol.filtered(self.sids, sitecol.array)
 
@@ -117,26 +118,46 @@ class GmfComputer(object):
             numpy.random.seed(seed)
         result = numpy.zeros(
             (len(self.imts), len(self.sids), num_events), numpy.float32)
+        sctx, rctx, dctx = self.ctx
+        try:  # the same for all the IMTs
+            dctx = self.dctxs[gsim.minimum_distance]
+        except KeyError:
+            dctx = self.dctxs[gsim.minimum_distance] = dctx.roundup(
+                gsim.minimum_distance)
+        if self.truncation_level == 0:
+            assert self.correlation_model is None
+            stddev_types = []
+        elif gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES == set([StdDev.TOTAL]):
+            # If the GSIM provides only total standard deviation, we need
+            # to compute mean and total standard deviation at the sites
+            # of interest.
+            # In this case, we also assume no correlation model is used.
+            if self.correlation_model:
+                raise CorrelationButNoInterIntraStdDevs(
+                    self.correlation_model, gsim)
+            stddev_types = [StdDev.TOTAL]
+        else:
+            stddev_types = [StdDev.INTER_EVENT, StdDev.INTRA_EVENT]
+        # the IMT-independent terms are computed only once
+        means, stddevs = gsim.get_mean_and_stddevs_many(
+            sctx, rctx, dctx, self.imts, stddev_types)
         for imti, imt in enumerate(self.imts):
-            result[imti] = self._compute(None, gsim, num_events, imt)
+            result[imti] = self._compute(
+                gsim, num_events, imt, means[imti],
+                [stddev[imti] for stddev in stddevs])
         return result
 
-    def _compute(self, seed, gsim, num_events, imt):
+    def _compute(self, gsim, num_events, imt, mean, stddevs):
         """
-        :param seed: a random seed or None if the seed is already set
         :param gsim: a GSIM instance
         :param num_events: the number of seismic events
         :param imt: an IMT instance
+        :param mean: the mean of the distribution at the sites
+        :param stddevs: a list with the TOTAL standard deviation or the
+                        INTER_EVENT and INTRA_EVENT standard deviations
         :returns: a 32 bit array of shape (num_sites, num_events)
         """
-        if seed is not None:
-            numpy.random.seed(seed)
-        sctx, rctx, dctx = self.ctx
-        dctx = dctx.roundup(gsim.minimum_distance)
         if self.truncation_level == 0:
-            assert self.correlation_model is None
-            mean, _stddevs = gsim.get_mean_and_stddevs(
-                sctx, rctx, dctx, imt, stddev_types=[])
             mean = gsim.to_imt_unit_values(mean)
             mean.shape += (1, )
             mean = mean.repeat(num_events, axis=1)
@@ -148,18 +169,8 @@ class GmfComputer(object):
             distribution = scipy.stats.truncnorm(
                 - self.truncation_level, self.truncation_level)
 
-        if gsim.DEFINED_FOR_STANDARD_DEVIATION_TYPES == \
-           set([StdDev.TOTAL]):
-            # If the GSIM provides only total standard deviation, we need
-            # to compute mean and total standard deviation at the sites
-            # of interest.
-            # In this case, we also assume no correlation model is used.
-            if self.correlation_model:
-                raise CorrelationButNoInterIntraStdDevs(
-                    self.correlation_model, gsim)
-
-            mean, [stddev_total] = gsim.get_mean_and_stddevs(
-                sctx, rctx, dctx, imt, [StdDev.TOTAL])
+        if len(stddevs) == 1:
+            [stddev_total] = stddevs
             stddev_total = stddev_total.reshape(stddev_total.shape + (1, ))
             mean = mean.reshape(mean.shape + (1, ))
 
@@ -167,9 +178,7 @@ class GmfComputer(object):
                 size=(len(self.sids), num_events))
             gmf = gsim.to_imt_unit_values(mean + total_residual)
         else:
-            mean, [stddev_inter, stddev_intra] = gsim.get_mean_and_stddevs(
-                sctx, rctx, dctx, imt,
-                [StdDev.INTER_EVENT, StdDev.INTRA_EVENT])
+            [stddev_inter, stddev_intra] = stddevs
             stddev_intra = stddev_intra.reshape(stddev_intra.shape + (1, ))
             stddev_inter = stddev_inter.reshape(stddev_inter.shape + (1, ))
             mean = mean.reshape(mean.shape + (1, ))
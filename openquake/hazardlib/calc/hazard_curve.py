@@ -65,6 +65,7 @@ from openquake.hazardlib.source import split_source
 from openquake.hazardlib.probability_map import ProbabilityMap
 from openquake.hazardlib.gsim.base import ContextMaker
 from openquake.hazardlib.gsim.base import GroundShakingIntensityModel
+from openquake.hazardlib.gsim.poe_table import PoETables
 from openquake.hazardlib.calc.filters import SourceFilter
 from openquake.hazardlib.sourceconverter import SourceGroup
 
@@ -78,7 +79,7 @@ def classical(group, src_filter, gsims, param, monitor=Monitor()):
 
     :returns:
         a dictionary {grp_id: pmap} with attributes .grp_ids, .calc_times,
-        .eff_ruptures
+        .eff_ruptures, .discarded
     """
     if getattr(group, 'src_interdep', None) == 'mutex':
         mutex_weight = {src.source_id: weight for src, weight in
@@ -94,7 +95,15 @@ def classical(group, src_filter, gsims, param, monitor=Monitor()):
     with GroundShakingIntensityModel.forbid_instantiation():
         imtls = param['imtls']
         trunclevel = param.get('truncation_level')
-        cmaker = ContextMaker(gsims, maxdist)
+        tolerance = param.get('poe_table_tolerance')
+        if tolerance:
+            poe_tables = PoETables(imtls, trunclevel, tolerance,
+                                   param.get('poe_table_dir'))
+        else:
+            poe_tables = None
+        cmaker = ContextMaker(gsims, maxdist,
+                              param.get('pointsource_collapse_factor'),
+                              poe_tables)
         ctx_mon = monitor('make_contexts', measuremem=False)
         poe_mon = monitor('get_poes', measuremem=False)
         pmap = AccumDict({grp_id: ProbabilityMap(len(imtls.array), len(gsims))
@@ -123,6 +132,7 @@ def classical(group, src_filter, gsims, param, monitor=Monitor()):
                                   for grp_id in src.src_group_ids}
         if mutex_weight and group.grp_probability is not None:
             pmap[group.id] *= group.grp_probability
+        pmap.discarded = cmaker.discarded  # site-rupture pairs
         return pmap
 
 
@@ -41,6 +41,34 @@ def _corners(array):
     return points
 
 
+def get_dimensions(lons, lats, depths):
+    """
+    Compute width and length of many planar surfaces at once, in the same
+    way as the constructor of :class:`PlanarSurface` does.
+
+    :param lons, lats, depths:
+        arrays of shape (N, 4) with the coordinates of the corners in the
+        order top left, top right, bottom left, bottom right
+    :returns:
+        two arrays of shape N with the widths and the lengths in km
+    """
+    points = geo_utils.spherical_to_cartesian(lons, lats, depths)
+    tl, tr, bl = points[:, 0], points[:, 1], points[:, 2]
+    normal = geo_utils.normalized(numpy.cross(tl - tr, tl - bl))
+    d = - (normal * tl).sum(axis=-1)
+    uv1 = geo_utils.normalized(tr - tl)
+    uv2 = numpy.cross(normal, uv1)
+    # project the corners on the planes, as in PlanarSurface._project
+    dists = (normal[:, None] * points).sum(axis=-1) + d[:, None]
+    projs = points + normal[:, None] * -dists[:, :, None]
+    vectors2d = projs - tl[:, None]
+    xx = (vectors2d * uv1[:, None]).sum(axis=-1)
+    yy = (vectors2d * uv2[:, None]).sum(axis=-1)
+    width = (yy[:, 2] - yy[:, 0] + yy[:, 3] - yy[:, 1]) / 2.0
+    length = (xx[:, 1] - xx[:, 0] + xx[:, 3] - xx[:, 2]) / 2.0
+    return width, length
+
+
 @with_slots
 class PlanarSurface(BaseQuadrilateralSurface):
     """
@@ -190,6 +218,31 @@ class PlanarSurface(BaseQuadrilateralSurface):
             numpy.arcsin((bl.depth - tl.depth) / tl.distance(bl)))
         return cls(mesh_spacing, strike, dip, tl, tr, br, bl)
 
+    @classmethod
+    def from_corners(cls, mesh_spacing, strike, dip, width, length,
+                     lons, lats, depths):
+        """
+        Create a planar surface from already validated data, skipping the
+        checks of the constructor, as :meth:`translate` does.
+
+        :param lons, lats, depths:
+            coordinates of the corners in the order top left, top right,
+            bottom left, bottom right
+        :returns: a :class:`PlanarSurface` instance
+        """
+        surface = object.__new__(cls)
+        BaseQuadrilateralSurface.__init__(surface)
+        surface.mesh_spacing = mesh_spacing
+        surface.strike = strike
+        surface.dip = dip
+        surface.corner_lons = numpy.array(lons, float)
+        surface.corner_lats = numpy.array(lats, float)
+        surface.corner_depths = numpy.array(depths, float)
+        surface._init_plane()
+        surface.width = width
+        surface.length = length
+        return surface
+
     def _init_plane(self):
         """
         Prepare everything needed for projecting arbitrary points on a plane
@@ -44,6 +44,9 @@ class AbrahamsonEtAl2014(GMPE):
     titled 'Summary of the ASK14 Ground Motion Relation for Active Crustal
     Regions'.
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: Supported tectonic region type is active shallow crust, see title!
     DEFINED_FOR_TECTONIC_REGION_TYPE = const.TRT.ACTIVE_SHALLOW_CRUST
 
@@ -90,6 +93,26 @@ class AbrahamsonEtAl2014(GMPE):
         """
         # get the necessary set of coefficients
         C = self.COEFFS[imt]
+        return self._get_mean_and_stddevs(C, imt, sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS.get_coeffs(imts)
+        return self._get_mean_and_stddevs(C, list(imts), sites, rup, dists,
+                                          stddev_types)
+
+    def _get_mean_and_stddevs(self, C, imt, sites, rup, dists, stddev_types):
+        """
+        Returns the mean and the standard deviations for a single IMT
+        or, if ``imt`` is a list of M IMTs, arrays of shape (M, N); in
+        that case the coefficients ``C`` are arrays of shape (M, 1).
+        """
         # compute median sa on rock (vs30=1180m/s). Used for site response
         # term calculation
         sa1180 = np.exp(self._get_sa_at_1180(C, imt, sites, rup, dists))
@@ -144,24 +167,23 @@ class AbrahamsonEtAl2014(GMPE):
         # basic form
         base_term = C['a1'] * np.ones_like(dists.rrup) + C['a17'] * dists.rrup
         # equation 2 at page 1030
-        if rup.mag >= C['m1']:
-            base_term += (C['a5'] * (rup.mag - C['m1']) +
-                          C['a8'] * (8.5 - rup.mag)**2. +
-                          (C['a2'] + C['a3'] * (rup.mag - C['m1'])) *
-                          np.log(R))
-        elif rup.mag >= self.CONSTS['m2']:
-            base_term += (C['a4'] * (rup.mag - C['m1']) +
-                          C['a8'] * (8.5 - rup.mag)**2. +
-                          (C['a2'] + C['a3'] * (rup.mag - C['m1'])) *
-                          np.log(R))
-        else:
-            base_term += (C['a4'] * (self.CONSTS['m2'] - C['m1']) +
-                          C['a8'] * (8.5 - self.CONSTS['m2'])**2. +
-                          C['a6'] * (rup.mag - self.CONSTS['m2']) +
-                          C['a7'] * (rup.mag - self.CONSTS['m2'])**2. +
-                          (C['a2'] + C['a3'] * (self.CONSTS['m2'] - C['m1'])) *
-                          np.log(R))
-        return base_term
+        above_m1 = (C['a5'] * (rup.mag - C['m1']) +
+                    C['a8'] * (8.5 - rup.mag)**2. +
+                    (C['a2'] + C['a3'] * (rup.mag - C['m1'])) *
+                    np.log(R))
+        above_m2 = (C['a4'] * (rup.mag - C['m1']) +
+                    C['a8'] * (8.5 - rup.mag)**2. +
+                    (C['a2'] + C['a3'] * (rup.mag - C['m1'])) *
+                    np.log(R))
+        below_m2 = (C['a4'] * (self.CONSTS['m2'] - C['m1']) +
+                    C['a8'] * (8.5 - self.CONSTS['m2'])**2. +
+                    C['a6'] * (rup.mag - self.CONSTS['m2']) +
+                    C['a7'] * (rup.mag - self.CONSTS['m2'])**2. +
+                    (C['a2'] + C['a3'] * (self.CONSTS['m2'] - C['m1'])) *
+                    np.log(R))
+        return base_term + np.select(
+            [rup.mag >= C['m1'], rup.mag >= self.CONSTS['m2']],
+            [above_m1, above_m2], below_m2)
 
     def _get_faulting_style_term(self, C, rup):
         """
@@ -187,9 +209,20 @@ class AbrahamsonEtAl2014(GMPE):
 
     def _get_vs30star(self, vs30, imt):
         """
-        This computes equations 8 and 9 at page 1034
+        This computes equations 8 and 9 at page 1034. If ``imt`` is a list
+        of M IMTs, returns an array of shape (M, N).
+        """
+        if isinstance(imt, list):
+            v1 = np.array([[self._get_v1(im)] for im in imt])
+        else:
+            v1 = self._get_v1(imt)
+        # set the vs30 star value (see eq. 8, page 1034)
+        return np.minimum(vs30, v1)
+
+    def _get_v1(self, imt):
+        """
+        Returns the v1 value (see eq. 9, page 1034)
         """
-        # compute the v1 value (see eq. 9, page 1034)
         if isinstance(imt, SA):
             t = imt.period
             if t <= 0.50:
@@ -203,10 +236,7 @@ class AbrahamsonEtAl2014(GMPE):
         else:
             # This covers the PGV case
             v1 = 1500.0
-        # set the vs30 star value (see eq. 8, page 1034)
-        vs30_star = np.ones_like(vs30) * vs30
-        vs30_star[vs30 >= v1] = v1
-        return vs30_star
+        return v1
 
     def _get_site_response_term(self, C, imt, vs30, sa1180):
         """
@@ -214,21 +244,16 @@ class AbrahamsonEtAl2014(GMPE):
         """
         # vs30 star
         vs30_star = self._get_vs30star(vs30, imt)
-        # compute the site term
-        site_resp_term = np.zeros_like(vs30)
-        gt_vlin = vs30 >= C['vlin']
-        lw_vlin = vs30 < C['vlin']
-        # compute site response term for sites with vs30 greater than vlin
         vs30_rat = vs30_star / C['vlin']
-        site_resp_term[gt_vlin] = ((C['a10'] + C['b'] * self.CONSTS['n']) *
-                                   np.log(vs30_rat[gt_vlin]))
+        # compute site response term for sites with vs30 greater than vlin
+        gt_vlin = ((C['a10'] + C['b'] * self.CONSTS['n']) *
+                   np.log(vs30_rat))
         # compute site response term for sites with vs30 lower than vlin
-        site_resp_term[lw_vlin] = (C['a10'] * np.log(vs30_rat[lw_vlin]) -
-                                   C['b'] * np.log(sa1180[lw_vlin] + C['c']) +
-                                   C['b'] * np.log(sa1180[lw_vlin] + C['c'] *
-                                                   vs30_rat[lw_vlin] **
-                                                   self.CONSTS['n']))
-        return site_resp_term
+        lw_vlin = (C['a10'] * np.log(vs30_rat) -
+                   C['b'] * np.log(sa1180 + C['c']) +
+                   C['b'] * np.log(sa1180 + C['c'] *
+                                   vs30_rat ** self.CONSTS['n']))
+        return np.where(vs30 >= C['vlin'], gt_vlin, lw_vlin)
 
     def _get_hanging_wall_term(self, C, dists, rup):
         """
@@ -319,12 +344,14 @@ class AbrahamsonEtAl2014(GMPE):
         # Above 700 m/s the trend is flat, but we extend the Vs30 range to
         # 6,000 m/s (basically the upper limit for mantle shear wave velocity
         # on earth) to allow extrapolation without throwing an error.
-        f2 = interpolate.interp1d(
-            [0.0, 150, 250, 400, 700, 1000, 6000],
-            [C['a43'], C['a43'], C['a44'], C['a45'], C['a46'], C['a46'],
-             C['a46']],
-            kind='linear')
-        return f2(vs30) * factor
+        # The interpolation weights depend only on vs30, so that the
+        # coefficients can also be arrays for several IMTs
+        vs30s = [0.0, 150, 250, 400, 700, 1000, 6000]
+        f2 = (C['a43'] * np.interp(vs30, vs30s, [1, 1, 0, 0, 0, 0, 0]) +
+              C['a44'] * np.interp(vs30, vs30s, [0, 0, 1, 0, 0, 0, 0]) +
+              C['a45'] * np.interp(vs30, vs30s, [0, 0, 0, 1, 0, 0, 0]) +
+              C['a46'] * np.interp(vs30, vs30s, [0, 0, 0, 0, 1, 1, 1]))
+        return f2 * factor
 
     def _get_regional_term(self, C, imt, vs30, rrup):
         """
@@ -360,16 +387,12 @@ class AbrahamsonEtAl2014(GMPE):
         """
         phi_al = self._get_phi_al_regional(C, mag, vs30measured, rrup)
         derAmp = self._get_derivative(C, sa1180, vs30)
-        phi_amp = 0.4
-        idx = phi_al < phi_amp
-        if np.any(idx):
-            # In the case of small magnitudes and long periods it is possible
-            # for phi_al to take a value less than phi_amp, which would return
-            # a complex value. According to the GMPE authors in this case
-            # phi_amp should be reduced such that it is fractionally smaller
-            # than phi_al
-            phi_amp = 0.4 * np.ones_like(phi_al)
-            phi_amp[idx] = 0.99 * phi_al[idx]
+        # In the case of small magnitudes and long periods it is possible
+        # for phi_al to take a value less than phi_amp, which would return
+        # a complex value. According to the GMPE authors in this case
+        # phi_amp should be reduced such that it is fractionally smaller
+        # than phi_al
+        phi_amp = np.where(phi_al < 0.4, 0.99 * phi_al, 0.4)
         phi_b = np.sqrt(phi_al**2 - phi_amp**2)
         phi = np.sqrt(phi_b**2 * (1 + derAmp)**2 + phi_amp**2)
         return phi
@@ -378,30 +401,25 @@ class AbrahamsonEtAl2014(GMPE):
         """
         Returns equation 30 page 1047
         """
-        derAmp = np.zeros_like(vs30)
         n = self.CONSTS['n']
         c = C['c']
         b = C['b']
-        idx = vs30 < C['vlin']
-        derAmp[idx] = (b * sa1180[idx] * (-1./(sa1180[idx]+c) +
-                       1./(sa1180[idx] + c*(vs30[idx]/C['vlin'])**n)))
-        return derAmp
+        derAmp = (b * sa1180 * (-1./(sa1180+c) +
+                  1./(sa1180 + c*(vs30/C['vlin'])**n)))
+        return np.where(vs30 < C['vlin'], derAmp, 0.)
 
     def _get_phi_al_regional(self, C, mag, vs30measured, rrup):
         """
         Returns intra-event (Phi) standard deviation (equation 24, page 1046)
         """
-        phi_al = np.ones((len(vs30measured)))
-        s1 = np.ones_like(phi_al) * C['s1e']
-        s2 = np.ones_like(phi_al) * C['s2e']
-        s1[vs30measured] = C['s1m']
-        s2[vs30measured] = C['s2m']
+        s1 = np.where(vs30measured, C['s1m'], C['s1e'])
+        s2 = np.where(vs30measured, C['s2m'], C['s2e'])
         if mag < 4:
-            phi_al *= s1
+            phi_al = s1
         elif mag <= 6:
-            phi_al *= s1 + (s2 - s1) / 2. * (mag - 4.)
+            phi_al = s1 + (s2 - s1) / 2. * (mag - 4.)
         else:
-            phi_al *= s2
+            phi_al = s2
         return phi_al
 
     def _get_inter_event_std(self, C, mag, sa1180, vs30):
@@ -467,6 +485,7 @@ class AbrahamsonEtAl2014RegTWN(AbrahamsonEtAl2014):
 
     Regional corrections for Taiwan
     """
+    vectorized_imts = True
 
     def _get_regional_term(self, C, imt, vs30, rrup):
         """
@@ -485,6 +504,7 @@ class AbrahamsonEtAl2014RegCHN(AbrahamsonEtAl2014):
 
     Regional corrections for China
     """
+    vectorized_imts = True
 
     def _get_regional_term(self, C, imt, vs30, rrup):
         """
@@ -31,3 +31,4 @@ class AkkarEtAl2013(AkkarEtAlRjb2014):
     is now implemented as AkkarEtAlRjb2014
     """
     deprecated = True
+    vectorized_imts = True
@@ -39,6 +39,9 @@ class AkkarEtAlRjb2014(GMPE):
     The class implements the equations for Joyner-Boore distance and based on
     manuscript provided by the original authors.
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: The supported tectonic region type is active shallow crust because
     #: the equations have been developed for "all seismically- active regions
     #: bordering the Mediterranean Sea and extending to the Middle East", see
@@ -84,6 +87,26 @@ class AkkarEtAlRjb2014(GMPE):
 
         Implement equation 1, page 20.
         """
+        C = self.COEFFS[imt]
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
+
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+
+        The median PGA on rock is computed once for all the IMTs.
+        """
+        C = self.COEFFS.get_coeffs(imts)
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
+
+    def _get_mean_and_stddevs(self, C, sites, rup, dists, stddev_types):
+        """
+        Implement equation 1, page 20, for a record of coefficients ``C``
+        (scalars or arrays of shape (M, 1) for M IMTs).
+        """
         # compute median PGA on rock, needed to compute non-linear site
         # amplification
         C_pga = self.COEFFS[PGA()]
@@ -92,7 +115,6 @@ class AkkarEtAlRjb2014(GMPE):
         )
 
         # compute full mean value by adding nonlinear site amplification terms
-        C = self.COEFFS[imt]
         mean = (self._compute_mean(C, rup.mag, dists, rup.rake) +
                 self._compute_non_linear_term(C, median_pga, sites))
 
@@ -161,27 +183,16 @@ class AkkarEtAlRjb2014(GMPE):
         """
         Vref = 750.0
         Vcon = 1000.0
-        lnS = np.zeros_like(sites.vs30)
-
-        # equation (3a)
-        idx = sites.vs30 < Vref
-        lnS[idx] = (
-            C['b1'] * np.log(sites.vs30[idx] / Vref) +
-            C['b2'] * np.log(
-                (pga_only[idx] + C['c'] * (sites.vs30[idx] / Vref) ** C['n']) /
-                ((pga_only[idx] + C['c']) * (sites.vs30[idx] / Vref) ** C['n'])
-            )
-        )
+        vs30 = sites.vs30
 
-        # equation (3b)
-        idx = (sites.vs30 >= Vref) & (sites.vs30 <= Vcon)
-        lnS[idx] = C['b1'] * np.log(sites.vs30[idx]/Vref)
+        # equations (3b) and (3c)
+        lnS = C['b1'] * np.log(np.minimum(vs30, Vcon) / Vref)
 
-        # equation (3c)
-        idx = sites.vs30 > Vcon
-        lnS[idx] = C['b1'] * np.log(Vcon/Vref)
-
-        return lnS
+        # equation (3a)
+        nonlinear = C['b2'] * np.log(
+            (pga_only + C['c'] * (vs30 / Vref) ** C['n']) /
+            ((pga_only + C['c']) * (vs30 / Vref) ** C['n']))
+        return np.where(vs30 < Vref, lnS + nonlinear, lnS)
 
     def _compute_mean(self, C, mag, dists, rake):
         """
@@ -288,6 +299,8 @@ class AkkarEtAlRepi2014(AkkarEtAlRjb2014):
     The class implements the equations for epicentral distance and based on
     manuscript provided by the original authors.
     """
+    vectorized_imts = True
+
     REQUIRES_DISTANCES = set(('repi', ))
 
     def _compute_logarithmic_distance_term(self, C, mag, dists):
@@ -379,6 +392,8 @@ class AkkarEtAlRhyp2014(AkkarEtAlRjb2014):
     The class implements the equations for hypocentral distance and based on
     manuscript provided by the original authors.
     """
+    vectorized_imts = True
+
     REQUIRES_DISTANCES = set(('rhypo', ))
 
     def _compute_logarithmic_distance_term(self, C, mag, dists):
@@ -28,7 +28,9 @@ import sys
 import math
 import warnings
 import functools
+import types
 import contextlib
+import collections
 from scipy.special import ndtr
 import numpy
 
@@ -38,7 +40,8 @@ from openquake.baselib.python3compat import with_metaclass, raise_
 from openquake.hazardlib import const
 from openquake.hazardlib import imt as imt_module
 from openquake.hazardlib.calc.filters import (
-    IntegrationDistance, get_distances, FarAwayRupture)
+    IntegrationDistance, get_distances, get_approx_distances,
+    get_close_ruptures, FarAwayRupture)
 from openquake.hazardlib.probability_map import ProbabilityMap
 
 
@@ -67,6 +70,28 @@ def gsim_imt_dt(sorted_gsims, sorted_imts):
     return numpy.dtype([(str(gsim), imt_dt) for gsim in sorted_gsims])
 
 
+def _mean_stddevs_by_imt(gsim, sctx, rctx, dctx, imts, stddev_types):
+    # the default implementation of get_mean_and_stddevs_many, looping
+    # on the IMTs
+    means, stddevs = [], []
+    for imt in imts:
+        mean, stds = gsim.get_mean_and_stddevs(
+            sctx, rctx, dctx, imt, stddev_types)
+        means.append(mean)
+        stddevs.append([std + numpy.zeros_like(mean) for std in stds])
+    return (numpy.array(means),
+            [numpy.array([stds[s] for stds in stddevs])
+             for s in range(len(stddev_types))])
+
+
+def _poes_by_imt(gsim, sctx, rctx, dctx, imtls, truncation_level):
+    # the implementation of get_poes_many for the GSIMs overriding get_poes
+    return numpy.concatenate(
+        [gsim.get_poes(sctx, rctx, dctx, imt_module.from_string(imt),
+                       imtls[imt], truncation_level) for imt in imtls],
+        axis=1)
+
+
 class MetaGSIM(abc.ABCMeta):
     """
     Metaclass controlling the instantiation mechanism.  A subclass with
@@ -75,11 +100,27 @@ class MetaGSIM(abc.ABCMeta):
     attribute deprecated=True will print a deprecation warning when
     instantiated. A subclass with an attribute non_verified=True will
     print a UserWarning.
+
+    The metaclass also makes sure that the multi-IMT methods
+    `get_mean_and_stddevs_many` and `get_poes_many` are consistent with
+    the single-IMT ones. A native `get_mean_and_stddevs_many` is used
+    only by the classes declaring `vectorized_imts = True` in their body;
+    the flag is not inherited, so a subclass of a vectorized GSIM that
+    does not declare it falls back to the loop over the IMTs.
     """
     instantiable = True
     deprecated = False
     non_verified = False
 
+    def __init__(cls, name, bases, dic):
+        super(MetaGSIM, cls).__init__(name, bases, dic)
+        cls.vectorized_imts = dic.get('vectorized_imts', False)
+        if (not cls.vectorized_imts and
+                'get_mean_and_stddevs_many' not in dic):
+            cls.get_mean_and_stddevs_many = _mean_stddevs_by_imt
+        if 'get_poes' in dic and 'get_poes_many' not in dic:
+            cls.get_poes_many = _poes_by_imt
+
     def __call__(cls, **kwargs):
         if not cls.instantiable:
             raise NonInstantiableError(
@@ -112,16 +153,44 @@ class MetaGSIM(abc.ABCMeta):
             cls.instantiable = True
 
 
+def _geometry_key(rupture, param):
+    # a key identifying the geometry which determines the given distance,
+    # or None if the geometry is not cheaply comparable
+    if param in ('rhypo', 'repi'):
+        hypo = rupture.hypocenter
+        return (param, hypo.longitude, hypo.latitude, hypo.depth)
+    surface = rupture.surface
+    if param in ('rrup', 'rx', 'ry0', 'rjb', 'azimuth') and hasattr(
+            surface, 'corner_lons'):  # planar surface
+        return (param, surface.corner_lons.tobytes(),
+                surface.corner_lats.tobytes(),
+                surface.corner_depths.tobytes())
+
+
 class ContextMaker(object):
     """
     A class to manage the creation of contexts for distances, sites, rupture.
+    The attribute `.discarded` counts the site-rupture pairs discarded by
+    the approximate distance filter and by the exact distance filter.
+    If `collapse_factor` is given, the nodal planes and hypocenter depths
+    of the ruptures of point-like sources are collapsed into a single
+    rupture when all the sites are farther than `collapse_factor` times
+    the rupture size, i.e. the largest between the rupture length and the
+    spread of the hypocenter depths.
+    If `poe_tables` is given (an instance of
+    :class:`openquake.hazardlib.gsim.poe_table.PoETables`) the PoEs are
+    interpolated from precomputed tables whenever possible.
     """
     REQUIRES = ['DISTANCES', 'SITES_PARAMETERS', 'RUPTURE_PARAMETERS']
 
-    def __init__(self, gsims, maximum_distance=IntegrationDistance(None)):
+    def __init__(self, gsims, maximum_distance=IntegrationDistance(None),
+                 collapse_factor=None, poe_tables=None):
         assert gsims
         self.gsims = gsims
         self.maximum_distance = maximum_distance
+        self.collapse_factor = collapse_factor
+        self.poe_tables = poe_tables
+        self.discarded = AccumDict(approx=0, exact=0)
         for req in self.REQUIRES:
             reqset = set()
             for gsim in gsims:
@@ -135,7 +204,8 @@ class ContextMaker(object):
                 for rlzi in rlzis:
                     self.gsim_by_rlzi[rlzi] = gsim
 
-    def make_distances_context(self, site_collection, rupture, dist_dict=()):
+    def make_distances_context(self, site_collection, rupture, dist_dict=(),
+                               dist_cache=None):
         """
         Create distances context object for given site collection and rupture.
 
@@ -152,6 +222,10 @@ class ContextMaker(object):
         :param dist_dict:
              A dictionary of already computed distances, keyed by distance name
 
+        :param dist_cache:
+             A dictionary used to share the distances between ruptures with
+             the same geometry (typically the ruptures of a source), or None
+
         :returns:
             Source to site distances as instance of :class:
             `DistancesContext()`. Only those  values that are required by GSIM
@@ -164,8 +238,19 @@ class ContextMaker(object):
         for param in self.REQUIRES_DISTANCES | set(['rjb']):
             if param in dist_dict:  # already computed distances
                 distances = dist_dict[param]
-            else:
+            elif dist_cache is None:
                 distances = get_distances(rupture, site_collection.mesh, param)
+            else:
+                key = _geometry_key(rupture, param)
+                if key is not None:
+                    key += (site_collection.sids.tobytes(),)
+                try:
+                    distances = dist_cache[key]
+                except KeyError:
+                    distances = get_distances(
+                        rupture, site_collection.mesh, param)
+                    if key is not None:
+                        dist_cache[key] = distances
             setattr(dctx, param, distances)
         return dctx
 
@@ -239,7 +324,8 @@ class ContextMaker(object):
             setattr(rctx, param, value)
         return rctx
 
-    def make_contexts(self, site_collection, rupture, filter=True):
+    def make_contexts(self, site_collection, rupture, filter=True,
+                      dist_cache=None):
         """
         Filter the site collection with respect to the rupture and
         create context objects.
@@ -252,6 +338,10 @@ class ContextMaker(object):
             :class:`openquake.hazardlib.source.rupture.Rupture` or subclass of
             :class:`openquake.hazardlib.source.rupture.BaseProbabilisticRupture`
 
+        :param dist_cache:
+            A dictionary of distances shared by the ruptures of a source,
+            see :meth:`make_distances_context`
+
         :returns:
             Tuple of three items: sites context, rupture context and
             distances context, that is, instances of
@@ -265,12 +355,39 @@ class ContextMaker(object):
             and distance parameters) is unknown.
         """
         rctx = self.make_rupture_context(rupture)
-        sites, distances = self.maximum_distance.get_closest(
-            site_collection, rupture, 'rjb', filter)
+        if filter and self.maximum_distance:
+            site_collection = self.approx_filter(site_collection, rupture)
+        try:
+            sites, distances = self.maximum_distance.get_closest(
+                site_collection, rupture, 'rjb', filter)
+        except FarAwayRupture:
+            self.discarded['exact'] += len(site_collection)
+            raise
+        self.discarded['exact'] += len(site_collection) - len(sites)
         sctx = self.make_sites_context(sites)
-        dctx = self.make_distances_context(sites, rupture, {'rjb': distances})
+        dctx = self.make_distances_context(
+            sites, rupture, {'rjb': distances}, dist_cache)
         return (sctx, rctx, dctx)
 
+    def approx_filter(self, sites, rupture):
+        """
+        Discard the sites which are surely beyond the integration distance,
+        before computing the exact distances.
+
+        :param sites: a (Filtered)SiteCollection
+        :param rupture: a rupture
+        :returns: the sites which could be close to the rupture
+        :raises: a FarAwayRupture exception if the rupture is far away
+        """
+        maxdist = self.maximum_distance(
+            rupture.tectonic_region_type, rupture.mag)
+        mask = get_approx_distances(rupture, sites.mesh) <= maxdist
+        nclose = mask.sum()
+        self.discarded['approx'] += len(mask) - nclose
+        if nclose == 0:
+            raise FarAwayRupture
+        return sites.filter(mask)
+
     def filter_ruptures(self, src, sites):
         """
         :param src: a source object, already filtered and split
@@ -279,15 +396,38 @@ class ContextMaker(object):
         """
         ruptures = []
         weight = 1. / (src.num_ruptures or src.count_ruptures())
-        for rup in src.iter_ruptures():
+        dist_cache = {}
+        for rup in self._iter_ruptures(src, sites):
             rup.weight = weight
             try:
-                rup.sctx, rup.rctx, rup.dctx = self.make_contexts(sites, rup)
+                rup.sctx, rup.rctx, rup.dctx = self.make_contexts(
+                    sites, rup, dist_cache=dist_cache)
             except FarAwayRupture:
                 continue
             ruptures.append(rup)
         return ruptures
 
+    def _iter_ruptures(self, src, sites):
+        # sources able to build their ruptures as an array discard the
+        # ruptures which are far away without instantiating them
+        if not hasattr(src, 'get_rupture_array'):
+            for rup in src.iter_ruptures():
+                yield rup
+            return
+        array = src.get_rupture_array()
+        if self.collapse_factor:
+            array = src.collapse_ruptures(
+                array, sites.mesh, self.collapse_factor)
+        if self.maximum_distance:
+            maxdist = self.maximum_distance(
+                src.tectonic_region_type, array['mag'])
+            close = get_close_ruptures(array, sites.mesh, maxdist)
+            self.discarded['approx'] += (len(close) - close.sum()) * len(
+                sites)
+            array = array[close]
+        for rec in array:
+            yield src.get_rupture(rec)
+
     def make_pmap(self, ruptures, imtls, trunclevel, rup_indep):
         """
         :param src: a source object
@@ -342,15 +482,21 @@ class ContextMaker(object):
     def _make_pnes(self, rupture, imtls, trunclevel):
         pne_array = numpy.zeros(
             (len(rupture.sctx.sids), len(imtls.array), len(self.gsims)))
+        dctxs = {}  # minimum_distance -> distances context
         for i, gsim in enumerate(self.gsims):
-            dctx = rupture.dctx.roundup(gsim.minimum_distance)
-            pnos = []  # list of arrays nsites x nlevels
-            for imt in imtls:
-                poes = gsim.get_poes(
-                    rupture.sctx, rupture.rctx, dctx,
-                    imt_module.from_string(imt), imtls[imt], trunclevel)
-                pnos.append(rupture.get_probability_no_exceedance(poes))
-            pne_array[:, :, i] = numpy.concatenate(pnos, axis=1)
+            try:
+                dctx = dctxs[gsim.minimum_distance]
+            except KeyError:
+                dctx = dctxs[gsim.minimum_distance] = rupture.dctx.roundup(
+                    gsim.minimum_distance)
+            poes = None
+            if self.poe_tables is not None:
+                poes = self.poe_tables.get_poes(
+                    gsim, rupture.sctx, rupture.rctx, dctx)
+            if poes is None:
+                poes = gsim.get_poes_many(
+                    rupture.sctx, rupture.rctx, dctx, imtls, trunclevel)
+            pne_array[:, :, i] = rupture.get_probability_no_exceedance(poes)
         return pne_array
 
     def disaggregate(self, sitecol, ruptures, iml4, truncnorm, epsilons,
@@ -380,8 +526,13 @@ class ContextMaker(object):
                     rupture.tectonic_region_type, rupture.mag)):
                 continue  # rupture away from all sites
             cache = {}
+            dctxs = {}  # minimum_distance -> distances context
             for r, gsim in self.gsim_by_rlzi.items():
-                dctx = orig_dctx.roundup(gsim.minimum_distance)
+                try:
+                    dctx = dctxs[gsim.minimum_distance]
+                except KeyError:
+                    dctx = dctxs[gsim.minimum_distance] = orig_dctx.roundup(
+                        gsim.minimum_distance)
                 for m, imt in enumerate(iml4.imts):
                     for p, poe in enumerate(iml4.poes_disagg):
                         iml = tuple(iml4.array[:, r, m, p])
@@ -550,6 +701,30 @@ class GroundShakingIntensityModel(with_metaclass(MetaGSIM)):
         compute interim steps).
         """
 
+    def get_mean_and_stddevs_many(self, sctx, rctx, dctx, imts,
+                                  stddev_types):
+        """
+        Calculate and return the mean values and the standard deviations
+        for several intensity measure types at once.
+
+        The parameters are the same as for :meth:`get_mean_and_stddevs`,
+        except for ``imts``, which is a list of M intensity measure types.
+
+        :returns:
+            a pair (mean, stddevs) where ``mean`` is an array of shape (M, N)
+            and ``stddevs`` a list of arrays of shape (M, N), one for each
+            type in ``stddev_types``; N is the number of sites.
+
+        The default implementation calls :meth:`get_mean_and_stddevs` for
+        each IMT. The GSIMs can override it to compute the terms independent
+        from the IMT only once, typically by using
+        :meth:`CoeffsTable.get_coeffs`; the override is used only by the
+        classes setting ``vectorized_imts = True``, see
+        :class:`MetaGSIM`.
+        """
+        return _mean_stddevs_by_imt(
+            self, sctx, rctx, dctx, imts, stddev_types)
+
     def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
         """
         Calculate and return probabilities of exceedance (PoEs) of one or more
@@ -631,6 +806,45 @@ class GroundShakingIntensityModel(with_metaclass(MetaGSIM)):
             else:
                 return _truncnorm_sf(truncation_level, values)
 
+    def get_poes_many(self, sctx, rctx, dctx, imtls, truncation_level):
+        """
+        Calculate and return the probabilities of exceedance of the levels
+        of several intensity measure types, by calling
+        :meth:`get_mean_and_stddevs_many` only once.
+
+        :param imtls:
+            a DictArray intensity measure type string -> levels
+        :returns:
+            an array of shape (N, L), where L is the total number of levels,
+            with the same content as the concatenation of the results of
+            :meth:`get_poes` for each IMT
+
+        The other parameters are the same as for :meth:`get_poes`.
+        """
+        if truncation_level is not None and truncation_level < 0:
+            raise ValueError('truncation level must be zero, positive number '
+                             'or None')
+        imts = [imt_module.from_string(imt) for imt in imtls]
+        for imt in imts:
+            self._check_imt(imt)
+        # the index of the IMT of each level
+        m_idx = numpy.repeat(numpy.arange(len(imts)),
+                             [len(imtls[imt]) for imt in imtls])
+        imls = self.to_distribution_values(imtls.array)
+        if truncation_level == 0:
+            # zero truncation mode, just compare imls to mean
+            mean, _ = self.get_mean_and_stddevs_many(
+                sctx, rctx, dctx, imts, [])
+            return (imls <= mean[m_idx].T).astype(float)
+        assert const.StdDev.TOTAL in self.DEFINED_FOR_STANDARD_DEVIATION_TYPES
+        mean, [stddev] = self.get_mean_and_stddevs_many(
+            sctx, rctx, dctx, imts, [const.StdDev.TOTAL])
+        values = (imls - mean[m_idx].T) / stddev[m_idx].T
+        if truncation_level is None:
+            return _norm_sf(values)
+        else:
+            return _truncnorm_sf(truncation_level, values)
+
     def disaggregate_pne(self, rupture, sctx, rctx, dctx, imt, iml,
                          truncnorm, epsilons):
         """
@@ -921,7 +1135,9 @@ class DistancesContext(BaseContext):
         If the minimum_distance is nonzero, returns a copy of the
         DistancesContext with updated distances, i.e. the ones below
         minimum_distance are rounded up to the minimum_distance. Otherwise,
-        returns the original DistancesContext unchanged.
+        returns the original DistancesContext unchanged. Only the arrays
+        containing small distances are copied, the others are shared
+        with the original DistancesContext, which is never modified.
         """
         if not minimum_distance:
             return self
@@ -929,7 +1145,7 @@ class DistancesContext(BaseContext):
         for dist, array in vars(self).items():
             small_distances = array < minimum_distance
             if small_distances.any():
-                array = array[:]  # make a copy first
+                array = array.copy()  # array[:] would be a view
                 array[small_distances] = minimum_distance
             setattr(ctx, dist, array)
         return ctx
@@ -953,6 +1169,40 @@ class RuptureContext(BaseContext):
     )
 
 
+class Coeffs(dict):
+    """
+    Immutable dictionary of coefficients for a given IMT, as returned by
+    :class:`CoeffsTable`. The coefficients can be accessed both as keys
+    and as attributes:
+
+    >>> C = Coeffs(a=1.5, b=2)
+    >>> C['a'], C.b
+    (1.5, 2)
+    >>> C['a'] = 3
+    Traceback (most recent call last):
+        ...
+    TypeError: Coeffs objects are immutable
+
+    Since the records are shared between all the users of a table, a GSIM
+    needing to change them must work on a copy (``C.copy()`` returns a
+    regular dictionary).
+    """
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def _immutable(self, *args, **kw):
+        raise TypeError('Coeffs objects are immutable')
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _immutable
+    update = pop = popitem = setdefault = clear = _immutable
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
 class CoeffsTable(object):
     r"""
     Instances of :class:`CoeffsTable` encapsulate tables of coefficients
@@ -1066,13 +1316,35 @@ class CoeffsTable(object):
     ...           imt.PGA(): {"a": 0.1, "b": 1.0},
     ...           imt.PGV(): {"a": 0.5, "b": 10.0}}
     >>> ct = CoeffsTable(sa_damping=5, table=coeffs)
+
+    The records are instances of :class:`Coeffs`, so the coefficients are
+    also accessible as attributes; the interpolated records are memoized,
+    keeping at most ``cache_size`` of them per table:
+
+    >>> '%.5f' % ct[imt.SA(0.5)].b
+    '3.39794'
+    >>> ct[imt.SA(0.5)] is ct[imt.SA(0.5)]
+    True
+
+    Finally, it is possible to get the coefficients for several IMTs at
+    once, as a record of column arrays, suitable for vectorized computations
+    over IMTs and sites:
+
+    >>> C = ct.get_coeffs([imt.PGA(), imt.SA(0.1), imt.SA(0.5)])
+    >>> C.a.shape
+    (3, 1)
+    >>> C.a[:, 0].round(3).tolist()
+    [0.1, 1.0, 2.398]
     """
+    cache_size = 1000  # maximum number of memoized interpolated records
+
     def __init__(self, **kwargs):
         if 'table' not in kwargs:
             raise TypeError('CoeffsTable requires "table" kwarg')
         table = kwargs.pop('table')
         self.sa_coeffs = {}
         self.non_sa_coeffs = {}
+        self._cache = collections.OrderedDict()  # LRU cache
         sa_damping = kwargs.pop('sa_damping', None)
         if kwargs:
             raise TypeError('CoeffsTable got unexpected kwargs: %r' % kwargs)
@@ -1081,9 +1353,9 @@ class CoeffsTable(object):
         elif isinstance(table, dict):
             for key in table:
                 if isinstance(key, imt_module.SA):
-                    self.sa_coeffs[key] = table[key]
+                    self.sa_coeffs[key] = Coeffs(table[key])
                 else:
-                    self.non_sa_coeffs[key] = table[key]
+                    self.non_sa_coeffs[key] = Coeffs(table[key])
         else:
             raise TypeError("CoeffsTable cannot be constructed with inputs "
                             "of the form '%s'" % table.__class__.__name__)
@@ -1103,7 +1375,7 @@ class CoeffsTable(object):
             if imt_name == 'SA':
                 raise ValueError('specify period as float value '
                                  'to declare SA IMT')
-            imt_coeffs = dict(zip(coeff_names, map(float, row[1:])))
+            imt_coeffs = Coeffs(zip(coeff_names, map(float, row[1:])))
             try:
                 sa_period = float(imt_name)
             except:
@@ -1120,9 +1392,9 @@ class CoeffsTable(object):
 
     def __getitem__(self, imt):
         """
-        Return a dictionary of coefficients corresponding to ``imt``
+        Return a :class:`Coeffs` record corresponding to ``imt``
         from this table (if there is a line for requested IMT in it),
-        or the dictionary of interpolated coefficients, if ``imt`` is
+        or the record of interpolated coefficients, if ``imt`` is
         of type :class:`~openquake.hazardlib.imt.SA` and interpolation
         is possible.
 
@@ -1132,12 +1404,42 @@ class CoeffsTable(object):
         """
         if not isinstance(imt, imt_module.SA):
             return self.non_sa_coeffs[imt]
-
         try:
             return self.sa_coeffs[imt]
         except KeyError:
-            pass
+            return self._cached(imt, self._interpolate)
+
+    def get_coeffs(self, imts):
+        """
+        :param imts: a sequence of M intensity measure types
+        :returns: a :class:`Coeffs` record of read-only arrays of shape (M, 1)
+        :raises KeyError: if the coefficients of an IMT are not available
+
+        The arrays broadcast against arrays of N sites, so that the same
+        formulae used for a single IMT give results of shape (M, N).
+        """
+        return self._cached(tuple(imts), self._build_arrays)
+
+    def _build_arrays(self, imts):
+        records = [self[imt] for imt in imts]
+        arrays = {}
+        for co in records[0]:
+            arrays[co] = array = numpy.array([[rec[co]] for rec in records])
+            array.flags.writeable = False
+        return Coeffs(arrays)
+
+    def _cached(self, key, build):
+        # least recently used records are discarded first
+        try:
+            coeffs = self._cache.pop(key)
+        except KeyError:
+            coeffs = build(key)
+            if len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+        self._cache[key] = coeffs
+        return coeffs
 
+    def _interpolate(self, imt):
         max_below = min_above = None
         for unscaled_imt in list(self.sa_coeffs):
             if unscaled_imt.damping != imt.damping:
@@ -1158,6 +1460,6 @@ class CoeffsTable(object):
                  / (math.log(min_above.period) - math.log(max_below.period)))
         max_below = self.sa_coeffs[max_below]
         min_above = self.sa_coeffs[min_above]
-        return dict(
+        return Coeffs(
             (co, (min_above[co] - max_below[co]) * ratio + max_below[co])
             for co in max_below)
@@ -86,7 +86,7 @@ class BergeThierryEtAl2003SIGMA(GMPE):
         # clip distance at 4 km, minimum distance for which the equation is
         # valid (see section 2.2.4, page 201). This also avoids singularity
         # in the equation
-        rhypo = dists.rhypo
+        rhypo = dists.rhypo.copy()
         rhypo[rhypo < 4.] = 4.
 
         mean = C['a'] * rup.mag + C['b'] * rhypo - np.log10(rhypo)
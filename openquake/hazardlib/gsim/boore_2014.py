@@ -52,6 +52,9 @@ class BooreEtAl2014(GMPE):
     Predicting PGA, PGV, nd 5 % Damped PGA for Shallow Crustal Earthquakes
     (2014, Earthquake Spectra, Volume 30, No. 3, pages 1057 - 1085).
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: Supported tectonic region type is active shallow crust
     DEFINED_FOR_TECTONIC_REGION_TYPE = const.TRT.ACTIVE_SHALLOW_CRUST
 
@@ -93,11 +96,33 @@ class BooreEtAl2014(GMPE):
         # extracting dictionary of coefficients specific to required
         # intensity measure type.
         C = self.COEFFS[imt]
-        C_PGA = self.COEFFS[PGA()]
         if isinstance(imt, (PGA, PGV)):
             imt_per = 0.0
         else:
             imt_per = imt.period
+        return self._get_mean_and_stddevs(C, imt_per, sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS.get_coeffs(imts)
+        periods = np.array([[0.0 if isinstance(imt, (PGA, PGV))
+                             else imt.period] for imt in imts])
+        return self._get_mean_and_stddevs(C, periods, sites, rup, dists,
+                                          stddev_types)
+
+    def _get_mean_and_stddevs(self, C, imt_per, sites, rup, dists,
+                              stddev_types):
+        """
+        Returns the mean and the standard deviations; ``C`` and ``imt_per``
+        can be scalars or arrays of shape (M, 1), for M IMTs.
+        """
+        C_PGA = self.COEFFS[PGA()]
         pga_rock = self._get_pga_on_rock(C_PGA, rup, dists)
         mean = (self._get_magnitude_scaling_term(C, rup) +
                 self._get_path_scaling(C, dists, rup.mag) +
@@ -118,10 +143,9 @@ class BooreEtAl2014(GMPE):
         Returns the magnitude scling term defined in equation (2)
         """
         dmag = rup.mag - C["Mh"]
-        if rup.mag <= C["Mh"]:
-            mag_term = (C["e4"] * dmag) + (C["e5"] * (dmag ** 2.0))
-        else:
-            mag_term = C["e6"] * dmag
+        mag_term = np.where(rup.mag <= C["Mh"],
+                            (C["e4"] * dmag) + (C["e5"] * (dmag ** 2.0)),
+                            C["e6"] * dmag)
         return self._get_style_of_faulting_term(C, rup) + mag_term
 
     def _get_style_of_faulting_term(self, C, rup):
@@ -168,8 +192,8 @@ class BooreEtAl2014(GMPE):
         """
         Returns the linear site scaling term (equation 6)
         """
-        flin = vs30 / self.CONSTS["Vref"]
-        flin[vs30 > C["Vc"]] = C["Vc"] / self.CONSTS["Vref"]
+        flin = np.where(vs30 > C["Vc"], C["Vc"] / self.CONSTS["Vref"],
+                        vs30 / self.CONSTS["Vref"])
         return C["c"] * np.log(flin)
 
     def _get_nonlinear_site_term(self, C, vs30, pga_rock):
@@ -236,26 +260,24 @@ class BooreEtAl2014(GMPE):
         base_vals = np.zeros(num_sites)
         # Magnitude Dependent phi (Equation 17)
         if mag <= 4.5:
-            base_vals += C["f1"]
+            base_vals = base_vals + C["f1"]
         elif mag >= 5.5:
-            base_vals += C["f2"]
+            base_vals = base_vals + C["f2"]
         else:
-            base_vals += (C["f1"] + (C["f2"] - C["f1"]) * (mag - 4.5))
-        # Distance dependent phi (Equation 16)
-        idx1 = rjb > C["R2"]
-        base_vals[idx1] += C["DfR"]
-        idx2 = np.logical_and(rjb > C["R1"], rjb <= C["R2"])
-        base_vals[idx2] += (C["DfR"] * (np.log(rjb[idx2] / C["R1"]) /
-                                        np.log(C["R2"] / C["R1"])))
-        # Site-dependent phi (Equation 15)
-        idx1 = vs30 <= self.CONSTS["v1"]
-        base_vals[idx1] -= C["DfV"]
-        idx2 = np.logical_and(vs30 >= self.CONSTS["v1"],
-                              vs30 <= self.CONSTS["v2"])
-        base_vals[idx2] -= (
-            C["DfV"] * (np.log(self.CONSTS["v2"] / vs30[idx2]) /
-                        np.log(self.CONSTS["v2"] / self.CONSTS["v1"])))
-        return base_vals
+            base_vals = base_vals + (C["f1"] + (C["f2"] - C["f1"]) *
+                                     (mag - 4.5))
+        # Distance dependent phi (Equation 16), zero below R1 and
+        # DfR above R2
+        base_vals = base_vals + C["DfR"] * (
+            np.log(np.clip(rjb, C["R1"], C["R2"]) / C["R1"]) /
+            np.log(C["R2"] / C["R1"]))
+        # Site-dependent phi (Equation 15), sites with vs30 = v1
+        # are in both ranges
+        v1, v2 = self.CONSTS["v1"], self.CONSTS["v2"]
+        dfv = (vs30 <= v1) + np.where(
+            (vs30 >= v1) & (vs30 <= v2), np.log(v2 / vs30) / np.log(v2 / v1),
+            0.)
+        return base_vals - C["DfV"] * dfv
 
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT            e0          e1          e2          e3         e4          e5          e6         Mh          c1         c2          c3          h        Dc3           c            Vc          f4          f5          f6          f7           R1           R2        DfR        DfV         f1         f2         t1         t2
@@ -385,6 +407,8 @@ class BooreEtAl2014HighQ(BooreEtAl2014):
     Turkey)
     The modification is made to the "Dc3" coefficient
     """
+    vectorized_imts = True
+
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT            e0          e1          e2          e3         e4          e5          e6         Mh          c1         c2          c3          h        Dc3           c            Vc          f4          f5          f6          f7           R1           R2        DfR        DfV         f1         f2         t1         t2
     pgv      5.037000    5.078000    4.849000    5.033000   1.073000   -0.153600    0.225200   6.200000   -1.243000   0.148900   -0.003440   5.300000   0.004345   -0.840000   1300.000000   -0.100000   -0.008440   -9.900000   -9.900000   105.000000   272.000000   0.082000   0.080000   0.644000   0.552000   0.401000   0.346000
@@ -504,6 +528,8 @@ class BooreEtAl2014LowQ(BooreEtAl2014):
     Japan)
     The modification is made to the "Dc3" coefficient
     """
+    vectorized_imts = True
+
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT            e0          e1          e2          e3         e4          e5          e6     Mh          c1         c2          c3      h          Dc3           c        Vc          f4          f5       f6       f7        R1        R2     DfR     DfV      f1      f2      t1      t2
     pgv      5.037000    5.078000    4.849000    5.033000   1.073000   -0.153600    0.225200   6.20   -1.243000   0.148900   -0.003440   5.30   -0.0003300   -0.840000   1300.00   -0.100000   -0.008440   -9.900   -9.900   105.000   272.000   0.082   0.080   0.644   0.552   0.401   0.346
@@ -802,6 +828,8 @@ class BooreEtAl2014NoSOF(BooreEtAl2014):
     style-of-faulting is unspecified. In this case the GMPE is no longer
     dependent on rake.
     """
+    vectorized_imts = True
+
     #: Required rupture parameters are magnitude
     REQUIRES_RUPTURE_PARAMETERS = set(('mag',))
 
@@ -817,6 +845,8 @@ class BooreEtAl2014HighQNoSOF(BooreEtAl2014HighQ):
     The Boore et al. (2014) GMPE, implemented for the High Q regions, for the
     case in which the style-of-faulting is unspecified.
     """
+    vectorized_imts = True
+
     #: Required rupture parameters are magnitude
     REQUIRES_RUPTURE_PARAMETERS = set(('mag',))
 
@@ -832,6 +862,8 @@ class BooreEtAl2014LowQNoSOF(BooreEtAl2014LowQ):
     The Boore et al. (2014) GMPE, implemented for the Low Q regions, for the
     case in which the style-of-faulting is unspecified.
     """
+    vectorized_imts = True
+
     #: Required rupture parameters are magnitude
     REQUIRES_RUPTURE_PARAMETERS = set(('mag',))
 
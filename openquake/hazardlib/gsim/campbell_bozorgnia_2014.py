@@ -55,6 +55,9 @@ class CampbellBozorgnia2014(GMPE):
     Response Spectra" (2014, Earthquake Spectra, Volume 30, Number 3,
     pages 1087 - 1115).
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: Supported tectonic region type is active shallow crust
     DEFINED_FOR_TECTONIC_REGION_TYPE = const.TRT.ACTIVE_SHALLOW_CRUST
 
@@ -96,22 +99,46 @@ class CampbellBozorgnia2014(GMPE):
         <.base.GroundShakingIntensityModel.get_mean_and_stddevs>`
         for spec of input and result values.
         """
-        # extract dictionaries of coefficients specific to required
-        # intensity measure type and for PGA
+        # extract dictionary of coefficients specific to required
+        # intensity measure type
         C = self.COEFFS[imt]
-        C_PGA = self.COEFFS[PGA()]
+        short_period = isinstance(imt, SA) and (imt.period <= 0.25)
+        return self._get_mean_and_stddevs(C, short_period, sites, rup, dists,
+                                          stddev_types)
+
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+
+        The PGA on rock is computed only once for all the IMTs.
+        """
+        C = self.COEFFS.get_coeffs(imts)
+        short_period = np.array([[isinstance(imt, SA) and imt.period <= 0.25]
+                                 for imt in imts])
+        return self._get_mean_and_stddevs(C, short_period, sites, rup, dists,
+                                          stddev_types)
 
+    def _get_mean_and_stddevs(self, C, short_period, sites, rup, dists,
+                              stddev_types):
+        """
+        Returns the mean and the standard deviations; ``C`` and
+        ``short_period`` can refer to a single IMT or be arrays of shape
+        (M, 1) for M IMTs
+        """
+        C_PGA = self.COEFFS[PGA()]
         # Get mean and standard deviation of PGA on rock (Vs30 1100 m/s^2)
         pga1100 = np.exp(self.get_mean_values(C_PGA, sites, rup, dists, None))
         # Get mean and standard deviations for IMT
         mean = self.get_mean_values(C, sites, rup, dists, pga1100)
-        if isinstance(imt, SA) and (imt.period <= 0.25):
+        if np.any(short_period):
             # According to Campbell & Bozorgnia (2013) [NGA West 2 Report]
             # If Sa (T) < PGA for T < 0.25 then set mean Sa(T) to mean PGA
             # Get PGA on soil
             pga = self.get_mean_values(C_PGA, sites, rup, dists, pga1100)
-            idx = mean <= pga
-            mean[idx] = pga[idx]
+            mean = np.where(short_period & (mean <= pga), pga, mean)
         # Get standard deviations
         stddevs = self._get_stddevs(C,
                                     C_PGA,
@@ -208,16 +235,13 @@ class CampbellBozorgnia2014(GMPE):
         # Define coefficients R1 and R2
         r_1 = rup.width * cos(radians(rup.dip))
         r_2 = 62.0 * rup.mag - 350.0
-        fhngrx = np.zeros(len(r_x))
-        # Case when 0 <= Rx <= R1
-        idx = np.logical_and(r_x >= 0., r_x < r_1)
-        fhngrx[idx] = self._get_f1rx(C, r_x[idx], r_1)
-        # Case when Rx > R1
-        idx = r_x >= r_1
-        f2rx = self._get_f2rx(C, r_x[idx], r_1, r_2)
-        f2rx[f2rx < 0.0] = 0.0
-        fhngrx[idx] = f2rx
-        return fhngrx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Case when 0 <= Rx <= R1
+            f1rx = self._get_f1rx(C, r_x, r_1)
+            # Case when Rx > R1
+            f2rx = np.maximum(self._get_f2rx(C, r_x, r_1, r_2), 0.0)
+        return np.select([np.logical_and(r_x >= 0., r_x < r_1), r_x >= r_1],
+                         [f1rx, f2rx], 0.)
 
     def _get_f1rx(self, C, r_x, r_1):
         """
@@ -302,10 +326,8 @@ class CampbellBozorgnia2014(GMPE):
         """
         Returns the anelastic attenuation term defined in equation 25
         """
-        f_atn = np.zeros(len(rrup))
-        idx = rrup >= 80.0
-        f_atn[idx] = (C["c20"] + C["Dc20"]) * (rrup[idx] - 80.0)
-        return f_atn
+        return np.where(rrup >= 80.0,
+                        (C["c20"] + C["Dc20"]) * (rrup - 80.0), 0.)
 
     def _select_basin_model(self, vs30):
         """
@@ -324,14 +346,11 @@ class CampbellBozorgnia2014(GMPE):
         """
         Returns the basin response term defined in equation 20
         """
-        f_sed = np.zeros(len(z2pt5))
-        idx = z2pt5 < 1.0
-        f_sed[idx] = (C["c14"] + C["c15"] * float(self.CONSTS["SJ"])) *\
-            (z2pt5[idx] - 1.0)
-        idx = z2pt5 > 3.0
-        f_sed[idx] = C["c16"] * C["k3"] * exp(-0.75) *\
-            (1.0 - np.exp(-0.25 * (z2pt5[idx] - 3.0)))
-        return f_sed
+        shallow = (C["c14"] + C["c15"] * float(self.CONSTS["SJ"])) *\
+            (z2pt5 - 1.0)
+        deep = C["c16"] * C["k3"] * exp(-0.75) *\
+            (1.0 - np.exp(-0.25 * (z2pt5 - 3.0)))
+        return np.select([z2pt5 < 1.0, z2pt5 > 3.0], [shallow, deep], 0.)
 
     def _get_shallow_site_response_term(self, C, vs30, pga_rock):
         """
@@ -342,29 +361,25 @@ class CampbellBozorgnia2014(GMPE):
         # Get linear global site response term
         f_site_g = C["c11"] * np.log(vs_mod)
         idx = vs30 > C["k1"]
-        f_site_g[idx] = f_site_g[idx] + (C["k2"] * self.CONSTS["n"] *
-                                         np.log(vs_mod[idx]))
+        f_site_g = f_site_g + np.where(
+            idx, C["k2"] * self.CONSTS["n"] * np.log(vs_mod), 0.)
 
         # Get nonlinear site response term
-        idx = np.logical_not(idx)
-        if np.any(idx):
-            f_site_g[idx] = f_site_g[idx] + C["k2"] * (
-                np.log(pga_rock[idx] +
-                       self.CONSTS["c"] * (vs_mod[idx] ** self.CONSTS["n"])) -
-                np.log(pga_rock[idx] + self.CONSTS["c"])
-                )
+        if not np.all(idx):
+            f_site_g = f_site_g + np.where(idx, 0., C["k2"] * (
+                np.log(pga_rock +
+                       self.CONSTS["c"] * (vs_mod ** self.CONSTS["n"])) -
+                np.log(pga_rock + self.CONSTS["c"])
+                ))
 
         # For Japan sites (SJ = 1) further scaling is needed (equation 19)
         if self.CONSTS["SJ"]:
             fsite_j = np.log(vs_mod)
-            idx = vs30 > 200.0
-            if np.any(idx):
-                fsite_j[idx] = (C["c13"] + C["k2"] * self.CONSTS["n"]) *\
-                    fsite_j[idx]
-            idx = np.logical_not(idx)
-            if np.any(idx):
-                fsite_j[idx] = (C["c12"] + C["k2"] * self.CONSTS["n"]) *\
-                    (fsite_j[idx] - np.log(200.0 / C["k1"]))
+            fsite_j = np.where(
+                vs30 > 200.0,
+                (C["c13"] + C["k2"] * self.CONSTS["n"]) * fsite_j,
+                (C["c12"] + C["k2"] * self.CONSTS["n"]) *
+                (fsite_j - np.log(200.0 / C["k1"])))
 
             return f_site_g + fsite_j
         else:
@@ -446,14 +461,11 @@ class CampbellBozorgnia2014(GMPE):
         Returns the alpha, the linearised functional relationship between the
         site amplification and the PGA on rock. Equation 31.
         """
-        alpha = np.zeros(len(pga_rock))
-        idx = vs30 < C["k1"]
-        if np.any(idx):
-            af1 = pga_rock[idx] +\
-                self.CONSTS["c"] * ((vs30[idx] / C["k1"]) ** self.CONSTS["n"])
-            af2 = pga_rock[idx] + self.CONSTS["c"]
-            alpha[idx] = C["k2"] * pga_rock[idx] * ((1.0 / af1) - (1.0 / af2))
-        return alpha
+        af1 = pga_rock +\
+            self.CONSTS["c"] * ((vs30 / C["k1"]) ** self.CONSTS["n"])
+        af2 = pga_rock + self.CONSTS["c"]
+        return np.where(vs30 < C["k1"],
+                        C["k2"] * pga_rock * ((1.0 / af1) - (1.0 / af2)), 0.)
 
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT         c0      c1       c2       c3       c4       c5      c6      c7       c9     c10      c11      c12     c13       c14      c15     c16       c17      c18       c19       c20     Dc20      a2      h1      h2       h3       h5       h6     k1       k2      k3    phi1    phi2    tau1    tau2    phiC   rholny
@@ -490,6 +502,8 @@ class CampbellBozorgnia2014HighQ(CampbellBozorgnia2014):
     Implements the Campbell & Bozorgnia (2014) NGA-West2 GMPE for regions with
     low attenuation (high quality factor, Q) (i.e. China, Turkey)
     """
+    vectorized_imts = True
+
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT         c0      c1       c2       c3       c4       c5      c6      c7       c9     c10      c11      c12     c13       c14      c15     c16       c17      c18       c19       c20     Dc20      a2      h1      h2       h3       h5       h6     k1       k2      k3    phi1    phi2    tau1    tau2    phiC   rholny
     pgv     -2.895   1.510    0.270   -1.299   -0.453   -2.466   0.204   5.837   -0.168   0.305    1.713    2.602   2.457    0.1060    0.332   0.585    0.0517   0.0327   0.00613   -0.0017   0.0017   0.596   0.117   1.616   -0.733   -0.128   -0.756    400   -1.955   1.929   0.655   0.494   0.317   0.297   0.190   0.684
@@ -523,6 +537,8 @@ class CampbellBozorgnia2014LowQ(CampbellBozorgnia2014):
     Implements the Campbell & Bozorgnia (2014) NGA-West2 GMPE for regions with
     high attenuation (low quality factor, Q) (i.e. Japan, Italy)
     """
+    vectorized_imts = True
+
     COEFFS = CoeffsTable(sa_damping=5, table="""\
     IMT         c0      c1       c2       c3       c4       c5      c6      c7       c9     c10      c11      c12     c13       c14      c15     c16       c17      c18       c19       c20      Dc20      a2      h1      h2       h3       h5       h6     k1       k2      k3    phi1    phi2    tau1    tau2    phiC  rholny
     pgv     -2.895   1.510    0.270   -1.299   -0.453   -2.466   0.204   5.837   -0.168   0.305    1.713    2.602   2.457    0.1060    0.332   0.585    0.0517   0.0327   0.00613   -0.0017   -0.0006   0.596   0.117   1.616   -0.733   -0.128   -0.756    400   -1.955   1.929   0.655   0.494   0.317   0.297   0.190   0.684
@@ -556,6 +572,8 @@ class CampbellBozorgnia2014JapanSite(CampbellBozorgnia2014):
     Implements the Campbell & Bozorgnia (2014) NGA-West2 GMPE for the case in
     which the "Japan" shallow site response term is activited
     """
+    vectorized_imts = True
+
     CONSTS = JAPAN_CONSTS
 
 
@@ -565,6 +583,8 @@ class CampbellBozorgnia2014HighQJapanSite(CampbellBozorgnia2014HighQ):
     attenuation (high quality factor) coefficients, for the case in which
     the "Japan" shallow site response term is activited
     """
+    vectorized_imts = True
+
     CONSTS = JAPAN_CONSTS
 
 
@@ -574,4 +594,6 @@ class CampbellBozorgnia2014LowQJapanSite(CampbellBozorgnia2014LowQ):
     attenuation (low quality factor) coefficients, for the case in which
     the "Japan" shallow site response term is activited
     """
+    vectorized_imts = True
+
     CONSTS = JAPAN_CONSTS
@@ -116,7 +116,7 @@ class CauzziFaccioli2008(GMPE):
         Distances are clipped at 15 km (as per Ezio Faccioli's personal
         communication.)
         """
-        d = rhypo
+        d = rhypo.copy()
         d[d <= 15.0] = 15.0
 
         return C['a3'] * np.log10(d)
@@ -36,6 +36,9 @@ class ChiouYoungs2014(GMPE):
     Average Horizontal Component of Peak Ground Motion and Response Spectra"
     (2014, Earthquake Spectra).
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: Supported tectonic region type is active shallow crust
     DEFINED_FOR_TECTONIC_REGION_TYPE = const.TRT.ACTIVE_SHALLOW_CRUST
 
@@ -79,6 +82,23 @@ class ChiouYoungs2014(GMPE):
         # extracting dictionary of coefficients specific to required
         # intensity measure type.
         C = self.COEFFS[imt]
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
+
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS.get_coeffs(imts)
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
+
+    def _get_mean_and_stddevs(self, C, sites, rup, dists, stddev_types):
+        """
+        Returns the mean and standard deviations for the coefficients ``C``
+        of one IMT, or the coefficient arrays of shape (M, 1) of M IMTs.
+        """
         # intensity on a reference soil is used for both mean
         # and stddev calculations.
         ln_y_ref = self._get_ln_y_ref(rup, dists, C)
@@ -204,11 +224,12 @@ class ChiouYoungs2014(GMPE):
             # third part
             + C['c4']
             * np.log(dists.rrup + C['c5']
-                     * np.cosh(C['c6'] * max(rup.mag - C['chm'], 0)))
+                     * np.cosh(C['c6'] * np.maximum(rup.mag - C['chm'], 0)))
             + (C['c4a'] - C['c4'])
             * np.log(np.sqrt(dists.rrup ** 2 + C['crb'] ** 2))
             # forth part
-            + (C['cg1'] + C['cg2'] / (np.cosh(max(rup.mag - C['cg3'], 0))))
+            + (C['cg1'] + C['cg2'] / (np.cosh(np.maximum(rup.mag - C['cg3'],
+                                                         0))))
             * dists.rrup
             # fifth part
             + C['c8'] * dist_taper
@@ -332,6 +353,8 @@ class ChiouYoungs2014NearFaultEffect(ChiouYoungs2014):
     for directivity prediction.
 
     """
+    vectorized_imts = True
+
     #: Required distance measures are RRup, Rjb, Rx, and Rcdpp
     REQUIRES_DISTANCES = set(('rrup', 'rjb', 'rx', 'rcdpp'))
 
@@ -26,6 +26,7 @@ the corresponding amplification of the IMLs
 
 from __future__ import division
 import os
+import collections
 from copy import deepcopy
 
 import h5py
@@ -39,6 +40,27 @@ from openquake.hazardlib.gsim.base import GMPE, RuptureContext, SitesContext
 from openquake.baselib.python3compat import round
 
 
+def load_array(dset):
+    """
+    Read an hdf5 dataset. If the dataset is stored contiguously in a
+    file opened in read-only mode, it is memory-mapped instead of being
+    copied in memory, so that the processes reading the same table share
+    its pages.
+
+    :param dset:
+        Instance of :class:`h5py.Dataset`
+    :returns:
+        A read-only :class:`numpy.memmap` or a numpy array
+    """
+    offset = dset.id.get_offset()
+    if (offset is None or dset.chunks is not None or dset.size == 0 or
+            dset.dtype.kind not in 'iuf' or dset.file.mode != 'r' or
+            dset.file.driver != 'sec2'):
+        return dset[()]
+    return numpy.memmap(dset.file.filename, dset.dtype, 'r', offset,
+                        dset.shape)
+
+
 def hdf_arrays_to_dict(hdfgroup):
     """
     Convert an hdf5 group contains only data sets to a dictionary of
@@ -50,7 +72,7 @@ def hdf_arrays_to_dict(hdfgroup):
         Dictionary containing each of the datasets within the group arranged
         by name
     """
-    return {key: hdfgroup[key][:] for key in hdfgroup}
+    return {key: load_array(hdfgroup[key]) for key in hdfgroup}
 
 
 class AmplificationTable(object):
@@ -308,6 +330,10 @@ class GMPETable(GMPE):
     GMPE_TABLE = None
     GMPE_DIR = '.'
 
+    #: maximum number of tables interpolated at a given magnitude which are
+    #: kept in memory
+    cache_size = 1000
+
     def __init__(self, gmpe_table=None):
         """
         If the path to the GMPE table is not assigned as an attribute of the
@@ -338,6 +364,25 @@ class GMPETable(GMPE):
         self.distances = None
         self.distance_type = None
         self.amplification = None
+        self._period_tables = {}
+        self._cache = collections.OrderedDict()
+        self._run_setup()
+
+    def __getstate__(self):
+        # the tables are not pickled: they are read again (memory-mapped)
+        # from the GMPE table file, which must be accessible by the workers
+        state = self.__dict__.copy()
+        for name in ('imls', 'stddevs', 'm_w', 'distances', 'amplification',
+                     '_period_tables', '_cache'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stddevs = {}
+        self.amplification = None
+        self._period_tables = {}
+        self._cache = collections.OrderedDict()
         self._run_setup()
 
     def _run_setup(self):
@@ -351,7 +396,7 @@ class GMPETable(GMPE):
         # Load in magnitude
         self.m_w = fle["Mw"][:]
         # Load in distances
-        self.distances = fle["Distances"][:]
+        self.distances = load_array(fle["Distances"])
         # Load intensity measure types and levels
         self.imls = hdf_arrays_to_dict(fle["IMLs"])
         self.DEFINED_FOR_INTENSITY_MEASURE_TYPES = set(self._supported_imts())
@@ -506,7 +551,32 @@ class GMPETable(GMPE):
 
         :param val_type:
             String indicating the type of data {"IMLs", "Total", "Inter" etc}
-        """
+
+        The tables interpolated at a given magnitude are kept in a
+        least-recently-used cache of size `cache_size`; they are read-only.
+        """
+        key = (val_type, str(imt), mag)
+        try:
+            table = self._cache.pop(key)
+        except KeyError:
+            table = self.apply_magnitude_interpolation(
+                mag, self._get_period_table(imt, val_type))
+            table.flags.writeable = False
+            if len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+        self._cache[key] = table
+        return table
+
+    def _get_period_table(self, imt, val_type):
+        """
+        Returns the table of ground motions or standard deviations for the
+        given intensity measure type, as an array of shape (Number Distances,
+        Number Magnitudes). For spectral accelerations the table is
+        interpolated at the period of the IMT once and then stored.
+        """
+        key = (val_type, str(imt))
+        if key in self._period_tables:
+            return self._period_tables[key]
         if isinstance(imt, (imt_module.PGA, imt_module.PGV)):
             # Get scalar imt
             if val_type == "IMLs":
@@ -535,7 +605,8 @@ class GMPETable(GMPE):
                                     numpy.log10(iml_table),
                                     axis=1)
             iml_table = 10. ** interpolator(numpy.log10(imt.period))
-        return self.apply_magnitude_interpolation(mag, iml_table)
+        self._period_tables[key] = iml_table
+        return iml_table
 
     def apply_magnitude_interpolation(self, mag, iml_table):
         """
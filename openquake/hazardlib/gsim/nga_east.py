@@ -68,7 +68,8 @@ import numpy as np
 from copy import deepcopy
 from scipy.stats import chi2
 from openquake.hazardlib.gsim.base import CoeffsTable
-from openquake.hazardlib.gsim.gsim_table import GMPETable, hdf_arrays_to_dict
+from openquake.hazardlib.gsim.gsim_table import (
+    GMPETable, hdf_arrays_to_dict, load_array)
 from openquake.hazardlib.imt import PGV
 from openquake.hazardlib import const
 
@@ -477,7 +478,7 @@ class NGAEastBaseGMPE(GMPETable):
         # Load in magnitude
         self.m_w = fle["Mw"][:]
         # Load in distances
-        self.distances = fle["Distances"][:]
+        self.distances = load_array(fle["Distances"])
         # Load intensity measure types and levels
         self.imls = hdf_arrays_to_dict(fle["IMLs"])
         self.DEFINED_FOR_INTENSITY_MEASURE_TYPES = set(self._supported_imts())
@@ -159,6 +159,8 @@ class AbrahamsonEtAl2014NSHMPMean(AbrahamsonEtAl2014):
     Implements the Abrahamson et al (2014) GMPE for application to the
     weighted mean case
     """
+    vectorized_imts = True
+
     def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
         """
         Adapts the original `get_poes()` from the :class:
@@ -221,6 +223,8 @@ class BooreEtAl2014NSHMPMean(BooreEtAl2014):
     Implements the Boore et al (2014) GMPE for application to the
     weighted mean case
     """
+    vectorized_imts = True
+
     # See similar comment above
     REQUIRES_DISTANCES = set(("rjb", "rrup"))
 
@@ -279,6 +283,8 @@ class CampbellBozorgnia2014NSHMPMean(CampbellBozorgnia2014):
     Implements the Campbell & Bozorgnia (2014) GMPE for application to the
     weighted mean case
     """
+    vectorized_imts = True
+
     def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
         """
         Adapts the original `get_poes()` from the :class:
@@ -334,6 +340,8 @@ class ChiouYoungs2014NSHMPMean(ChiouYoungs2014):
     Implements the Chiou & Youngs (2014) GMPE for application to the
     weighted mean case
     """
+    vectorized_imts = True
+
     def get_poes(self, sctx, rctx, dctx, imt, imls, truncation_level):
         """
         Adapts the original `get_poes()` from the :class:
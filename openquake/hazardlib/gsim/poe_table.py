@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+#
+# Copyright (C) 2017 GEM Foundation
+#
+# OpenQuake is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# OpenQuake is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module :mod:`openquake.hazardlib.gsim.poe_table` defines the
+:class:`openquake.hazardlib.gsim.poe_table.PoETable` class, storing the
+probabilities of exceedance of a GSIM on a grid of magnitudes and
+distances, and the :class:`openquake.hazardlib.gsim.poe_table.PoETables`
+cache, which can be passed to a
+:class:`openquake.hazardlib.gsim.base.ContextMaker` to replace the
+direct evaluation of the GSIMs with an interpolation.
+"""
+from __future__ import division
+import os
+import logging
+import hashlib
+import numpy
+
+from openquake.baselib import __version__
+from openquake.hazardlib.gsim.base import (
+    SitesContext, RuptureContext, DistancesContext)
+
+#: magnitudes of the default grid
+MAGS = numpy.linspace(2.5, 9.5, 71)
+
+#: distances of the default grid, equispaced in log(1 + distance)
+DISTS = numpy.expm1(numpy.linspace(0, numpy.log1p(1000.), 101))
+
+#: beyond this number of site classes per rupture the tables are not used
+MAX_SITE_CLASSES = 10
+
+
+def group_rows(rows):
+    """
+    Group the equal rows of a 2D array, like `numpy.unique(rows, axis=0)`
+    but working also with numpy < 1.13.
+
+    :param rows: an array of shape (N, P)
+    :returns:
+        the indices of the first row of each group, sorted by group,
+        and an array of N group indices
+    """
+    order = numpy.lexsort(rows.T[::-1])
+    new = numpy.ones(len(rows), bool)
+    new[1:] = (numpy.diff(rows[order], axis=0) != 0).any(axis=1)
+    inv = numpy.empty(len(rows), int)
+    inv[order] = numpy.cumsum(new) - 1
+    return order[new], inv
+
+
+class PoETable(object):
+    """
+    The probabilities of exceedance of a GSIM for a given set of site
+    parameters, computed on a grid of magnitudes and distances. The PoEs
+    for other magnitudes and distances are obtained by bilinear
+    interpolation in magnitude and log(1 + distance).
+
+    :param gsim: a GSIM depending only on the magnitude and a single distance
+    :param imtls: a DictArray intensity measure type string -> levels
+    :param trunclevel: the truncation level
+    :param site_params: a tuple of pairs (site parameter name, value)
+    :param mags: the magnitudes of the grid, in increasing order
+    :param dists: the distances of the grid, in increasing order
+    """
+    def __init__(self, gsim, imtls, trunclevel, site_params,
+                 mags=MAGS, dists=DISTS):
+        self.gsim = gsim
+        self.imtls = imtls
+        self.trunclevel = trunclevel
+        self.site_params = site_params
+        [self.dist_type] = gsim.REQUIRES_DISTANCES
+        self.mags = numpy.array(mags, float)
+        self.dists = numpy.array(dists, float)
+        self.xs = numpy.log1p(self.dists)
+        self.poes = None  # array of shape (M, D, L)
+        self.error = None  # maximum error at the middle of the cells
+
+    @staticmethod
+    def supports(gsim):
+        """
+        :returns: True if the PoEs of the GSIM can be tabulated, i.e.
+                  if they depend only on the magnitude and one distance
+        """
+        return (len(gsim.REQUIRES_DISTANCES) == 1 and
+                set(gsim.REQUIRES_RUPTURE_PARAMETERS) <= {'mag'})
+
+    @property
+    def key(self):
+        """
+        A string identifying the table, used as name of the cache file;
+        it depends on the engine version, so that the tables are rebuilt
+        when the code or the coefficients of the GSIMs change
+        """
+        imtls = [(imt, list(self.imtls[imt])) for imt in self.imtls]
+        data = repr((__version__, str(self.gsim), imtls, self.trunclevel,
+                     self.site_params, list(self.mags), list(self.dists)))
+        return hashlib.sha1(data.encode('utf8')).hexdigest()
+
+    def compute(self, mags, dists):
+        """
+        Compute the PoEs directly with the GSIM.
+
+        :param mags: an array of M magnitudes
+        :param dists: an array of D distances
+        :returns: an array of shape (M, D, L)
+        """
+        n = len(dists)
+        sctx = SitesContext()
+        for name, value in self.site_params:
+            setattr(sctx, name, numpy.array([value] * n))
+        dctx = DistancesContext()
+        setattr(dctx, self.dist_type, numpy.array(dists, float))
+        poes = numpy.zeros((len(mags), n, len(self.imtls.array)))
+        for i, mag in enumerate(mags):
+            rctx = RuptureContext()
+            rctx.mag = mag
+            poes[i] = self.gsim.get_poes_many(
+                sctx, rctx, dctx, self.imtls, self.trunclevel)
+        return poes
+
+    def build(self):
+        """
+        Compute the PoEs on the grid and the maximum absolute error
+        of the interpolation, estimated at the centers of the cells.
+        """
+        self.poes = self.compute(self.mags, self.dists)
+        mid_mags = (self.mags[:-1] + self.mags[1:]) / 2
+        mid_dists = numpy.expm1((self.xs[:-1] + self.xs[1:]) / 2)
+        exact = self.compute(mid_mags, mid_dists)
+        self.error = max(numpy.abs(self(mag, mid_dists) - poes).max()
+                         for mag, poes in zip(mid_mags, exact))
+
+    def covers(self, mag, dists):
+        """
+        :returns: True if the magnitude and the distances are inside the grid
+        """
+        return (self.mags[0] <= mag <= self.mags[-1] and
+                dists.min() >= self.dists[0] and
+                dists.max() <= self.dists[-1])
+
+    def __call__(self, mag, dists):
+        """
+        Interpolate the PoEs.
+
+        :param mag: a magnitude
+        :param dists: an array of N distances
+        :returns: an array of shape (N, L)
+        """
+        i = numpy.clip(numpy.searchsorted(self.mags, mag) - 1,
+                       0, len(self.mags) - 2)
+        wm = (mag - self.mags[i]) / (self.mags[i + 1] - self.mags[i])
+        xs = numpy.log1p(dists)
+        j = numpy.clip(numpy.searchsorted(self.xs, xs) - 1,
+                       0, len(self.xs) - 2)
+        wd = ((xs - self.xs[j]) / (self.xs[j + 1] - self.xs[j]))[:, None]
+        lo = self.poes[i, j] * (1 - wd) + self.poes[i, j + 1] * wd
+        hi = self.poes[i + 1, j] * (1 - wd) + self.poes[i + 1, j + 1] * wd
+        return lo * (1 - wm) + hi * wm
+
+    def save(self, fname):
+        """
+        Save the table in a .npz file; the file is written under a
+        temporary name and then renamed, so that concurrent readers
+        never see a partial file.
+        """
+        tmp = '%s.%d.tmp' % (fname, os.getpid())
+        with open(tmp, 'wb') as f:
+            numpy.savez(f, poes=self.poes, error=self.error)
+        os.rename(tmp, fname)
+
+    def load(self, fname):
+        """
+        Read the PoEs and the error from a file written by :meth:`save`
+        """
+        with numpy.load(fname) as npz:
+            self.poes = npz['poes']
+            self.error = float(npz['error'])
+
+
+class PoETables(object):
+    """
+    A cache of :class:`PoETable` instances for the same intensity measure
+    levels and truncation level, keyed by GSIM and site parameters.
+    A table is used only if its interpolation error does not exceed the
+    tolerance; otherwise the PoEs are computed directly.
+
+    :param imtls: a DictArray intensity measure type string -> levels
+    :param trunclevel: the truncation level
+    :param tolerance: the maximum absolute error on the PoEs
+    :param cachedir: directory where the tables are stored or None
+    :param mags: the magnitudes of the grid
+    :param dists: the distances of the grid
+    """
+    def __init__(self, imtls, trunclevel, tolerance, cachedir=None,
+                 mags=MAGS, dists=DISTS):
+        self.imtls = imtls
+        self.trunclevel = trunclevel
+        self.tolerance = tolerance
+        self.cachedir = cachedir
+        self.mags = mags
+        self.dists = dists
+        self.tables = {}  # (gsim, site_params) -> PoETable or None
+
+    def get_table(self, gsim, site_params):
+        """
+        :param gsim: a GSIM supported by :class:`PoETable`
+        :param site_params: a tuple of pairs (site parameter name, value)
+        :returns: a :class:`PoETable` or None if it is not accurate enough
+        """
+        try:
+            return self.tables[gsim, site_params]
+        except KeyError:
+            pass
+        table = PoETable(gsim, self.imtls, self.trunclevel, site_params,
+                         self.mags, self.dists)
+        fname = (os.path.join(self.cachedir, table.key + '.npz')
+                 if self.cachedir else None)
+        if fname and os.path.exists(fname):
+            table.load(fname)
+        else:
+            table.build()
+            if fname:
+                if not os.path.exists(self.cachedir):
+                    try:
+                        os.makedirs(self.cachedir)
+                    except OSError:  # created by another process
+                        pass
+                table.save(fname)
+        if table.error > self.tolerance:
+            logging.info('Not using the PoE table of %s %s: error %.1E',
+                         gsim, site_params, table.error)
+            table = None
+        self.tables[gsim, site_params] = table
+        return table
+
+    def get_poes(self, gsim, sctx, rctx, dctx):
+        """
+        Interpolate the PoEs of the given GSIM.
+
+        :returns:
+            an array of shape (N, L), or None when the GSIM, the rupture
+            or the sites cannot be managed with the tables
+        """
+        if not PoETable.supports(gsim):
+            return None
+        [dist_type] = gsim.REQUIRES_DISTANCES
+        dists = getattr(dctx, dist_type)
+        params = sorted(gsim.REQUIRES_SITES_PARAMETERS)
+        arrays = [getattr(sctx, param) for param in params]
+        if arrays:
+            idx, inv = group_rows(numpy.array(arrays, float).T)
+        else:
+            idx, inv = [0], numpy.zeros(len(dists), int)
+        if len(idx) > MAX_SITE_CLASSES:
+            return None
+        poes = numpy.zeros((len(dists), len(self.imtls.array)))
+        for c, i in enumerate(idx):
+            site_params = tuple((param, array[i].item())
+                                for param, array in zip(params, arrays))
+            table = self.get_table(gsim, site_params)
+            ok = inv == c
+            if table is None or not table.covers(rctx.mag, dists[ok]):
+                return None
+            poes[ok] = table(rctx.mag, dists[ok])
+        return poes
@@ -103,7 +103,7 @@ class SharmaEtAl2009(GMPE):
 
         # extract dictionary of coefficients specific to required
         # intensity measure type
-        coeffs = self.COEFFS[imt]
+        coeffs = self.COEFFS[imt].copy()
         coeffs.update(self.CONSTS)
 
         # equation (1) is in terms of common logarithm
@@ -42,6 +42,9 @@ class ZhaoEtAl2006Asc(GMPE):
     This class implements the equations for 'Active Shallow Crust'
     (that's why the class name ends with 'Asc').
     """
+    #: get_mean_and_stddevs_many is vectorized over the IMTs
+    vectorized_imts = True
+
     #: Supported tectonic region type is active shallow crust, this means
     #: that factors SI, SS and SSL are assumed 0 in equation 1, p. 901.
     DEFINED_FOR_TECTONIC_REGION_TYPE = const.TRT.ACTIVE_SHALLOW_CRUST
@@ -89,7 +92,23 @@ class ZhaoEtAl2006Asc(GMPE):
         # extracting dictionary of coefficients specific to required
         # intensity measure type.
         C = self.COEFFS_ASC[imt]
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
 
+    def get_mean_and_stddevs_many(self, sites, rup, dists, imts,
+                                  stddev_types):
+        """
+        See :meth:`superclass method
+        <.base.GroundShakingIntensityModel.get_mean_and_stddevs_many>`
+        for spec of input and result values.
+        """
+        C = self.COEFFS_ASC.get_coeffs(imts)
+        return self._get_mean_and_stddevs(C, sites, rup, dists, stddev_types)
+
+    def _get_mean_and_stddevs(self, C, sites, rup, dists, stddev_types):
+        """
+        Compute mean and standard deviations for the coefficients ``C``,
+        either the ones of a single IMT or the arrays of several IMTs.
+        """
         # mean value as given by equation 1, p. 901, without considering the
         # interface and intraslab terms (that is SI, SS, SSL = 0) and the
         # inter and intra event terms, plus the magnitude-squared term
@@ -171,25 +190,11 @@ class ZhaoEtAl2006Asc(GMPE):
         """
         Compute nine-th term in equation 1, p. 901.
         """
-        # map vs30 value to site class, see table 2, p. 901.
-        site_term = np.zeros(len(vs30))
-
-        # hard rock
-        site_term[vs30 > 1100.0] = C['CH']
-
-        # rock
-        site_term[(vs30 > 600) & (vs30 <= 1100)] = C['C1']
-
-        # hard soil
-        site_term[(vs30 > 300) & (vs30 <= 600)] = C['C2']
-
-        # medium soil
-        site_term[(vs30 > 200) & (vs30 <= 300)] = C['C3']
-
-        # soft soil
-        site_term[vs30 <= 200] = C['C4']
-
-        return site_term
+        # map vs30 value to site class, see table 2, p. 901:
+        # hard rock, rock, hard soil, medium soil and soft soil
+        return np.select(
+            [vs30 > 1100.0, vs30 > 600, vs30 > 300, vs30 > 200],
+            [C['CH'], C['C1'], C['C2'], C['C3']], C['C4'])
 
     def _compute_magnitude_squared_term(self, P, M, Q, W, mag):
         """
@@ -343,7 +348,7 @@ class ZhaoEtAl2006SSlab(ZhaoEtAl2006Asc):
 
         # to avoid singularity at 0.0 (in the calculation of the
         # slab correction term), replace 0 values with 0.1
-        d = dists.rrup
+        d = dists.rrup.copy()
         d[d == 0.0] = 0.1
 
         # mean value as given by equation 1, p. 901, without considering the
@@ -481,7 +486,7 @@ class ZhaoEtAl2006SSlabNSHMP2014(ZhaoEtAl2006SSlab):
 
         # to avoid singularity at 0.0 (in the calculation of the
         # slab correction term), replace 0 values with 0.1
-        d = dists.rrup
+        d = dists.rrup.copy()
         d[d == 0.0] = 0.1
 
         if rup.mag > 7.8:
@@ -618,7 +623,7 @@ class ZhaoEtAl2006SSlabCascadia(ZhaoEtAl2006SSlab):
 
         # to avoid singularity at 0.0 (in the calculation of the
         # slab correction term), replace 0 values with 0.1
-        d = dists.rrup
+        d = dists.rrup.copy()
         d[d == 0.0] = 0.1
 
         # mean value as given by equation 1, p. 901, without considering the
@@ -55,6 +55,23 @@ def _reshape(kwargs, lengths):
                              for length in lengths]
 
 
+def _round(x):
+    # vectorized version of openquake.baselib.python3compat.round
+    return numpy.floor(x + numpy.copysign(0.5, x))
+
+
+def _pad(lists, size):
+    # convert a list of 1 or size lists of floats into a 2D array
+    # padded with NaNs
+    if len(lists) == 1:
+        lists = lists * size
+    array = numpy.empty((size, max(len(lst) for lst in lists)))
+    array.fill(numpy.nan)
+    for row, lst in zip(array, lists):
+        row[:len(lst)] = lst
+    return array
+
+
 class MultiMFD(BaseMFD):
     """
     A MultiMFD is defined as a sequence of regular MFDs of the same kind.
@@ -122,23 +139,69 @@ class MultiMFD(BaseMFD):
         """
         :returns: minumum and maximum magnitudes from the underlying MFDs
         """
-        m1s, m2s = [], []
-        for mfd in self:
-            m1, m2 = mfd.get_min_max_mag()
-            m1s.append(m1)
-            m2s.append(m2)
-        return min(m1s), max(m2s)
+        mags, _ = self.get_rate_matrix()
+        return numpy.nanmin(mags), numpy.nanmax(mags)
 
     def check_constraints(self):
         pass
 
+    def _get(self, field):
+        # the values of the given field as an array of size elements
+        return numpy.zeros(self.size) + numpy.array(self.kwargs[field], float)
+
+    def get_rate_matrix(self):
+        """
+        Compute the magnitudes and the occurrence rates of all the
+        underlying MFDs at once, without instantiating them. The rows
+        are padded with NaN magnitudes and zero rates, since the MFDs
+        can have different numbers of bins.
+
+        :returns: two arrays of shape (size, M), magnitudes and rates
+        """
+        if self.kind == 'truncGutenbergRichterMFD':
+            bin_width = self._get('bin_width')
+            a_val, b_val = self._get('a_val'), self._get('b_val')
+            min_mag = _round(self._get('min_mag') / bin_width) * bin_width
+            max_mag = _round(self._get('max_mag') / bin_width) * bin_width
+            diff = min_mag != max_mag
+            min_mag[diff] += bin_width[diff] / 2.0
+            max_mag[diff] -= bin_width[diff] / 2.0
+            num_bins = _round((max_mag - min_mag) / bin_width).astype(int) + 1
+            # the magnitudes are accumulated bin after bin, as in
+            # TruncatedGRMFD.get_annual_occurrence_rates
+            steps = numpy.repeat(bin_width[:, None], num_bins.max(), axis=1)
+            steps[:, 0] = min_mag
+            mags = numpy.cumsum(steps, axis=1)
+            mags[numpy.arange(mags.shape[1]) >= num_bins[:, None]] = numpy.nan
+            rates = (10 ** (a_val[:, None] - b_val[:, None] *
+                            (mags - bin_width[:, None] / 2.0)) -
+                     10 ** (a_val[:, None] - b_val[:, None] *
+                            (mags + bin_width[:, None] / 2.0)))
+        elif self.kind == 'incrementalMFD':
+            rates = _pad(self.kwargs['occurRates'], self.size)
+            mags = (self._get('min_mag')[:, None] +
+                    numpy.arange(rates.shape[1]) * self._get('bin_width')[
+                        :, None])
+            mags[numpy.isnan(rates)] = numpy.nan
+        elif self.kind == 'arbitraryMFD':
+            mags = _pad(self.kwargs['magnitudes'], self.size)
+            rates = _pad(self.kwargs['occurRates'], self.size)
+        else:  # compute the rates point by point
+            pairs = [mfd.get_annual_occurrence_rates() for mfd in self]
+            mags = _pad([[mag for mag, _ in lst] for lst in pairs], self.size)
+            rates = _pad([[rate for _, rate in lst] for lst in pairs],
+                         self.size)
+        rates[numpy.isnan(mags)] = 0
+        return mags, rates
+
     def get_annual_occurrence_rates(self):
         """
         Yields the occurrence rates of the underlying MFDs in order
         """
-        for mfd in self:
-            for rates in mfd.get_annual_occurrence_rates():
-                yield rates
+        mags, rates = self.get_rate_matrix()
+        ok = ~numpy.isnan(mags)
+        for mag, rate in zip(mags[ok].tolist(), rates[ok].tolist()):
+            yield mag, rate
 
     def modify(self, modification, parameters):
         """
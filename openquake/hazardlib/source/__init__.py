@@ -108,10 +108,14 @@ def split_source(src):
         splits = split_map[src] = list(_split_source(src))
         if len(splits) > 1:
             has_serial = hasattr(src, 'serial')
+            if isinstance(src, MultiPointSource):
+                nrups = src.count_ruptures_by_point().tolist()
+            else:
+                nrups = [split.count_ruptures() for split in splits]
             start = 0
-            for split in splits:
+            for split, nrup in zip(splits, nrups):
                 split.src_group_id = src.src_group_id
-                split.num_ruptures = split.count_ruptures()
+                split.num_ruptures = nrup
                 split.ngsims = src.ngsims
                 if has_serial:
                     nr = split.num_ruptures
@@ -18,6 +18,7 @@ Module :mod:`openquake.hazardlib.source.area` defines :class:`AreaSource`.
 """
 import math
 from copy import deepcopy
+import numpy
 from openquake.hazardlib import geo, mfd
 from openquake.hazardlib.source.point import PointSource
 from openquake.hazardlib.source.base import ParametricSeismicSource
@@ -141,6 +142,33 @@ class AreaSource(ParametricSeismicSource):
                     self.temporal_occurrence_model)
                 yield rupture
 
+    def get_rupture_array(self):
+        """
+        :returns:
+            the ruptures of the source as an array of dtype
+            :data:`openquake.hazardlib.source.point.planar_rupture_dt`,
+            with the same values and order of :meth:`iter_ruptures`
+        """
+        polygon_mesh = self.polygon.discretize(self.area_discretization)
+        lons, lats = polygon_mesh.lons, polygon_mesh.lats
+        mags, rates = numpy.array(
+            self.get_annual_occurrence_rates(), float).reshape(-1, 2).T
+        # the reference ruptures at the first point of the mesh
+        ref = self._get_rupture_array(
+            numpy.repeat(lons[0], len(mags)), numpy.repeat(lats[0], len(mags)),
+            mags, rates, 1.0 / len(polygon_mesh))
+        # translated to all the points, as PlanarSurface.translate does
+        azimuth = geo.geodetic.azimuth(lons[0], lats[0], lons, lats)
+        distance = geo.geodetic.geodetic_distance(lons[0], lats[0], lons, lats)
+        array = numpy.tile(ref, len(polygon_mesh))
+        array['lons'], array['lats'] = geo.geodetic.point_at(
+            array['lons'], array['lats'],
+            numpy.repeat(azimuth, len(ref))[:, None],
+            numpy.repeat(distance, len(ref))[:, None])
+        array['hypo'][:, 0] = numpy.repeat(lons, len(ref))
+        array['hypo'][:, 1] = numpy.repeat(lats, len(ref))
+        return array
+
     def count_ruptures(self):
         """
         See
@@ -157,6 +185,9 @@ class AreaSource(ParametricSeismicSource):
     _get_max_rupture_projection_radius = PointSource.__dict__[
         '_get_max_rupture_projection_radius']
     _get_rupture_surface = PointSource.__dict__['_get_rupture_surface']
+    _get_rupture_array = PointSource.__dict__['_get_rupture_array']
+    get_rupture = PointSource.__dict__['get_rupture']
+    collapse_ruptures = PointSource.__dict__['collapse_ruptures']
 
     def __iter__(self):
         """
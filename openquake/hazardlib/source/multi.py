@@ -76,9 +76,29 @@ class MultiPointSource(ParametricSeismicSource):
         """
         Yield the ruptures of the underlying point sources
         """
-        for ps in self:
-            for rupture in ps.iter_ruptures():
-                yield rupture
+        for rec in self.get_rupture_array():
+            yield self.get_rupture(rec)
+
+    def get_rupture_array(self):
+        """
+        :returns:
+            the ruptures of the underlying point sources as an array of dtype
+            :data:`openquake.hazardlib.source.point.planar_rupture_dt`
+        """
+        mags, rates = self.mfd.get_rate_matrix()
+        ok = rates > 0
+        idx = numpy.nonzero(ok)[0]  # the point of each magnitude
+        return self._get_rupture_array(
+            self.mesh.lons[idx], self.mesh.lats[idx], mags[ok], rates[ok])
+
+    def count_ruptures_by_point(self):
+        """
+        :returns: the number of ruptures of each underlying point source
+        """
+        _, rates = self.mfd.get_rate_matrix()
+        return ((rates > 0).sum(axis=1) *
+                len(self.nodal_plane_distribution.data) *
+                len(self.hypocenter_distribution.data))
 
     def count_ruptures(self):
         """
@@ -86,9 +106,7 @@ class MultiPointSource(ParametricSeismicSource):
         :meth:`openquake.hazardlib.source.base.BaseSeismicSource.count_ruptures`
         for description of parameters and return value.
         """
-        return (len(self.get_annual_occurrence_rates()) *
-                len(self.nodal_plane_distribution.data) *
-                len(self.hypocenter_distribution.data))
+        return int(self.count_ruptures_by_point().sum())
 
     def filter_sites_by_distance_to_source(self, integration_distance, sites):
         """Filter on the bounding box"""
@@ -125,3 +143,18 @@ class MultiPointSource(ParametricSeismicSource):
     _get_rupture_dimensions = PointSource.__dict__['_get_rupture_dimensions']
     _get_max_rupture_projection_radius = PointSource.__dict__[
         '_get_max_rupture_projection_radius']
+    _get_rupture_array = PointSource.__dict__['_get_rupture_array']
+    collapse_ruptures = PointSource.__dict__['collapse_ruptures']
+
+    def get_rupture(self, rec):
+        """
+        :param rec: a record of dtype
+            :data:`openquake.hazardlib.source.point.planar_rupture_dt`
+        :returns: the corresponding
+            :class:`~openquake.hazardlib.source.rupture.ParametricProbabilisticRupture`,
+            with source typology PointSource, like the ruptures of the
+            underlying point sources
+        """
+        rup = PointSource.__dict__['get_rupture'](self, rec)
+        rup.source_typology = PointSource
+        return rup
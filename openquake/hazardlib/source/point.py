@@ -17,13 +17,26 @@
 Module :mod:`openquake.hazardlib.source.point` defines :class:`PointSource`.
 """
 import math
+import numpy
 from openquake.baselib.slots import with_slots
 from openquake.hazardlib.geo import Point, geodetic
-from openquake.hazardlib.geo.surface.planar import PlanarSurface
+from openquake.hazardlib.geo.surface.planar import (
+    PlanarSurface, get_dimensions)
 from openquake.hazardlib.source.base import ParametricSeismicSource
 from openquake.hazardlib.source.rupture import ParametricProbabilisticRupture
 from openquake.hazardlib.calc.filters import angular_distance, KM_TO_DEGREES
 
+F64 = numpy.float64
+
+#: dtype of the ruptures of the point-like sources; the corners of the
+#: planar surfaces are in the order top left, top right, bottom left,
+#: bottom right, as in :class:`PlanarSurface`
+planar_rupture_dt = numpy.dtype([
+    ('mag', F64), ('rake', F64), ('occurrence_rate', F64),
+    ('hypo', (F64, 3)), ('strike', F64), ('dip', F64),
+    ('width', F64), ('length', F64),
+    ('lons', (F64, 4)), ('lats', (F64, 4)), ('depths', (F64, 4))])
+
 
 @with_slots
 class PointSource(ParametricSeismicSource):
@@ -198,6 +211,172 @@ class PointSource(ParametricSeismicSource):
                         occurrence_rate, self.temporal_occurrence_model
                     )
 
+    def get_rupture_array(self):
+        """
+        :returns:
+            the ruptures of the source as an array of dtype
+            :data:`planar_rupture_dt`, in the same order of
+            :meth:`iter_ruptures`
+        """
+        mags, rates = numpy.array(
+            self.get_annual_occurrence_rates(), float).reshape(-1, 2).T
+        lons = numpy.repeat(self.location.longitude, len(mags))
+        lats = numpy.repeat(self.location.latitude, len(mags))
+        return self._get_rupture_array(lons, lats, mags, rates)
+
+    def _get_rupture_array(self, lons, lats, mags, rates,
+                           rate_scaling_factor=1, nodal_planes=None,
+                           hypo_depths=None):
+        """
+        Vectorized version of :meth:`_iter_ruptures_at_location`, building
+        the ruptures for many locations without instantiating any object.
+        The surfaces are computed as in :meth:`_get_rupture_surface`.
+
+        :param lons, lats:
+            coordinates of the locations, one for each magnitude
+        :param mags, rates:
+            magnitudes and annual occurrence rates at the locations
+        :param rate_scaling_factor:
+            positive float number to multiply occurrence rates by
+        :param nodal_planes:
+            pairs (probability, nodal plane), by default the ones of the
+            nodal plane distribution
+        :param hypo_depths:
+            pairs (probability, depth), by default the ones of the
+            hypocenter distribution
+        :returns:
+            an array of dtype :data:`planar_rupture_dt` ordered by location
+            and magnitude, nodal plane and hypocenter depth
+        """
+        assert 0 < rate_scaling_factor
+        np_probs, nps = zip(
+            *(nodal_planes or self.nodal_plane_distribution.data))
+        hc_probs, hc_depths = zip(
+            *(hypo_depths or self.hypocenter_distribution.data))
+        n_np, n_hc = len(nps), len(hc_depths)
+        imag = numpy.repeat(numpy.arange(len(mags)), n_np * n_hc)
+        inp = numpy.tile(numpy.repeat(numpy.arange(n_np), n_hc), len(mags))
+        ihc = numpy.tile(numpy.arange(n_hc), len(mags) * n_np)
+        array = numpy.zeros(len(imag), planar_rupture_dt)
+        array['mag'] = mag = numpy.array(mags, float)[imag]
+        array['rake'] = numpy.array([np.rake for np in nps])[inp]
+        array['strike'] = strike = numpy.array(
+            [np.strike for np in nps])[inp]
+        array['dip'] = dip = numpy.array([np.dip for np in nps])[inp]
+        array['occurrence_rate'] = (
+            numpy.array(rates, float)[imag] *
+            numpy.array(np_probs, float)[inp] *
+            numpy.array(hc_probs, float)[ihc]) * rate_scaling_factor
+        lon = numpy.array(lons, float)[imag]
+        lat = numpy.array(lats, float)[imag]
+        depth = numpy.array(hc_depths, float)[ihc]
+        array['hypo'] = numpy.array([lon, lat, depth]).T
+
+        # rupture dimensions for each distinct magnitude and nodal plane
+        umags, inv = numpy.unique(mag, return_inverse=True)
+        dims = numpy.array([[self._get_rupture_dimensions(m, np)
+                             for np in nps] for m in umags])
+        rup_length, rup_width = dims[inv.reshape(-1), inp].T
+        rdip = numpy.radians(dip)
+        azimuth_down = (strike + 90) % 360
+        azimuth_up = ((azimuth_down + 90) % 360 + 90) % 360
+        rup_proj_height = rup_width * numpy.sin(rdip)
+        rup_proj_width = rup_width * numpy.cos(rdip)
+        hheight = rup_proj_height / 2.
+
+        # vertical shift needed to fit the rupture in the seismogenic layer
+        vshift = self.upper_seismogenic_depth - depth + hheight
+        below = self.lower_seismogenic_depth - depth - hheight
+        vshift = numpy.where(
+            vshift < 0, numpy.where(below > 0, 0, below), vshift)
+        shifted = vshift != 0
+        clon, clat, cdepth = lon.copy(), lat.copy(), depth + vshift
+        hshift = numpy.abs(vshift[shifted] / numpy.tan(rdip[shifted]))
+        clon[shifted], clat[shifted] = geodetic.point_at(
+            lon[shifted], lat[shifted],
+            numpy.where(vshift[shifted] < 0, azimuth_up[shifted],
+                        azimuth_down[shifted]), hshift)
+
+        # corners moving along the diagonals from the rupture center
+        theta = numpy.degrees(
+            numpy.arctan((rup_proj_width / 2.) / (rup_length / 2.)))
+        hor_dist = numpy.sqrt(
+            (rup_length / 2.) ** 2 + (rup_proj_width / 2.) ** 2)
+        azimuths = [(strike + 180 + theta) % 360,  # top left
+                    (strike - theta) % 360,  # top right
+                    (strike + 180 - theta) % 360,  # bottom left
+                    (strike + theta) % 360]  # bottom right
+        for i, azimuth in enumerate(azimuths):
+            array['lons'][:, i], array['lats'][:, i] = geodetic.point_at(
+                clon, clat, azimuth, hor_dist)
+            array['depths'][:, i] = cdepth + (
+                rup_proj_height / 2. if i >= 2 else -rup_proj_height / 2.)
+        array['width'], array['length'] = get_dimensions(
+            array['lons'], array['lats'], array['depths'])
+        return array
+
+    def collapse_ruptures(self, array, mesh, collapse_factor):
+        """
+        Collapse the ruptures far from the sites, where the differences in
+        nodal plane and hypocenter depth have a small effect on the ground
+        motion: for each location and magnitude, if all the sites are
+        farther than `collapse_factor` times the size of the ruptures (the
+        maximum between their length and the range of the hypocenter
+        depths), the ruptures are replaced by a single one with the most
+        likely nodal plane, the average hypocenter depth and the total
+        occurrence rate.
+
+        :param array: an array returned by :meth:`get_rupture_array`
+        :param mesh: a mesh with the sites
+        :param collapse_factor: a positive number
+        :returns: a (possibly) shorter array of ruptures
+        """
+        num_ruptures = (len(self.nodal_plane_distribution.data) *
+                        len(self.hypocenter_distribution.data))
+        if num_ruptures == 1:
+            return array
+        groups = array.reshape(-1, num_ruptures)
+        lons, lats = groups['hypo'][:, 0, 0], groups['hypo'][:, 0, 1]
+        mindist = numpy.zeros(len(groups))
+        step = max(100000 // len(mesh), 1)  # limit the distance matrices
+        for start in range(0, len(groups), step):
+            slc = slice(start, start + step)
+            mindist[slc] = geodetic.geodetic_distance(
+                lons[slc, None], lats[slc, None], mesh.lons, mesh.lats
+            ).min(axis=1)
+        depths = [depth for _, depth in self.hypocenter_distribution.data]
+        size = numpy.maximum(groups['length'].max(axis=1),
+                             max(depths) - min(depths))
+        far = mindist > collapse_factor * size
+        if not far.any():
+            return array
+        np_prob, nodal_plane = max(self.nodal_plane_distribution.data,
+                                   key=lambda pair: pair[0])
+        depth = sum(float(prob) * depth
+                    for prob, depth in self.hypocenter_distribution.data)
+        groups = groups.copy()
+        groups[far, 0] = self._get_rupture_array(
+            lons[far], lats[far], groups['mag'][far, 0],
+            groups['occurrence_rate'][far].sum(axis=1),
+            nodal_planes=[(1, nodal_plane)], hypo_depths=[(1, depth)])
+        keep = ~far[:, None] | (numpy.arange(num_ruptures) == 0)
+        return groups[keep]
+
+    def get_rupture(self, rec):
+        """
+        :param rec: a record of dtype :data:`planar_rupture_dt`
+        :returns: the corresponding
+            :class:`~openquake.hazardlib.source.rupture.ParametricProbabilisticRupture`
+        """
+        surface = PlanarSurface.from_corners(
+            self.rupture_mesh_spacing, rec['strike'], rec['dip'],
+            rec['width'], rec['length'], rec['lons'], rec['lats'],
+            rec['depths'])
+        return ParametricProbabilisticRupture(
+            rec['mag'], rec['rake'], self.tectonic_region_type,
+            Point(*rec['hypo']), surface, type(self),
+            rec['occurrence_rate'], self.temporal_occurrence_model)
+
     def count_ruptures(self):
         """
         See :meth:
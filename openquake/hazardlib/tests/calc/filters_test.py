@@ -16,14 +16,26 @@
 #  You should have received a copy of the GNU Affero General Public License
 #  along with OpenQuake.  If not, see <http://www.gnu.org/licenses/>.
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
+import numpy
 from numpy.testing import assert_almost_equal as aae
 from openquake.baselib.general import writetmp
 from openquake.hazardlib import nrml
 from openquake.hazardlib.geo.point import Point
+from openquake.hazardlib.geo.nodalplane import NodalPlane
+from openquake.hazardlib.mfd import TruncatedGRMFD
+from openquake.hazardlib.pmf import PMF
+from openquake.hazardlib.scalerel import WC1994
+from openquake.hazardlib.source import PointSource
+from openquake.hazardlib.tom import PoissonTOM
 from openquake.hazardlib.site import Site, SiteCollection
+from openquake.hazardlib.calc import filters
 from openquake.hazardlib.calc.filters import (
-    IntegrationDistance, MAX_DISTANCE, SourceFilter, angular_distance)
+    IntegrationDistance, MAX_DISTANCE, SourceFilter, SiteIndex,
+    angular_distance, rtree)
 
 
 class AngularDistanceTestCase(unittest.TestCase):
@@ -96,6 +108,111 @@ class SourceFilterTestCase(unittest.TestCase):
         sites = srcfilter.get_close_sites(src)
         self.assertIsNotNone(sites)
 
+    def test_site_index(self):
+        sitecol = SiteCollection([
+            Site(location=Point(lon, lat, depth), vs30=760,
+                 vs30measured=True, z1pt0=100, z2pt5=5)
+            for lon, lat, depth in [(179.9, -40, 0), (-179.9, -40, 1),
+                                    (0, 0, 0), (10, 45, 2), (-170, -40, 0)]])
+        idx = pickle.loads(pickle.dumps(SiteIndex(sitecol)))
+        idx.array = sitecol.array
+        self.assertEqual(list(idx.get_indices((5, 40, 15, 50))), [3])
+        # boxes crossing the international date line
+        self.assertEqual(list(idx.get_indices((179, -41, -179, -39))), [0, 1])
+        self.assertEqual(list(idx.get_indices((179, -41, 181, -39))), [0, 1])
+        self.assertEqual(list(idx.get_indices((-181, -41, -179, -39))), [0, 1])
+        # ambiguous box, all the longitudes are considered
+        self.assertEqual(list(idx.get_indices((-179.9, -41, 179.9, -39))),
+                         [0, 1, 4])
+        self.assertEqual(list(idx.get_indices((20, 60, 30, 70))), [])
+
+        # the index is kept when the filter is pickled, also for sites
+        # not at sea level
+        maxdist = IntegrationDistance({'default': 200})
+        srcfilter = pickle.loads(pickle.dumps(SourceFilter(sitecol, maxdist)))
+        self.assertEqual(list(srcfilter.site_index.get_indices(
+            (5, 40, 15, 50))), [3])
+
+    def test_tiles(self):
+        # the tiles keep the global site IDs but have a local array
+        sitecol = SiteCollection([
+            Site(location=Point(lon, 45), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5) for lon in range(20)])
+        tile = sitecol.split_in_tiles(2)[1]
+        self.assertEqual(tile.sids[0], 10)
+        src = PointSource(
+            'P', 'Point', 'Active Shallow Crust',
+            TruncatedGRMFD(5., 6., .1, 3., 1.), 2., WC1994(), 1.,
+            PoissonTOM(50.), 0., 10., Point(16.5, 45),
+            PMF([(1., NodalPlane(0., 90., 0.))]), PMF([(1., 5.)]))
+        srcfilter = pickle.loads(pickle.dumps(SourceFilter(
+            tile, IntegrationDistance({'default': 100}), use_rtree=False)))
+        [(_, sites)] = srcfilter([src])
+        self.assertEqual(list(sites.sids), [16, 17])
+        self.assertEqual(list(srcfilter.site_index.get_indices(
+            (15.5, 44, 17.5, 46))), [6, 7])
+
+    def test_high_latitude(self):
+        # the filter must find the same sites as the unfiltered distance
+        # computation also where a degree of longitude is short: the
+        # bounding box of the source alone misses some sites at lat > 85
+        sitecol = SiteCollection([
+            Site(location=Point(lon, lat), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5)
+            for lon in range(-40, 81) for lat in numpy.arange(82, 88.1, .2)])
+        src = PointSource(
+            'P', 'Point', 'Active Shallow Crust',
+            TruncatedGRMFD(5., 6., .1, 3., 1.), 2., WC1994(), 1.,
+            PoissonTOM(50.), 0., 10., Point(20, 84),
+            PMF([(1., NodalPlane(0., 90., 0.))]), PMF([(1., 5.)]))
+        maxdist = IntegrationDistance({'default': 300})
+        srcfilter = pickle.loads(pickle.dumps(SourceFilter(
+            sitecol, maxdist, use_rtree=False)))
+        [(_, sites)] = srcfilter([src])
+        expected = src.filter_sites_by_distance_to_source(300, sitecol)
+        self.assertEqual(list(sites.sids), list(expected.sids))
+
+    def test_rtree_on_disk(self):
+        if rtree is None:
+            raise unittest.SkipTest('rtree is not installed')
+        sitecol = SiteCollection([
+            Site(location=Point(lon, lat), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5)
+            for lon, lat in [(179.9, -40), (-179.9, -40), (10, 45)]])
+        tmpdir = tempfile.mkdtemp()
+        try:
+            srcfilter = SourceFilter(
+                sitecol, IntegrationDistance({'default': 200}),
+                index_path=os.path.join(tmpdir, 'calc_1_sites_1'))
+            self.assertTrue(srcfilter.use_rtree)
+            # the workers open a private copy of the index saved on disk
+            idx = os.path.join(tmpdir, 'calc_1_sites_1.idx')
+            with open(idx, 'rb') as f:
+                saved = f.read()
+            srcfilter = pickle.loads(pickle.dumps(srcfilter))
+            self.assertFalse(srcfilter.use_rtree)
+            tmp, index = filters._rtree_copy[idx[:-4]]
+            self.assertIs(srcfilter.index, index)
+            self.assertNotEqual(tmp, tmpdir)
+            self.assertEqual(list(srcfilter._close_indices((5, 40, 15, 50))),
+                             [2])
+            # the rtree index is not used for boxes crossing the date line
+            self.assertEqual(
+                list(srcfilter._close_indices((179, -41, 181, -39))), [0, 1])
+            del srcfilter
+            with open(idx, 'rb') as f:
+                self.assertEqual(f.read(), saved)
+            # on a tile the index contains positions, not site IDs
+            tile = sitecol.split_in_tiles(2)[1]
+            self.assertEqual(list(tile.sids), [2])
+            srcfilter = pickle.loads(pickle.dumps(SourceFilter(
+                tile, IntegrationDistance({'default': 200}),
+                index_path=os.path.join(tmpdir, 'calc_1_sites_2'))))
+            self.assertEqual(
+                list(srcfilter._close_indices((5, 40, 15, 50))), [0])
+        finally:
+            shutil.rmtree(tmpdir)
+
 # from https://groups.google.com/d/msg/openquake-users/P03SxJsfW_s/nCdcxj8WAAAJ
 characteric_source = '''\
 <?xml version="1.0" encoding="utf-8"?>
@@ -24,14 +24,30 @@ import numpy
 from copy import deepcopy
 
 from openquake.hazardlib import const
+from openquake.baselib.general import DictArray
+from openquake.hazardlib.gsim import get_available_gsims
 from openquake.hazardlib.gsim.base import (
     GMPE, IPE, CoeffsTable, SitesContext, RuptureContext, DistancesContext,
-    NonInstantiableError, NotVerifiedWarning, DeprecationWarning)
+    NonInstantiableError, NotVerifiedWarning, DeprecationWarning,
+    _mean_stddevs_by_imt, _poes_by_imt)
 from openquake.hazardlib.geo.mesh import Mesh
 from openquake.hazardlib.geo.point import Point
-from openquake.hazardlib.imt import PGA, PGV, SA
+from openquake.hazardlib.geo.surface import PlanarSurface
+from openquake.hazardlib.calc.filters import IntegrationDistance
+from openquake.hazardlib.gsim.boore_atkinson_2008 import BooreAtkinson2008
+from openquake.hazardlib.gsim.boore_2014 import (
+    BooreEtAl2014, BooreEtAl2014NoSOF, BooreEtAl2014CaliforniaBasin)
+from openquake.hazardlib.gsim.chiou_youngs_2008 import ChiouYoungs2008
+from openquake.hazardlib.gsim.nshmp_2014 import AbrahamsonEtAl2014NSHMPMean
+from openquake.hazardlib.imt import PGA, PGV, SA, from_string
 from openquake.hazardlib.site import Site, SiteCollection
 from openquake.hazardlib.source.rupture import BaseRupture
+from openquake.hazardlib.source.point import PointSource
+from openquake.hazardlib.mfd import TruncatedGRMFD
+from openquake.hazardlib.scalerel.peer import PeerMSR
+from openquake.hazardlib.tom import PoissonTOM
+from openquake.hazardlib.pmf import PMF
+from openquake.hazardlib.geo.nodalplane import NodalPlane
 from openquake.hazardlib.gsim.base import ContextMaker
 
 
@@ -166,6 +182,94 @@ class GetPoEsTestCase(_FakeGSIMTestCase):
         self.assertAlmostEqual(poe23, 0.5521092)
 
 
+class ManyIMTsTestCase(unittest.TestCase):
+    imts = [PGA(), SA(0.1), SA(0.25), SA(1.0)]
+
+    def setUp(self):
+        self.sctx = SitesContext()
+        self.sctx.vs30 = numpy.array([180., 300., 760., 1200.])
+        self.sctx.z1pt0 = numpy.array([500., 200., 40., 10.])
+        self.rctx = RuptureContext()
+        self.rctx.mag = 6.5
+        self.rctx.rake = 90.
+        self.dctx = DistancesContext()
+        self.dctx.rjb = numpy.array([0., 10., 50., 150.])
+
+    def test_mean_and_stddevs_many(self):
+        gsim = BooreEtAl2014()
+        stddev_types = [const.StdDev.TOTAL, const.StdDev.INTRA_EVENT]
+        mean, stddevs = gsim.get_mean_and_stddevs_many(
+            self.sctx, self.rctx, self.dctx, self.imts, stddev_types)
+        self.assertEqual(mean.shape, (4, 4))
+        for m, imt in enumerate(self.imts):
+            mn, stds = gsim.get_mean_and_stddevs(
+                self.sctx, self.rctx, self.dctx, imt, stddev_types)
+            numpy.testing.assert_allclose(mean[m], mn)
+            for s in range(len(stddev_types)):
+                self.assertEqual(stddevs[s].shape, (4, 4))
+                numpy.testing.assert_allclose(stddevs[s][m], stds[s])
+
+    def test_poes_many(self):
+        gsim = BooreEtAl2014()
+        imtls = DictArray({'PGA': [0.01, 0.1, 0.5], 'SA(1.0)': [0.05, 0.3]})
+        for trunc in (None, 0, 3):
+            poes = gsim.get_poes_many(
+                self.sctx, self.rctx, self.dctx, imtls, trunc)
+            expected = numpy.concatenate([gsim.get_poes(
+                self.sctx, self.rctx, self.dctx, from_string(imt),
+                imtls[imt], trunc) for imt in imtls], axis=1)
+            numpy.testing.assert_allclose(poes, expected)
+
+    def test_fallback(self):
+        # a subclass not declaring vectorized_imts = True falls back to
+        # the loop on the IMTs, even if its parent is vectorized
+        self.assertTrue(BooreEtAl2014.vectorized_imts)
+        self.assertTrue(BooreEtAl2014NoSOF.vectorized_imts)
+        self.assertIs(BooreEtAl2014NoSOF.get_mean_and_stddevs_many,
+                      BooreEtAl2014.get_mean_and_stddevs_many)
+        self.assertFalse(BooreEtAl2014CaliforniaBasin.vectorized_imts)
+        self.assertIs(
+            BooreEtAl2014CaliforniaBasin.get_mean_and_stddevs_many,
+            _mean_stddevs_by_imt)
+        gsim = BooreEtAl2014CaliforniaBasin()
+        mean, _ = gsim.get_mean_and_stddevs_many(
+            self.sctx, self.rctx, self.dctx, self.imts, [])
+        for m, imt in enumerate(self.imts):
+            mn, _ = gsim.get_mean_and_stddevs(
+                self.sctx, self.rctx, self.dctx, imt, [])
+            numpy.testing.assert_allclose(mean[m], mn)
+
+        # a subclass overriding get_poes is used by get_poes_many
+        self.assertIs(AbrahamsonEtAl2014NSHMPMean.get_poes_many,
+                      _poes_by_imt)
+
+    def test_vectorized_imts(self):
+        # the GSIMs declaring vectorized_imts = True give the same results
+        # as the loop on the IMTs
+        self.sctx.z2pt5 = numpy.array([3., 1., .5, .2])
+        self.sctx.vs30measured = numpy.array([True, False, True, False])
+        self.sctx.backarc = numpy.zeros(4, bool)
+        for name, value in dict(dip=45., ztor=2., width=10.,
+                                hypo_depth=10.).items():
+            setattr(self.rctx, name, value)
+        for name in ('rrup', 'rx', 'ry0', 'repi', 'rhypo'):
+            setattr(self.dctx, name, self.dctx.rjb + 1.)
+        self.dctx.rcdpp = numpy.array([0.1, -0.2, 0.3, 0.])
+        stddev_types = [const.StdDev.TOTAL]
+        for gsim_class in get_available_gsims().values():
+            if not gsim_class.vectorized_imts:
+                continue
+            gsim = gsim_class()
+            imts = [imt for imt in self.imts
+                    if type(imt) in gsim.DEFINED_FOR_INTENSITY_MEASURE_TYPES]
+            mean, [std] = gsim.get_mean_and_stddevs_many(
+                self.sctx, self.rctx, self.dctx, imts, stddev_types)
+            emean, [estd] = _mean_stddevs_by_imt(
+                gsim, self.sctx, self.rctx, self.dctx, imts, stddev_types)
+            numpy.testing.assert_allclose(mean, emean, err_msg=str(gsim))
+            numpy.testing.assert_allclose(std, estd, err_msg=str(gsim))
+
+
 class TGMPE(GMPE):
     DEFINED_FOR_TECTONIC_REGION_TYPE = None
     DEFINED_FOR_INTENSITY_MEASURE_TYPES = None
@@ -395,6 +499,74 @@ class MakeContextsTestCase(_FakeGSIMTestCase):
                           'get_strike': 1})
 
 
+class ApproxFilterTestCase(unittest.TestCase):
+    def test_discarded(self):
+        surface = PlanarSurface.from_corner_points(
+            1, Point(0, 0, 5), Point(0, .2, 5), Point(.1, .2, 15),
+            Point(.1, 0, 15))
+        rupture = BaseRupture(
+            mag=6, rake=0, tectonic_region_type=const.TRT.VOLCANIC,
+            hypocenter=Point(.05, .1, 10), surface=surface,
+            source_typology=object())
+        sites = SiteCollection([
+            Site(Point(lon, lat), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5)
+            for lon, lat in [(.5, .1), (.83, .1), (3, 3)]])
+        cmaker = ContextMaker([BooreAtkinson2008()],
+                              IntegrationDistance({'default': 80}))
+        sctx, rctx, dctx = cmaker.make_contexts(sites, rupture)
+        numpy.testing.assert_equal(sctx.sids, [0])
+        # the site at (3, 3) is discarded by the approximate filter,
+        # the site at (.83, .1) only by the exact filter
+        self.assertEqual(cmaker.discarded, {'approx': 1, 'exact': 1})
+        self.assertGreater(cmaker.approx_filter(sites, rupture).mesh.lons[-1],
+                           .8)
+
+    def test_dist_cache(self):
+        # two ruptures with the same geometry share the distances
+        surface = PlanarSurface.from_corner_points(
+            1, Point(0, 0, 5), Point(0, .2, 5), Point(.1, .2, 15),
+            Point(.1, 0, 15))
+        sites = SiteCollection([
+            Site(Point(lon, .1), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5) for lon in (.2, .5)])
+        cmaker = ContextMaker([ChiouYoungs2008()])  # requires rrup and rx
+        cache = {}
+        dctxs = []
+        for mag in (5, 6):
+            rupture = BaseRupture(
+                mag=mag, rake=0, tectonic_region_type=const.TRT.VOLCANIC,
+                hypocenter=Point(.05, .1, 10), surface=surface,
+                source_typology=object())
+            dctxs.append(cmaker.make_contexts(
+                sites, rupture, dist_cache=cache)[2])
+        self.assertEqual(len(cache), 2)
+        self.assertIs(dctxs[0].rrup, dctxs[1].rrup)
+
+    def test_rupture_array(self):
+        # the ruptures far away are discarded before being instantiated
+        src = PointSource(
+            'P', 'P', const.TRT.VOLCANIC,
+            TruncatedGRMFD(a_val=3, b_val=1, min_mag=5, max_mag=7.5,
+                           bin_width=.5),
+            1., PeerMSR(), 1.5, PoissonTOM(50.), 0., 20., Point(0, 0),
+            PMF([(1, NodalPlane(90, 90, 0))]), PMF([(1, 10.)]))
+        src.num_ruptures = src.count_ruptures()
+        sites = SiteCollection([
+            Site(Point(lon, 0), vs30=760, vs30measured=True,
+                 z1pt0=100, z2pt5=5) for lon in (.95, 1.2)])
+        maxdist = IntegrationDistance({'default': [(5, 80), (7.5, 100)]})
+        cmaker = ContextMaker([BooreAtkinson2008()], maxdist)
+        with mock.patch.object(src, 'get_rupture',
+                               wraps=src.get_rupture) as get_rupture:
+            ruptures = cmaker.filter_ruptures(src, sites)
+        mags = [rup.mag for rup in src.iter_ruptures()
+                if rup.surface.get_joyner_boore_distance(
+                    sites.mesh).min() <= maxdist('default', rup.mag)]
+        self.assertEqual([rup.mag for rup in ruptures], mags)
+        self.assertLess(get_rupture.call_count, src.count_ruptures())
+
+
 class ContextTestCase(unittest.TestCase):
     def test_equality(self):
         sctx1 = SitesContext()
@@ -438,6 +610,17 @@ class ContextTestCase(unittest.TestCase):
         rctx.mag = 5.
         self.assertTrue(sctx1 != rctx)
 
+    def test_roundup(self):
+        dctx = DistancesContext()
+        dctx.rjb = numpy.array([1., 20.])
+        dctx.rrup = numpy.array([11., 21.])
+        ctx = dctx.roundup(10)
+        numpy.testing.assert_equal(ctx.rjb, [10., 20.])
+        # the original context is not modified
+        numpy.testing.assert_equal(dctx.rjb, [1., 20.])
+        # the arrays without small distances are shared
+        self.assertIs(ctx.rrup, dctx.rrup)
+
 
 class GsimInstantiationTestCase(unittest.TestCase):
     def test_deprecated(self):
@@ -543,3 +726,31 @@ class CoeffsTableTestCase(unittest.TestCase):
         self.assertEqual(str(te.exception),
                          "CoeffsTable cannot be constructed with "
                          "inputs of the form 'int'")
+
+    def test_memoized_records(self):
+        table = CoeffsTable(sa_damping=5, table=self.coefficient_string)
+        table.cache_size = 2
+        C = table[SA(0.5)]
+        self.assertIs(table[SA(0.5)], C)
+        self.assertAlmostEqual(C.a, 1 + 4 * numpy.log10(5))
+        with self.assertRaises(TypeError):
+            C['a'] = 0
+        with self.assertRaises(AttributeError):
+            C.c
+        # the least recently used record is discarded
+        table[SA(0.2)]
+        table[SA(0.5)]
+        table[SA(2.0)]
+        self.assertEqual(list(table._cache), [SA(0.5), SA(2.0)])
+        # copies and pickles are possible
+        self.assertEqual(deepcopy(C), C)
+        self.assertEqual(C.copy(), dict(C))
+
+    def test_get_coeffs(self):
+        table = CoeffsTable(sa_damping=5, table=self.coefficient_string)
+        C = table.get_coeffs([PGA(), SA(0.1), SA(0.5)])
+        numpy.testing.assert_allclose(
+            C.b, [[0.1], [2.0], [table[SA(0.5)]['b']]])
+        self.assertFalse(C.a.flags.writeable)
+        with self.assertRaises(KeyError):
+            table.get_coeffs([PGA(), SA(0.01)])
@@ -17,6 +17,7 @@
 # along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import pickle
 import tempfile
 import unittest
 
@@ -581,6 +582,28 @@ class GSIMTableGoodTestCase(unittest.TestCase):
         self.assertEqual(str(ve.exception),
                          "Standard Deviation type Inter event not supported")
 
+    def test_cached_tables(self):
+        """
+        Tests that the interpolated tables are kept in a LRU cache
+        """
+        gsim = GMPETable(gmpe_table=self.TABLE_FILE)
+        gsim.cache_size = 2
+        sa1 = gsim._return_tables(6.5, imt_module.SA(1.0), "IMLs")
+        self.assertFalse(sa1.flags.writeable)
+        self.assertIs(gsim._return_tables(6.5, imt_module.SA(1.0), "IMLs"),
+                      sa1)
+        gsim._return_tables(6.5, imt_module.PGA(), "IMLs")
+        gsim._return_tables(6.5, imt_module.SA(1.0), "IMLs")
+        gsim._return_tables(6.0, imt_module.SA(1.0), "Total")
+        # the table for PGA was the least recently used one
+        self.assertEqual(list(gsim._cache),
+                         [("IMLs", "SA(1.0)", 6.5),
+                          ("Total", "SA(1.0)", 6.0)])
+        # the period interpolation is done once per IMT
+        self.assertEqual(sorted(gsim._period_tables),
+                         [("IMLs", "PGA"), ("IMLs", "SA(1.0)"),
+                          ("Total", "SA(1.0)")])
+
     def tearDown(self):
         """
         Close the hdf5 file
@@ -662,6 +685,21 @@ class GSIMTableTestCaseRupture(unittest.TestCase):
         np.testing.assert_array_almost_equal(np.exp(mean), expected_mean, 5)
         np.testing.assert_array_almost_equal(sigma[0], 0.4 * np.ones(5), 5)
 
+    def test_shared_tables(self):
+        """
+        Tests that the tables are memory-mapped and not pickled
+        """
+        gsim = GMPETable(gmpe_table=self.TABLE_FILE)
+        self.assertIsInstance(gsim.imls["SA"], np.memmap)
+        self.assertIsInstance(gsim.stddevs["Total"]["SA"], np.memmap)
+        data = pickle.dumps(gsim, pickle.HIGHEST_PROTOCOL)
+        self.assertNotIn(b"numpy", data)
+        gsim2 = pickle.loads(data)
+        self.assertEqual(gsim2, gsim)
+        for iml in ["PGA", "PGV", "SA", "T"]:
+            np.testing.assert_array_equal(gsim2.imls[iml], gsim.imls[iml])
+        self.assertEqual(gsim2.amplification.parameter, "rake")
+
 
 class GSIMTableTestCaseBadFile(unittest.TestCase):
     """
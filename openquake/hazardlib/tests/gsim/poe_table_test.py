@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+#
+# Copyright (C) 2017 GEM Foundation
+#
+# OpenQuake is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# OpenQuake is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with OpenQuake. If not, see <http://www.gnu.org/licenses/>.
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+
+from openquake.baselib.general import DictArray
+from openquake.hazardlib.gsim.base import (
+    SitesContext, RuptureContext, DistancesContext)
+from openquake.hazardlib.gsim.boore_2014 import (
+    BooreEtAl2014, BooreEtAl2014NoSOF)
+from openquake.hazardlib.gsim.poe_table import (
+    PoETable, PoETables, group_rows)
+
+IMTLS = DictArray({'PGA': numpy.logspace(-3, 0, 10),
+                   'SA(1.0)': numpy.logspace(-3, 0, 10)})
+
+
+def make_contexts(mag, vs30, rjb):
+    sctx = SitesContext()
+    sctx.vs30 = numpy.array(vs30)
+    rctx = RuptureContext()
+    rctx.mag = mag
+    dctx = DistancesContext()
+    dctx.rjb = numpy.array(rjb)
+    return sctx, rctx, dctx
+
+
+class PoETableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_supports(self):
+        self.assertTrue(PoETable.supports(BooreEtAl2014NoSOF()))
+        # the rake is required
+        self.assertFalse(PoETable.supports(BooreEtAl2014()))
+
+    def test_interpolation(self):
+        gsim = BooreEtAl2014NoSOF()
+        table = PoETable(gsim, IMTLS, 3, (('vs30', 760.),))
+        table.build()
+        self.assertLess(table.error, 0.02)
+        # on the nodes of the grid the PoEs are exact
+        sctx, rctx, dctx = make_contexts(
+            table.mags[20], [760.] * 3, table.dists[[0, 30, 60]])
+        numpy.testing.assert_allclose(
+            table(rctx.mag, dctx.rjb),
+            gsim.get_poes_many(sctx, rctx, dctx, IMTLS, 3))
+
+    def test_get_poes(self):
+        gsim = BooreEtAl2014NoSOF()
+        tables = PoETables(IMTLS, 3, 0.05, self.cachedir)
+        sctx, rctx, dctx = make_contexts(
+            6.33, [760., 400., 760.], [3.3, 45., 170.])
+        poes = tables.get_poes(gsim, sctx, rctx, dctx)
+        expected = gsim.get_poes_many(sctx, rctx, dctx, IMTLS, 3)
+        numpy.testing.assert_allclose(poes, expected, atol=0.02)
+        # one table per site class, stored on disk
+        self.assertEqual(len(tables.tables), 2)
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+
+        # the tables are read back from the cache
+        tables = PoETables(IMTLS, 3, 0.05, self.cachedir)
+        numpy.testing.assert_equal(
+            tables.get_poes(gsim, sctx, rctx, dctx), poes)
+
+        # magnitudes outside the grid are not interpolated
+        rctx.mag = 9.8
+        self.assertIsNone(tables.get_poes(gsim, sctx, rctx, dctx))
+
+    def test_tolerance(self):
+        gsim = BooreEtAl2014NoSOF()
+        tables = PoETables(IMTLS, 3, 1E-6)
+        sctx, rctx, dctx = make_contexts(6.33, [760.], [45.])
+        self.assertIsNone(tables.get_poes(gsim, sctx, rctx, dctx))
+        self.assertEqual(list(tables.tables.values()), [None])
+
+    def test_group_rows(self):
+        # three site classes on two site parameters
+        rows = numpy.array([[760., 1.], [400., 2.], [760., 1.],
+                            [760., 2.], [400., 2.]])
+        idx, inv = group_rows(rows)
+        numpy.testing.assert_equal(idx, [1, 0, 3])
+        numpy.testing.assert_equal(inv, [1, 0, 1, 2, 0])
+        numpy.testing.assert_equal(rows[idx][inv], rows)
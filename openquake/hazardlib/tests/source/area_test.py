@@ -96,6 +96,29 @@ class AreaSourceIterRupturesTestCase(unittest.TestCase):
                 self.assertEqual(r4.mag, 6.5)
         self.assertEqual(len(ruptures), 9 * 4)
 
+    def test_rupture_array(self):
+        # the array of ruptures has the same ruptures of iter_ruptures
+        npd = PMF([(.6, NodalPlane(1, 2, 3)), (.4, NodalPlane(120, 60, 90))])
+        source = self.make_area_source(Polygon([Point(-2, -2), Point(0, -2),
+                                                Point(0, 0), Point(-2, 0)]),
+                                       discretization=66.7,
+                                       nodal_plane_distribution=npd)
+        array = source.get_rupture_array()
+        ruptures = list(source.iter_ruptures())
+        self.assertEqual(len(array), len(ruptures))
+        for rec, rupture in zip(array, ruptures):
+            rup = source.get_rupture(rec)
+            for attr in ('mag', 'rake', 'occurrence_rate'):
+                self.assertAlmostEqual(getattr(rup, attr),
+                                       getattr(rupture, attr))
+            self.assertEqual(rup.hypocenter, rupture.hypocenter)
+            for attr in ('corner_lons', 'corner_lats', 'corner_depths'):
+                numpy.testing.assert_allclose(
+                    getattr(rup.surface, attr),
+                    getattr(rupture.surface, attr), atol=1E-9)
+            self.assertAlmostEqual(rup.surface.get_width(),
+                                   rupture.surface.get_width())
+
     def test_occurrence_rate_rescaling(self):
         mfd = EvenlyDiscretizedMFD(min_mag=4, bin_width=1,
                                    occurrence_rates=[3])
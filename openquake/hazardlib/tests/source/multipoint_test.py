@@ -21,6 +21,7 @@ from openquake.hazardlib.source import split_source
 from openquake.hazardlib.sourcewriter import obj_to_node
 from openquake.hazardlib.mfd.multi_mfd import MultiMFD
 from openquake.hazardlib.source.multi import MultiPointSource
+from openquake.hazardlib.source.point import PointSource
 from openquake.hazardlib.geo.mesh import Mesh
 from openquake.hazardlib.scalerel.peer import PeerMSR
 from openquake.hazardlib.tom import PoissonTOM
@@ -73,3 +74,52 @@ multiPointSource{id='mp1', name='multi point source', tectonicRegion='Active Sha
   hypoDepthDist
     hypoDepth{depth=14, probability=1.0}
 ''')
+
+    def test_rate_matrix(self):
+        mmfd = MultiMFD('truncGutenbergRichterMFD',
+                        size=3,
+                        min_mag=[4.5],
+                        max_mag=[5.0, 5.2, 5.51],
+                        bin_width=[0.1],
+                        a_val=[3.0, 3.5, 4.0],
+                        b_val=[1.0])
+        mags, rates = mmfd.get_rate_matrix()
+        self.assertEqual(mags.shape, (3, 10))
+        for i, mfd in enumerate(mmfd):
+            pairs = mfd.get_annual_occurrence_rates()
+            self.assertEqual(mags[i, :len(pairs)].tolist(),
+                             [mag for mag, _ in pairs])
+            self.assertEqual(rates[i, :len(pairs)].tolist(),
+                             [rate for _, rate in pairs])
+            self.assertTrue(numpy.isnan(mags[i, len(pairs):]).all())
+            self.assertEqual(rates[i, len(pairs):].sum(), 0)
+        self.assertEqual(list(mmfd.get_annual_occurrence_rates()),
+                         [pair for mfd in mmfd
+                          for pair in mfd.get_annual_occurrence_rates()])
+
+        npd = PMF([(0.5, NodalPlane(1, 20, 3)),
+                   (0.5, NodalPlane(2, 2, 4))])
+        hd = PMF([(1, 14)])
+        mesh = Mesh(numpy.array([0, 1, 2]), numpy.array([0.5, 1, 1.5]))
+        mps = MultiPointSource('mp1', 'multi point source',
+                               'Active Shallow Crust',
+                               mmfd, 2.0, PeerMSR(), 1.0,
+                               PoissonTOM(50.), 10, 20, npd, hd, mesh)
+        self.assertEqual(list(mps.count_ruptures_by_point()), [10, 14, 20])
+        self.assertEqual(mps.count_ruptures(), 44)
+        ruptures = list(mps.iter_ruptures())
+        expected = [rup for ps in mps for rup in ps.iter_ruptures()]
+        self.assertEqual(len(ruptures), len(expected))
+        for rup, exp in zip(ruptures, expected):
+            self.assertEqual(rup.mag, exp.mag)
+            self.assertEqual(rup.rake, exp.rake)
+            # the classes determining the rupture code are the same
+            self.assertIs(type(rup), type(exp))
+            self.assertIs(type(rup.surface), type(exp.surface))
+            self.assertIs(rup.source_typology, exp.source_typology)
+            self.assertIs(rup.source_typology, PointSource)
+            self.assertAlmostEqual(rup.occurrence_rate, exp.occurrence_rate)
+            numpy.testing.assert_allclose(
+                rup.surface.corner_lons, exp.surface.corner_lons)
+            numpy.testing.assert_allclose(
+                rup.surface.corner_lats, exp.surface.corner_lats)
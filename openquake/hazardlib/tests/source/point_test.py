@@ -412,6 +412,31 @@ class PointSourceIterRupturesTestCase(unittest.TestCase):
         ruptures = list(src.iter_ruptures())
         self.assertEqual(len(ruptures), 1)
 
+    def test_collapse_ruptures(self):
+        source = make_point_source(
+            lon=0, lat=0, upper_seismogenic_depth=0.,
+            lower_seismogenic_depth=20.,
+            mfd=TruncatedGRMFD(a_val=3, b_val=1, min_mag=5, max_mag=7,
+                               bin_width=1),
+            nodal_plane_distribution=PMF([(.3, NodalPlane(0, 90, 0)),
+                                          (.7, NodalPlane(90, 45, 90))]),
+            hypocenter_distribution=PMF([(.5, 5.), (.5, 15.)]))
+        array = source.get_rupture_array()
+        self.assertEqual(len(array), 8)
+        # a site closer than 5 rupture lengths for the largest magnitude
+        # but not for the smallest one
+        sites = SiteCollection([Site(Point(0, .5), 760, True, 100, 5)])
+        collapsed = source.collapse_ruptures(array, sites.mesh, 5)
+        numpy.testing.assert_equal(collapsed['mag'], [5.5, 6.5, 6.5, 6.5, 6.5])
+        self.assertAlmostEqual(collapsed['occurrence_rate'].sum(),
+                               array['occurrence_rate'].sum())
+        numpy.testing.assert_equal(collapsed[0]['hypo'], [0, 0, 10.])
+        self.assertEqual(collapsed[0]['strike'], 90)
+        rupture = source.get_rupture(collapsed[0])
+        self.assertEqual(rupture.rake, 90)
+        # with a site close enough nothing is collapsed
+        self.assertIs(source.collapse_ruptures(array, sites.mesh, 100), array)
+
 
 class PointSourceMaxRupProjRadiusTestCase(unittest.TestCase):
     def test(self):
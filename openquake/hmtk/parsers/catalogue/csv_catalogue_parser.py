@@ -64,26 +64,30 @@ class CsvCatalogueParser(BaseCatalogueParser):
 
     def read_file(self, start_year=None, end_year=None):
         """
+        Reads the whole file and converts each column to an array at once
         """
         filedata = open(self.input_file, 'rU')
         catalogue = self._setup_catalogue()
         # Reading the data file
         data = csv.DictReader(filedata)
+        columns = {}
         # Parsing the data content
         for irow, row in enumerate(data):
             if irow == 0:
                 valid_key_list = self._header_check(
                     row.keys(),
                     catalogue.TOTAL_ATTRIBUTE_LIST)
+                columns = dict((key, []) for key in valid_key_list)
             for key in valid_key_list:
-                if key in catalogue.FLOAT_ATTRIBUTE_LIST:
-                    catalogue.data[key] = self._float_check(
-                        catalogue.data[key], row[key], irow, key)
-                elif key in catalogue.INT_ATTRIBUTE_LIST:
-                    catalogue.data[key] = self._int_check(
-                        catalogue.data[key], row[key], irow, key)
-                else:
-                    catalogue.data[key].append(row[key])
+                columns[key].append(row[key])
+        filedata.close()
+        for key, values in columns.items():
+            if key in catalogue.FLOAT_ATTRIBUTE_LIST:
+                catalogue.data[key] = self._float_column(values, key)
+            elif key in catalogue.INT_ATTRIBUTE_LIST:
+                catalogue.data[key] = self._int_column(values, key)
+            else:
+                catalogue.data[key] = values
         if start_year:
             catalogue.start_year = start_year
         else:
@@ -111,36 +115,36 @@ class CsvCatalogueParser(BaseCatalogueParser):
                       'a recognised catalogue key' % element)
         return valid_key_list
 
-    def _float_check(self, attribute_array, value, irow, key):
-        '''Checks if value is valid float, appends to array if valid, appends
-        nan if not'''
-        value = value.strip(' ')
+    def _format_error(self, values, key, convert):
+        # find the first invalid value, to raise an error with its line
+        for irow, value in enumerate(values):
+            value = value.strip(' ')
+            try:
+                if value:
+                    convert(value)
+            except ValueError:
+                msg = 'Input file format error at line: %d' % (irow + 2)
+                msg += ' key: %s' % (key)
+                raise ValueError(msg)
+
+    def _float_column(self, values, key):
+        '''Converts the values to an array of floats, with nan for the
+        empty values'''
         try:
-            if value:
-                attribute_array = np.hstack([attribute_array, float(value)])
-            else:
-                attribute_array = np.hstack([attribute_array, np.nan])
-        except:
-            print(irow, key)
-            msg = 'Input file format error at line: %d' % (irow + 2)
-            msg += ' key: %s' % (key)
-            raise ValueError(msg)
-        return attribute_array
+            return np.array([float(value) if value.strip(' ') else np.nan
+                             for value in values], dtype=float)
+        except ValueError:
+            self._format_error(values, key, float)
 
-    def _int_check(self, attribute_array, value, irow, key):
-        '''Checks if value is valid integer, appends to array if valid, appends
-        nan if not'''
-        value = value.strip(' ')
+    def _int_column(self, values, key):
+        '''Converts the values to an array of integers; if there are empty
+        values they become nan and the array is an array of floats'''
         try:
-            if value:
-                attribute_array = np.hstack([attribute_array, int(value)])
-            else:
-                attribute_array = np.hstack([attribute_array, np.nan])
-        except:
-            msg = 'Input file format error at line: %d' % (irow + 2)
-            msg += ' key: %s' % (key)
-            raise ValueError(msg)
-        return attribute_array
+            ints = [int(value) if value.strip(' ') else np.nan
+                    for value in values]
+        except ValueError:
+            self._format_error(values, key, int)
+        return np.array(ints, dtype=int if np.nan not in ints else float)
 
 
 class GCMTCsvCatalogueParser(CsvCatalogueParser):
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#
+# LICENSE
+#
+# Copyright (c) 2010-2017, GEM Foundation, G. Weatherill, M. Pagani,
+# D. Monelli.
+#
+# The Hazard Modeller's Toolkit is free software: you can redistribute
+# it and/or modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either version
+# 3 of the License, or (at your option) any later version.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with OpenQuake. If not, see <http://www.gnu.org/licenses/>
+#
+# DISCLAIMER
+#
+# The software Hazard Modeller's Toolkit (openquake.hmtk) provided herein
+# is released as a prototype implementation on behalf of
+# scientists and engineers working within the GEM Foundation (Global
+# Earthquake Model).
+#
+# It is distributed for the purpose of open collaboration and in the
+# hope that it will be useful to the scientific, engineering, disaster
+# risk and software design communities.
+#
+# The software is NOT distributed as part of GEM’s OpenQuake suite
+# (https://www.globalquakemodel.org/tools-products) and must be considered as a
+# separate entity. The software provided herein is designed and implemented
+# by scientific staff. It is not developed to the design standards, nor
+# subject to same level of critical review by professional software
+# developers, as GEM’s OpenQuake software suite.
+#
+# Feedback and contribution to the software is welcome, and can be
+# directed to the hazard scientific staff of the GEM Model Facility
+# (hazard@globalquakemodel.org).
+#
+# The Hazard Modeller's Toolkit (openquake.hmtk) is therefore distributed WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# The GEM Foundation, and the authors of the software, assume no
+# liability for use of the software.
+
+'''
+Module :mod:`openquake.hmtk.seismicity.bootstrap` implements a driver to
+estimate the Weichert (1980) recurrence parameters and the maximum magnitude
+on many bootstrap resamples of a catalogue and for many completeness tables,
+as needed to build the branches of a logic tree of magnitude frequency
+distributions. The samples are processed in blocks: the counting of the
+events and the Weichert iterations are vectorised over the samples of a
+block and the blocks are distributed with
+:class:`openquake.baselib.parallel.Starmap`.
+'''
+import copy
+import warnings
+import numpy as np
+from openquake.baselib import parallel
+from openquake.hmtk.seismicity.catalogue import Catalogue
+
+F64 = np.float64
+BOOTSTRAP_DT = np.dtype([('bvalue', F64), ('sigma_b', F64),
+                         ('rate', F64), ('sigma_rate', F64),
+                         ('mmax', F64), ('sigma_mmax', F64)])
+
+
+def completeness_counts(mags, dtimes, end_year, completeness, d_m):
+    '''
+    Version of
+    :func:`openquake.hmtk.seismicity.occurrence.utils.get_completeness_counts`
+    working on many samples of a catalogue at once
+
+    :param numpy.ndarray mags:
+        Magnitudes of the samples, array of shape (S, N)
+    :param numpy.ndarray dtimes:
+        Decimal times of the samples, array of shape (S, N)
+    :param float end_year:
+        Last year of the catalogue
+    :param numpy.ndarray completeness:
+        Completeness table [year, magnitude]
+    :param float d_m:
+        Bin size
+    :returns:
+        * cent_mag - array with the B centers of the magnitude bins
+        * t_per - array with the B durations (in years) of completeness
+        * n_obs - number of events in each bin, array of shape (S, B)
+        * nbins - number of bins of each sample, up to the last nonzero count
+    '''
+    nsamples = len(mags)
+    cmin = np.min(completeness[:, 1])
+    cmax = np.maximum(np.max(completeness[:, 1]), mags.max(axis=1))
+    # the bins of each sample are a prefix of the bins of the largest
+    # observed magnitude; see get_completeness_counts for the tiny offset
+    start = cmin - 1.0E-7
+    master_bins = np.arange(start, cmax.max() + d_m, d_m)
+    last = np.array([len(np.arange(start, cm + d_m, d_m)) - 1
+                     for cm in cmax])[:, None]
+    nb = len(master_bins) - 1
+    # as in numpy.histogram the last edge is included in the last bin
+    idx = np.searchsorted(master_bins, mags, 'right') - 1
+    idx[(idx == last) & (mags == master_bins[last])] -= 1
+    offset = np.arange(nsamples)[:, None] * nb
+    n_obs = np.zeros(nsamples * nb)
+    t_per = np.zeros(nb)
+    cyear = np.hstack([end_year + 1, completeness[:, 0]])
+    for i in range(len(cyear) - 1):
+        m_idx = np.where(master_bins >= completeness[i, 1] - d_m / 2.)[0]
+        if not len(m_idx):
+            continue
+        ok = ((dtimes < cyear[i]) & (dtimes >= cyear[i + 1]) &
+              (idx >= m_idx[0]) & (idx < last))
+        n_obs += np.bincount((idx + offset)[ok], minlength=len(n_obs))
+        t_per[m_idx[0]:] += float(cyear[i] - cyear[i + 1])
+    n_obs = n_obs.reshape(nsamples, nb)
+    nonzero = n_obs > 0
+    nbins = np.where(nonzero.any(axis=1),
+                     nb - np.argmax(nonzero[:, ::-1], axis=1), 0)
+    cent_mag = np.around((master_bins[:-1] + master_bins[1:]) / 2., 3)
+    return cent_mag, t_per, n_obs, nbins
+
+
+def weichert_many(tper, fmag, nobs, nbins, mrate=0.0, bval=1.0,
+                  itstab=1E-5, maxiter=1000):
+    '''
+    Version of :meth:`openquake.hmtk.seismicity.occurrence.weichert.
+    Weichert.weichert_algorithm` solving many samples at once; each sample
+    considers only its first `nbins` bins
+
+    :param numpy.ndarray tper:
+        Length of the observation periods of the B bins
+    :param numpy.ndarray fmag:
+        Central magnitudes of the B bins
+    :param numpy.ndarray nobs:
+        Number of events in the bins, array of shape (S, B)
+    :param numpy.ndarray nbins:
+        Number of bins of each sample
+    :returns:
+        b-value, sigma_b, a-value, sigma_a, fn0, stdfn0 as arrays of
+        shape S, with NaNs for the samples which did not converge
+    '''
+    nsamples, nb = nobs.shape
+    mask = np.arange(nb) < nbins[:, None]
+    nobs = np.where(mask, nobs, 0.)
+    d_m = fmag[1] - fmag[0] if nb > 1 else np.nan
+    snm = nobs.dot(fmag)
+    nkount = nobs.sum(axis=1)
+    beta = np.ones(nsamples) * bval * np.log(10.)
+    out = np.ones((6, nsamples)) * np.nan
+    todo = np.where(nbins > 0)[0]
+    for _ in range(maxiter):
+        if not len(todo):
+            break
+        betl = beta[todo]
+        beta_exp = np.where(mask[todo], np.exp(-betl[:, None] * fmag), 0.)
+        tjexp = tper * beta_exp
+        tmexp = tjexp * fmag
+        sumexp = beta_exp.sum(axis=1)
+        stmex = tmexp.sum(axis=1)
+        sumtex = tjexp.sum(axis=1)
+        stm2x = (fmag * tmexp).sum(axis=1)
+        nan = np.isnan(stmex) | np.isnan(sumtex)
+        if nan.any():
+            warnings.warn('NaN occurs in Weichert iteration')
+        nkt = nkount[todo]
+        dldb = stmex / sumtex
+        d2ldb2 = nkt * ((dldb ** 2.0) - (stm2x / sumtex))
+        dldb = (dldb * nkt) - snm[todo]
+        beta[todo] = betl - (dldb / d2ldb2)
+        sigbeta = np.sqrt(-1. / d2ldb2)
+        conv = (np.abs(beta[todo] - betl) <= itstab) & ~nan
+        # store the parameters of the converged samples
+        ids, btc, nkc = todo[conv], beta[todo[conv]], nkt[conv]
+        fngtm0 = nkc * (sumexp[conv] / sumtex[conv])
+        fn0 = fngtm0 * np.exp(btc * (fmag[0] - (d_m / 2.0)))
+        a_m = fngtm0 * np.exp(-btc * (mrate - (fmag[0] - (d_m / 2.0))))
+        out[:, ids] = [btc / np.log(10.), sigbeta[conv] / np.log(10.),
+                       a_m, a_m / np.sqrt(nkc), fn0, fn0 / np.sqrt(nkc)]
+        todo = todo[~(conv | nan)]
+    if len(todo):
+        warnings.warn('Maximum Number of Iterations reached')
+    return tuple(out)
+
+
+def _get_mmax(mmax, mmax_config, data, idx, mags, bvalue):
+    # maximum magnitude and its uncertainty for a sample of the catalogue
+    config = copy.deepcopy(mmax_config)
+    if 'b-value' in config and config['b-value'] is None:
+        if np.isnan(bvalue):
+            return np.nan, np.nan
+        config['b-value'] = bvalue
+    catalogue = Catalogue.make_from_dict({
+        'magnitude': mags, 'year': data['year'][idx],
+        'sigmaMagnitude': data['sigmaMagnitude'][idx]})
+    return mmax.get_mmax(catalogue, config)
+
+
+def bootstrap_task(samples, data, end_year, completeness_tables, config,
+                   mmax=None, mmax_config=None, seed=42, perturb=False):
+    '''
+    Estimates the recurrence parameters and the maximum magnitude for
+    a block of bootstrap samples
+
+    :param samples:
+        Indices of the samples; sample `s` is drawn with a random generator
+        seeded with `seed + s`, independently from the other samples
+    :param dict data:
+        Arrays 'magnitude', 'sigmaMagnitude', 'dtime' and 'year' of the
+        catalogue
+    :returns:
+        The indices of the samples and a composite array of shape (C, S)
+        with dtype BOOTSTRAP_DT, C being the number of completeness tables
+    '''
+    nev = len(data['magnitude'])
+    idx = np.zeros((len(samples), nev), int)
+    mags = np.zeros((len(samples), nev))
+    for i, sample in enumerate(samples):
+        rng = np.random.RandomState(seed + sample)
+        idx[i] = rng.randint(0, nev, nev)
+        mags[i] = data['magnitude'][idx[i]]
+        if perturb:
+            sigma = np.nan_to_num(data['sigmaMagnitude'][idx[i]])
+            mags[i] += sigma * rng.normal(size=nev)
+    dtimes = data['dtime'][idx]
+    res = np.zeros((len(completeness_tables), len(samples)), BOOTSTRAP_DT)
+    for ctab, completeness in enumerate(completeness_tables):
+        cent_mag, t_per, n_obs, nbins = completeness_counts(
+            mags, dtimes, end_year, completeness,
+            config['magnitude_interval'])
+        bval, sigma_b, a_m, siga_m, fn0, stdfn0 = weichert_many(
+            t_per, cent_mag, n_obs, nbins,
+            config['reference_magnitude'] or 0., config['bvalue'],
+            config['itstab'], config['maxiter'])
+        res['bvalue'][ctab] = bval
+        res['sigma_b'][ctab] = sigma_b
+        if config['reference_magnitude']:
+            res['rate'][ctab] = a_m
+            res['sigma_rate'][ctab] = siga_m
+        else:
+            res['rate'][ctab] = np.log10(fn0)
+            res['sigma_rate'][ctab] = np.log10(fn0 + stdfn0) - np.log10(fn0)
+    res['mmax'] = res['sigma_mmax'] = np.nan
+    if mmax is None:
+        return samples, res
+    per_table = mmax_config.get('b-value', 0) is None
+    for i in range(len(samples)):
+        for ctab in range(len(completeness_tables) if per_table else 1):
+            res['mmax'][ctab, i], res['sigma_mmax'][ctab, i] = _get_mmax(
+                mmax, mmax_config, data, idx[i], mags[i],
+                res['bvalue'][ctab, i])
+        if not per_table:
+            res['mmax'][:, i] = res['mmax'][0, i]
+            res['sigma_mmax'][:, i] = res['sigma_mmax'][0, i]
+    return samples, res
+
+
+def _set_samples(acc, samples_res):
+    samples, res = samples_res
+    acc[:, samples] = res
+    return acc
+
+
+def bootstrap_recurrence(catalogue, completeness_tables, config,
+                         num_samples, mmax=None, mmax_config=None, seed=42,
+                         perturb=False, samples_per_task=100):
+    '''
+    Estimates the Weichert recurrence parameters, and optionally the
+    maximum magnitude, for many bootstrap resamples of the catalogue and
+    for many completeness tables
+
+    :param catalogue:
+        Instance of :class:`openquake.hmtk.seismicity.catalogue.Catalogue`
+    :param list completeness_tables:
+        List of C completeness tables [year, magnitude]
+    :param dict config:
+        Configuration of the Weichert method, with the same defaults as
+        :class:`openquake.hmtk.seismicity.occurrence.weichert.Weichert`
+    :param int num_samples:
+        Number S of bootstrap samples (the events are drawn with replacement)
+    :param mmax:
+        Instance of a maximum magnitude estimator, or None
+    :param dict mmax_config:
+        Configuration of the maximum magnitude estimator; if it contains a
+        'b-value' set to None the b-value of each sample is used
+    :param int seed:
+        Seed of the random generator
+    :param bool perturb:
+        If True the magnitudes are also perturbed according to their
+        uncertainties
+    :param int samples_per_task:
+        Number of samples in each task
+    :returns:
+        A composite array of shape (C, S) with fields bvalue, sigma_b,
+        rate, sigma_rate, mmax and sigma_mmax, where rate and sigma_rate
+        are as returned by Weichert.calculate
+    '''
+    config = dict(config or {})
+    config['reference_magnitude'] = config.get('reference_magnitude')
+    config['magnitude_interval'] = config.get('magnitude_interval') or 0.1
+    config['bvalue'] = config.get('bvalue') or 1.0
+    config['itstab'] = config.get('itstab') or 1E-5
+    config['maxiter'] = config.get('maxiter') or 1000
+    if not catalogue.end_year:
+        catalogue.update_end_year()
+    nev = len(catalogue.data['magnitude'])
+    sigma = catalogue.data.get('sigmaMagnitude')
+    if sigma is None or len(sigma) != nev:
+        sigma = np.ones(nev) * np.nan
+    dtime = catalogue.data.get('dtime')
+    if dtime is None or len(dtime) != nev:
+        dtime = catalogue.get_decimal_time()
+    data = {'magnitude': np.asarray(catalogue.data['magnitude'], float),
+            'sigmaMagnitude': np.asarray(sigma, float),
+            'dtime': dtime,
+            'year': np.asarray(catalogue.data['year'])}
+    tables = [np.asarray(table, float) for table in completeness_tables]
+    allargs = [(np.arange(start, min(start + samples_per_task, num_samples)),
+                data, catalogue.end_year, tables, config, mmax, mmax_config,
+                seed, perturb)
+               for start in range(0, num_samples, samples_per_task)]
+    acc = np.zeros((len(tables), num_samples), BOOTSTRAP_DT)
+    return parallel.Starmap(bootstrap_task, allargs).reduce(
+        _set_samples, acc)
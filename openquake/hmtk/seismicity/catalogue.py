@@ -51,6 +51,7 @@
 Prototype of a 'Catalogue' class
 """
 
+from copy import deepcopy
 import numpy as np
 from openquake.hazardlib.pmf import PMF
 from openquake.hazardlib.geo.mesh import Mesh
@@ -119,11 +120,9 @@ class Catalogue(object):
             A list of keys to be uploaded into the array
         :type list:
         """
-        # Preallocate the numpy array
         data = np.empty((len(self.data[keys[0]]), len(keys)))
-        for i in range(0, len(self.data[keys[0]])):
-            for j, key in enumerate(keys):
-                data[i, j] = self.data[key][i]
+        for j, key in enumerate(keys):
+            data[:, j] = self.data[key]
         return data
 
     def load_from_array(self, keys, data_array):
@@ -155,6 +154,91 @@ class Catalogue(object):
         cat.update_end_year()
         return cat
 
+    def to_array(self):
+        """
+        :returns:
+            a structured array with a field for each non-empty column of the
+            catalogue; the strings are stored as fixed-length unicode
+        """
+        columns = [(key, self.data[key]) for key in sorted(self.data)
+                   if len(self.data[key])]
+        dtlist = []
+        for key, column in columns:
+            if isinstance(column, np.ndarray) and column.dtype.kind in 'biuf':
+                dtlist.append((str(key), column.dtype))
+            else:
+                dtlist.append((str(key), np.array(column, dtype='U').dtype))
+        array = np.zeros(len(columns[0][1]) if columns else 0, dtlist)
+        for key, column in columns:
+            array[key] = column
+        return array
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Builds a catalogue from a structured array as returned by
+        :meth:`to_array`. The numeric columns are views on the fields of the
+        array, so the array can be memory-mapped from a .npy file without
+        reading it in memory (see :meth:`load`).
+
+        :param array: a structured array
+        """
+        cat = cls()
+        for key in array.dtype.names:
+            if array.dtype[key].kind in 'biuf':
+                cat.data[key] = array[key]
+            else:  # the string columns are lists
+                cat.data[key] = array[key].tolist()
+        if len(cat.data['year']):
+            cat.update_start_year()
+            cat.update_end_year()
+        return cat
+
+    def save(self, fname):
+        """
+        Saves the catalogue in a .npy file
+
+        :param fname: path of the file
+        """
+        np.save(fname, self.to_array())
+
+    @classmethod
+    def load(cls, fname, mmap_mode='c'):
+        """
+        Loads a catalogue saved with :meth:`save`, by memory-mapping the file
+
+        :param fname: path of the file
+        :param mmap_mode: see numpy.load; by default copy-on-write
+        """
+        return cls.from_array(np.load(fname, mmap_mode=mmap_mode))
+
+    def copy(self, id0=None):
+        """
+        :param id0:
+            Pointer array indicating the events to keep (by default all)
+        :returns:
+            A copy of the catalogue with only the given events; unlike
+            a deepcopy followed by :meth:`select_catalogue_events`, only the
+            selected events are copied
+        """
+        if id0 is None:
+            return deepcopy(self)
+        data = self.data
+        self.data = {}
+        try:
+            new = deepcopy(self)
+        finally:
+            self.data = data
+        new.data = dict((key, val if isinstance(val, (np.ndarray, list)) and
+                         len(val) else deepcopy(val))
+                        for key, val in data.items())
+        new.select_catalogue_events(id0)
+        for key, val in new.data.items():
+            if (isinstance(val, np.ndarray) and
+                    np.may_share_memory(val, data[key])):
+                new.data[key] = val.copy()
+        return new
+
     def update_end_year(self):
         """
         NOTE: To be called only when the catalogue is loaded (not when
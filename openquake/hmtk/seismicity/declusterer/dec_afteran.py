@@ -49,7 +49,8 @@ import numpy as np
 
 from openquake.hmtk.seismicity.declusterer.base import (
     BaseCatalogueDecluster, DECLUSTERER_METHODS)
-from openquake.hmtk.seismicity.utils import decimal_year, haversine
+from openquake.hmtk.seismicity.utils import (
+    decimal_year, haversine, SpaceTimeIndex)
 from openquake.hmtk.seismicity.declusterer.distance_time_windows import (
     TIME_DISTANCE_WINDOW_FUNCTIONS)
 
@@ -102,33 +103,41 @@ class Afteran(BaseCatalogueDecluster):
         # Rank magnitudes into descending order
         id0 = np.flipud(np.argsort(mag, kind='heapsort'))
 
+        # Index the events in space, to consider for each mainshock only
+        # the events close to it instead of the whole catalogue
+        index = SpaceTimeIndex(catalogue.data['longitude'],
+                               catalogue.data['latitude'], year_dec)
         clust_index = 0
         for imarker in id0:
             # Earthquake not allocated to cluster - perform calculation
             if vcl[imarker] == 0:
                 # Perform distance calculation
+                cands = index.query(catalogue.data['longitude'][imarker],
+                                    catalogue.data['latitude'][imarker],
+                                    sw_space[imarker])
                 mdist = haversine(
-                    catalogue.data['longitude'],
-                    catalogue.data['latitude'],
+                    catalogue.data['longitude'][cands],
+                    catalogue.data['latitude'][cands],
                     catalogue.data['longitude'][imarker],
                     catalogue.data['latitude'][imarker]).flatten()
+                cands = cands[mdist <= sw_space[imarker]]
 
                 # Select earthquakes inside distance window, later than
                 # mainshock and not already assigned to a cluster
-                vsel1 = np.where(
-                    np.logical_and(vcl == 0,
-                                   np.logical_and(
-                                       mdist <= sw_space[imarker],
-                                       year_dec > year_dec[imarker])))[0]
+                vsel1 = cands[np.logical_and(
+                    vcl[cands] == 0, year_dec[cands] > year_dec[imarker])]
                 has_aftershocks = False
                 if len(vsel1) > 0:
-                    # Earthquakes after event inside distance window
+                    # Earthquakes after event inside distance window,
+                    # considering only the subset of the candidates
+                    sub = np.append(vsel1, imarker)
                     temp_vsel1, has_aftershocks = self._find_aftershocks(
-                        vsel1,
-                        year_dec,
+                        np.arange(len(vsel1)),
+                        year_dec[sub],
                         time_window,
-                        imarker,
-                        neq)
+                        len(vsel1),
+                        len(sub))
+                    temp_vsel1 = sub[temp_vsel1]
                     if has_aftershocks:
                         flagvector[temp_vsel1] = 1
                         vcl[temp_vsel1] = clust_index + 1
@@ -136,19 +145,18 @@ class Afteran(BaseCatalogueDecluster):
                 # Select earthquakes inside distance window, earlier than
                 # mainshock and not already assigned to a cluster
                 has_foreshocks = False
-                vsel2 = np.where(
-                    np.logical_and(
-                        vcl == 0,
-                        np.logical_and(mdist <= sw_space[imarker],
-                                       year_dec < year_dec[imarker])))[0]
+                vsel2 = cands[np.logical_and(
+                    vcl[cands] == 0, year_dec[cands] < year_dec[imarker])]
                 if len(vsel2) > 0:
                     # Earthquakes before event inside distance window
+                    sub = np.append(vsel2, imarker)
                     temp_vsel2, has_foreshocks = self._find_foreshocks(
-                        vsel2,
-                        year_dec,
+                        np.arange(len(vsel2)),
+                        year_dec[sub],
                         time_window,
-                        imarker,
-                        neq)
+                        len(vsel2),
+                        len(sub))
+                    temp_vsel2 = sub[temp_vsel2]
                     if has_foreshocks:
                         flagvector[temp_vsel2] = -1
                         vcl[temp_vsel2] = clust_index + 1
@@ -56,7 +56,8 @@ import numpy as np
 
 from openquake.hmtk.seismicity.declusterer.base import (
     BaseCatalogueDecluster, DECLUSTERER_METHODS)
-from openquake.hmtk.seismicity.utils import decimal_year, haversine
+from openquake.hmtk.seismicity.utils import (
+    decimal_year, haversine, SpaceTimeIndex)
 from openquake.hmtk.seismicity.declusterer.distance_time_windows import (
     TIME_DISTANCE_WINDOW_FUNCTIONS)
 
@@ -117,34 +118,40 @@ class GardnerKnopoffType1(BaseCatalogueDecluster):
         year_dec = year_dec[id0]
         eqid = eqid[id0]
         flagvector = np.zeros(neq, dtype=int)
+        # Index the events in space and time, to consider for each event
+        # only the ones close to it instead of the whole catalogue
+        index = SpaceTimeIndex(longitude, latitude, year_dec)
         # Begin cluster identification
         clust_index = 0
         for i in range(0, neq - 1):
             if vcl[i] == 0:
                 # Find Events inside both fore- and aftershock time windows
-                dt = year_dec - year_dec[i]
+                cands = index.query(
+                    longitude[i], latitude[i], sw_space[i],
+                    year_dec[i] - sw_time[i] * config['fs_time_prop'],
+                    year_dec[i] + sw_time[i])
+                dt = year_dec[cands] - year_dec[i]
                 vsel = np.logical_and(
-                    vcl == 0,
+                    vcl[cands] == 0,
                     np.logical_and(
                         dt >= (-sw_time[i] * config['fs_time_prop']),
                         dt <= sw_time[i]))
+                cands, dt = cands[vsel], dt[vsel]
                 # Of those events inside time window,
                 # find those inside distance window
-                vsel1 = haversine(longitude[vsel],
-                                  latitude[vsel],
+                vsel1 = haversine(longitude[cands],
+                                  latitude[cands],
                                   longitude[i],
-                                  latitude[i]) <= sw_space[i]
-                vsel[vsel] = vsel1[:, 0]
-                temp_vsel = np.copy(vsel)
-                temp_vsel[i] = False
-                if any(temp_vsel):
+                                  latitude[i])[:, 0] <= sw_space[i]
+                cands, dt = cands[vsel1], dt[vsel1]
+                others = cands != i
+                if any(others):
                     # Allocate a cluster number
-                    vcl[vsel] = clust_index + 1
-                    flagvector[vsel] = 1
+                    vcl[cands] = clust_index + 1
+                    flagvector[cands] = 1
                     # For those events in the cluster before the main event,
                     # flagvector is equal to -1
-                    temp_vsel[dt >= 0.0] = False
-                    flagvector[temp_vsel] = -1
+                    flagvector[cands[others & (dt < 0.0)]] = -1
                     flagvector[i] = 0
                     clust_index += 1
 
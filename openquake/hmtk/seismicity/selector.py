@@ -55,13 +55,18 @@ and earthquake catalogue
 '''
 
 import numpy as np
+from scipy import sparse
 from collections import OrderedDict
 from datetime import datetime
 from copy import deepcopy
+from openquake.hazardlib.geo.geodetic import geodetic_distance, EARTH_RADIUS
 from openquake.hazardlib.geo.point import Point
+from openquake.hazardlib.geo.polygon import Polygon
 from openquake.hazardlib.geo.mesh import Mesh
+from openquake.hazardlib.geo.utils import get_spherical_bounding_box
+from openquake.hazardlib.geo.utils import get_middle_point
 from openquake.hmtk.seismicity.catalogue import Catalogue
-from openquake.hmtk.seismicity.utils import decimal_time
+from openquake.hmtk.seismicity.utils import decimal_time, SpaceTimeIndex
 
 
 def _check_depth_limits(input_dict):
@@ -110,6 +115,37 @@ def _get_decimal_from_datetime(time):
                         np.array([temp_seconds], dtype=int))
 
 
+def _bounding_circle(zone):
+    '''
+    Returns a circle containing the zone, i.e. all the points for which
+    the zone could select an event at zero distance
+
+    :param zone:
+        Instance of :class:`openquake.hazardlib.geo.polygon.Polygon`,
+        of :class:`openquake.hazardlib.geo.point.Point` or a surface
+        having a mesh
+    :returns:
+        longitude and latitude of the centre, radius (km)
+    '''
+    if isinstance(zone, Point):
+        return zone.longitude, zone.latitude, 0.
+    if isinstance(zone, Polygon):
+        # a point is inside the polygon if its orthographic projection is
+        # inside the projected polygon, which is contained in the disc
+        # around the centre of the projection through its farthest vertex
+        zone._init_polygon2d()
+        proj = zone._projection
+        xx, yy = np.array(zone._polygon2d.exterior.coords).T
+        dist = np.sqrt(xx ** 2 + yy ** 2).max() / EARTH_RADIUS
+        return (np.degrees(proj.lambda0), np.degrees(proj.phi0),
+                EARTH_RADIUS * np.arcsin(min(dist, 1.)))
+    mesh = zone.mesh
+    lons, lats = mesh.lons.flatten(), mesh.lats.flatten()
+    west, east, north, south = get_spherical_bounding_box(lons, lats)
+    lon, lat = get_middle_point(west, north, east, south)
+    return lon, lat, geodetic_distance(lon, lat, lons, lats).max()
+
+
 class CatalogueSelector(object):
     '''
     Class to implement methods for selecting subsets of the catalogue
@@ -158,10 +194,11 @@ class CatalogueSelector(object):
                 output = self.catalogue
         else:
             if self.copycat:
-                output = deepcopy(self.catalogue)
+                # copy only the selected events
+                output = self.catalogue.copy(np.where(valid_id)[0])
             else:
                 output = self.catalogue
-            output.purge_catalogue(valid_id)
+                output.purge_catalogue(valid_id)
         return output
 
     def within_polygon(self, polygon, distance=None, **kwargs):
@@ -423,12 +460,13 @@ class CatalogueSelector(object):
             if the catalogue of each cluster
         """
         num_clust = np.max(vcl)
+        # indices of the events of each cluster, in a single pass
+        order = np.argsort(vcl, kind='mergesort')
+        bounds = np.searchsorted(vcl[order], np.arange(num_clust + 2))
         cluster_set = []
         for clid in range(0, num_clust + 1):
-            idx = np.where(vcl == clid)[0]
-            cluster_cat = deepcopy(self.catalogue)
-            cluster_cat.select_catalogue_events(idx)
-            cluster_set.append((clid, cluster_cat))
+            idx = order[bounds[clid]:bounds[clid + 1]]
+            cluster_set.append((clid, self.catalogue.copy(idx)))
         return OrderedDict(cluster_set)
 
     def within_bounding_box(self, limits):
@@ -450,3 +488,93 @@ class CatalogueSelector(object):
                            np.logical_and(self.catalogue.data['latitude'] >= limits[1],
                                           self.catalogue.data['latitude'] <= limits[3])))
         return self.select_catalogue(is_valid)
+
+    def zone_membership(self, zones, distance=None, cellsize=1., **kwargs):
+        '''
+        Assigns the events of the catalogue to many zones in a single pass.
+        The events are indexed on a longitude-latitude grid, so that
+        each zone tests only the events falling near it; the tests are the
+        same as in :meth:`within_polygon` (for polygons),
+        :meth:`circular_distance_from_point` (for points) and
+        :meth:`within_joyner_boore_distance` or
+        :meth:`within_rupture_distance` (for fault surfaces).
+
+        :param list zones:
+            Instances of :class:`openquake.hazardlib.geo.polygon.Polygon`,
+            of :class:`openquake.hazardlib.geo.point.Point` or fault
+            surfaces, also mixed
+        :param float distance:
+            Buffer distance (km) around the polygons, maximum distance
+            (km) from the points and surfaces
+        :param float cellsize:
+            Size (degrees) of the cells of the index of the events
+        :param kwargs:
+            'upper_depth' and 'lower_depth' for polygons and surfaces,
+            'distance_type' which is 'epicentral' (default) or 'hypocentral'
+            for points and 'joyner-boore' (default) or 'rupture' for surfaces
+        :returns:
+            Sparse boolean matrix of shape (number of events, number of
+            zones), as instance of :class:`scipy.sparse.csc_matrix`, which
+            is True for the events selected by each zone
+        '''
+        data = self.catalogue.data
+        lons, lats, depths = data['longitude'], data['latitude'], data['depth']
+        num_events = len(lons)
+        upper_depth, lower_depth = _check_depth_limits(kwargs)
+        distance_type = kwargs.get('distance_type')
+        index = SpaceTimeIndex(lons, lats, np.zeros(num_events), cellsize)
+        rows, cols = [], []
+        for col, zone in enumerate(zones):
+            if isinstance(zone, Polygon) and distance:
+                zone = zone.dilate(distance)
+            lon, lat, radius = _bounding_circle(zone)
+            if not isinstance(zone, Polygon):
+                radius += distance or 0.
+            # the index uses a slightly different radius of the earth
+            idx = index.query(lon, lat, radius * 1.001 + 1.)
+            if len(idx) == 0:
+                continue
+            if isinstance(zone, Point):
+                if distance_type in (None, 'epicentral'):
+                    mesh = Mesh(lons[idx], lats[idx], np.zeros(len(idx)))
+                    zone = Point(zone.longitude, zone.latitude, 0.0)
+                else:
+                    mesh = Mesh(lons[idx], lats[idx], depths[idx])
+                idx = idx[zone.closer_than(mesh, distance)]
+            else:
+                idx = idx[np.logical_and(depths[idx] >= upper_depth,
+                                         depths[idx] < lower_depth)]
+                mesh = Mesh(lons[idx], lats[idx], depths[idx])
+                if isinstance(zone, Polygon):
+                    is_valid = zone.intersects(mesh)
+                elif distance_type == 'rupture':
+                    is_valid = zone.get_min_distance(mesh) <= distance
+                else:
+                    is_valid = zone.get_joyner_boore_distance(
+                        mesh) <= distance
+                idx = idx[is_valid]
+            rows.append(idx)
+            cols.append(np.repeat(col, len(idx)))
+        rows = np.concatenate(rows) if rows else np.zeros(0, int)
+        cols = np.concatenate(cols) if cols else np.zeros(0, int)
+        return sparse.csc_matrix(
+            (np.ones(len(rows), bool), (rows, cols)),
+            shape=(num_events, len(zones)))
+
+    def within_zone(self, membership, zone_id):
+        '''
+        Select the earthquakes of a zone given the membership table
+
+        :param membership:
+            Sparse matrix of the events in each zone, as returned by
+            :meth:`zone_membership`
+        :param int zone_id:
+            Index of the zone in the list passed to :meth:`zone_membership`
+        :returns:
+            Instance of :class:`openquake.hmtk.seismicity.catalogue.Catalogue`
+            containing only selected events
+        '''
+        start, stop = membership.indptr[zone_id:zone_id + 2]
+        valid_id = np.zeros(membership.shape[0], bool)
+        valid_id[membership.indices[start:stop]] = True
+        return self.select_catalogue(valid_id)
@@ -52,16 +52,93 @@ States. Seismological Research Letters. 66(4) 8 - 21
 '''
 
 import numpy as np
-from openquake.hmtk.seismicity.utils import haversine
+from openquake.baselib import parallel
+from openquake.hmtk.seismicity.utils import haversine, SpaceTimeIndex
 from openquake.hmtk.seismicity.smoothing.kernels.base import (
     BaseSmoothingKernel)
 
+# maximum number of (source, target) pairs considered at once
+MAX_PAIRS = 2 ** 22
+
+
+def _split_in_tiles(data, sources, cellsize, max_dist):
+    """
+    Split the points in square tiles and find the sources close to each tile
+
+    :param data: array [Longitude, Latitude, ...] of the points
+    :param sources: array [Longitude, Latitude, ...] of the sources
+    :param cellsize: size of the tiles in degrees
+    :param max_dist: maximum distance in km of the sources
+    :yields:
+        pairs (indices of the points of a tile, indices of a superset of
+        the sources within max_dist from the points of the tile)
+    """
+    index = SpaceTimeIndex(data[:, 0], data[:, 1], np.zeros(len(data)),
+                           cellsize)
+    if sources is data:
+        src_index = index
+    else:
+        src_index = SpaceTimeIndex(sources[:, 0], sources[:, 1],
+                                   np.zeros(len(sources)), cellsize)
+    _, starts = np.unique(index.cells, return_index=True)
+    for tile in np.split(index.order, starts[1:]):
+        lons, lats = data[tile, 0] % 360., data[tile, 1]
+        lon, lat = lons.mean(), lats.mean()
+        # the sources within max_dist from a point of the tile are
+        # within max_dist + radius from the center of the tile
+        radius = haversine(lons, lats, lon, lat).max()
+        yield tile, src_index.query(lon, lat, max_dist + radius)
+
+
+def _smooth_tile(idx, targets, sources, config, is_3d):
+    """
+    Applies the kernel to a block of points, using as sources only the
+    points close enough to the block to have a nonzero weight
+
+    :param idx: indices of the target points in the full data
+    :param targets: array [Longitude, Latitude, Depth] of the target points
+    :param sources: array [Longitude, Latitude, Depth, Count] of the sources
+    :param dict config: BandWidth and Length_Limit of the kernel
+    :param bool is_3d: if True use hypocentral distances
+    :returns: the indices and the smoothed values of the target points
+    """
+    max_dist = config['Length_Limit'] * config['BandWidth']
+    smoothed_value = np.zeros(len(targets))
+    # the sub-tiles are small compared to the kernel, to compute only
+    # a few distances more than needed
+    cellsize = np.degrees(max_dist / 6371.227) / 2.
+    for tile, cands in _split_in_tiles(targets, sources, cellsize, max_dist):
+        src = sources[cands]
+        block = max(MAX_PAIRS // len(src), 1)
+        for start in range(0, len(tile), block):
+            tgt = targets[tile[start:start + block]]
+            dist_val = haversine(src[:, 0], src[:, 1], tgt[:, 0], tgt[:, 1])
+            if is_3d:
+                dist_val = np.sqrt(dist_val ** 2.0 +
+                                   (src[:, 2:3] - tgt[:, 2]) ** 2.0)
+            w_val = np.exp(-(dist_val ** 2.0) / (config['BandWidth'] ** 2.))
+            w_val[dist_val > max_dist] = 0.
+            smoothed_value[tile[start:start + block]] = (
+                src[:, 3].dot(w_val) / w_val.sum(axis=0))
+    return idx, smoothed_value
+
+
+def _set_values(acc, idx_values):
+    idx, values = idx_values
+    acc[idx] = values
+    return acc
+
 
 class IsotropicGaussian(BaseSmoothingKernel):
     '''
     Applies a simple isotropic Gaussian smoothing using an Isotropic Gaussian
     Kernel - taken from Frankel (1995) approach
+
+    The points are split in square blocks of `block_size` degrees (at least
+    four times the kernel radius) which are smoothed in parallel, each one
+    considering only the points within Length_Limit bandwidths.
     '''
+    block_size = 2.
 
     def smooth_data(self, data, config, is_3d=False):
         '''
@@ -80,17 +157,14 @@ class IsotropicGaussian(BaseSmoothingKernel):
             * Total (summed) rate of the original values
             * Total (summed) rate of the smoothed values
         '''
+        if not len(data):
+            return np.zeros(0), 0., 0.
         max_dist = config['Length_Limit'] * config['BandWidth']
-        smoothed_value = np.zeros(len(data), dtype=float)
-        for iloc in range(0, len(data)):
-            dist_val = haversine(data[:, 0], data[:, 1],
-                                 data[iloc, 0], data[iloc, 1])
-
-            if is_3d:
-                dist_val = np.sqrt(dist_val.flatten() ** 2.0 +
-                                   (data[:, 2] - data[iloc, 2]) ** 2.0)
-            id0 = np.where(dist_val <= max_dist)[0]
-            w_val = (np.exp(-(dist_val[id0] ** 2.0) /
-                            (config['BandWidth'] ** 2.))).flatten()
-            smoothed_value[iloc] = np.sum(w_val * data[id0, 3]) / np.sum(w_val)
+        cellsize = max(self.block_size,
+                       4. * np.degrees(max_dist / 6371.227))
+        allargs = [(block, data[block, :3], data[cands], config, is_3d)
+                   for block, cands in _split_in_tiles(
+                       data, data, cellsize, max_dist)]
+        smoothed_value = parallel.Starmap(_smooth_tile, allargs).reduce(
+            _set_values, np.zeros(len(data), dtype=float))
         return smoothed_value, np.sum(data[:, -1]), np.sum(smoothed_value)
@@ -50,7 +50,7 @@ a general class for implementing seismicity smoothing algorithms
 import csv
 import collections
 
-from math import fabs, log
+from math import log
 import numpy as np
 from openquake.hazardlib.geo.point import Point
 from openquake.hazardlib.geo.polygon import Polygon
@@ -165,6 +165,32 @@ def _get_adjustment(mag, year, mmin, completeness_year, t_f, mag_inc=0.1):
         return False
 
 
+def _get_adjustments(mag, year, mmin, completeness_year, t_f, mag_inc=0.1):
+    '''
+    Vectorised version of :func:`_get_adjustment`
+
+    :param np.ndarray mag:
+        Magnitudes of the earthquakes
+
+    :param np.ndarray year:
+        Years of the earthquakes
+
+    :returns:
+        Array of Weichert adjustment factors (0.0 for the events in the
+        incomplete part of the catalogue)
+    '''
+    mag = np.asarray(mag, dtype=float)
+    year = np.asarray(year, dtype=float)
+    if len(completeness_year) == 1:
+        return ((mag >= mmin) & (year >= completeness_year[0])).astype(float)
+
+    kval = np.trunc((mag - mmin) / mag_inc).astype(int) + 1
+    # magnitudes above the table take the completeness of its last row
+    cyear = np.asarray(completeness_year)[
+        np.clip(kval - 1, 0, len(completeness_year) - 1)]
+    return np.where((kval >= 1) & (year >= cyear), t_f, 0.)
+
+
 def get_catalogue_bounding_polygon(catalogue):
     '''
     Returns a polygon containing the bounding box of the catalogue
@@ -356,35 +382,23 @@ class SmoothedSeismicity(object):
             self.grid_limits['yspc'])
         ncolx = int(xlim)
         ncoly = int(ylim)
-        grid_count = np.zeros(ncolx * ncoly, dtype=float)
-        for iloc in range(0, len(longitude)):
-            dlon = (longitude[iloc] - self.grid_limits['xmin']) /\
-                self.grid_limits['xspc']
-            if (dlon < 0.) or (dlon > xlim):
-                # Earthquake outside longitude limits
-                continue
-            xcol = int(dlon)
-            if xcol == ncolx:
-                # If longitude is directly on upper grid line then retain
-                xcol = ncolx - 1
-            dlat = fabs(self.grid_limits['ymax'] - latitude[iloc]) /\
-                self.grid_limits['yspc']
-            if (dlat < 0.) or (dlat > ylim):
-                # Earthquake outside latitude limits
-                continue
-            ycol = int(dlat)  # Correct for floating precision
-            if ycol == ncoly:
-                # If latitude is directly on upper grid line then retain
-                ycol = ncoly - 1
-            kmarker = (ycol * int(xlim)) + xcol
-            adjust = _get_adjustment(magnitude[iloc],
-                                     year[iloc],
-                                     completeness_table[0, 1],
-                                     completeness_table[:, 0],
-                                     t_f,
-                                     mag_inc)
-            if adjust:
-                grid_count[kmarker] = grid_count[kmarker] + adjust
+        dlon = (np.asarray(longitude) - self.grid_limits['xmin']) /\
+            self.grid_limits['xspc']
+        dlat = np.fabs(self.grid_limits['ymax'] - np.asarray(latitude)) /\
+            self.grid_limits['yspc']
+        # discard the earthquakes outside the limits
+        ok = (dlon >= 0.) & (dlon <= xlim) & (dlat <= ylim)
+        # if an earthquake is directly on an upper grid line then retain
+        xcol = np.minimum(dlon[ok].astype(int), ncolx - 1)
+        ycol = np.minimum(dlat[ok].astype(int), ncoly - 1)
+        adjust = _get_adjustments(np.asarray(magnitude)[ok],
+                                  np.asarray(year)[ok],
+                                  completeness_table[0, 1],
+                                  completeness_table[:, 0],
+                                  t_f,
+                                  mag_inc)
+        grid_count = np.bincount(ycol * ncolx + xcol, adjust,
+                                 minlength=ncolx * ncoly)
         return grid_count
 
     def create_3D_grid(self, catalogue, completeness_table, t_f=1.0,
@@ -379,12 +379,16 @@ def hmtk_histogram_1D(values, intervals, offset=1.0E-10):
         Count in each bin (as float)
     """
     nbins = len(intervals) - 1
-    counter = np.zeros(nbins, dtype=float)
-    x_ints = intervals - offset
-    for i in range(nbins):
-        idx = np.logical_and(values >= x_ints[i], values < x_ints[i + 1])
-        counter[i] += float(np.sum(idx))
-    return counter
+    idx = _bin_indices(values, intervals - offset)
+    return np.bincount(idx[idx >= 0], minlength=nbins).astype(float)
+
+
+def _bin_indices(values, bins):
+    # index of the bin containing each value (L <= V < U) or -1 if the value
+    # is outside the bins, for monotonically increasing bins
+    idx = np.searchsorted(bins, values, 'right') - 1
+    idx[idx >= len(bins) - 1] = -1
+    return idx
 
 
 def hmtk_histogram_2D(xvalues, yvalues, bins, x_offset=1.0E-10,
@@ -408,14 +412,11 @@ def hmtk_histogram_2D(xvalues, yvalues, bins, x_offset=1.0E-10,
     xbins, ybins = (bins[0] - x_offset, bins[1] - y_offset)
     n_x = len(xbins) - 1
     n_y = len(ybins) - 1
-    counter = np.zeros([n_y, n_x], dtype=float)
-    for j in range(n_y):
-        y_idx = np.logical_and(yvalues >= ybins[j], yvalues < ybins[j + 1])
-        x_vals = xvalues[y_idx]
-        for i in range(n_x):
-            idx = np.logical_and(x_vals >= xbins[i], x_vals < xbins[i + 1])
-            counter[j, i] += float(np.sum(idx))
-    return counter.T
+    x_idx = _bin_indices(xvalues, xbins)
+    y_idx = _bin_indices(yvalues, ybins)
+    ok = (x_idx >= 0) & (y_idx >= 0)
+    counter = np.bincount(x_idx[ok] * n_y + y_idx[ok], minlength=n_x * n_y)
+    return counter.reshape(n_x, n_y).astype(float)
 
 
 def bootstrap_histogram_1D(
@@ -622,3 +623,85 @@ def area_of_polygon(polygon):
     # Build shapely polygons
     poly = geometry.Polygon(zip(x, y))
     return poly.area
+
+
+class SpaceTimeIndex(object):
+    """
+    Index of the events of a catalogue, to find quickly the events close
+    in space and time to a given point without computing the distances to
+    all of them. The events are sorted by cell of a regular
+    longitude-latitude grid and, inside each cell, by time, so that a query
+    reduces to a couple of binary searches per cell.
+
+    The index returns a superset of the events inside the distance and time
+    windows: the callers are expected to check the exact conditions on the
+    candidates.
+
+    :param lons: longitudes of the events
+    :param lats: latitudes of the events
+    :param times: times of the events (i.e. decimal years)
+    :param cellsize: size of the grid cells in degrees
+    :param earth_rad: radius of the earth in km, as in :func:`haversine`
+    """
+    def __init__(self, lons, lats, times, cellsize=1., earth_rad=6371.227):
+        self.cellsize = cellsize
+        self.earth_rad = earth_rad
+        self.ncols = int(np.ceil(360. / cellsize))
+        self.nrows = int(np.ceil(180. / cellsize)) + 1
+        times = np.asarray(times, float)
+        self.t0 = times.min() if len(times) else 0.
+        self.span = times.max() - self.t0 if len(times) else 0.
+        # the keys of different cells are separated by more than the span
+        self.period = self.span + 2.
+        # margin on the times, larger than the rounding errors on the keys
+        self.margin = 1E-9 * abs(self.t0) + 1E-12 * self.period * (
+            self.nrows * self.ncols)
+        cells = self._rows(lats) * self.ncols + self._cols(lons)
+        keys = cells * self.period + (times - self.t0)
+        self.order = np.argsort(keys, kind='mergesort')
+        self.keys = keys[self.order]
+        self.cells = cells[self.order]  # grid cell of the sorted events
+
+    def _cols(self, lons):
+        cols = (np.asarray(lons) % 360. // self.cellsize).astype(int)
+        return cols % self.ncols
+
+    def _rows(self, lats):
+        lats = np.clip(lats, -90., 90.)
+        return ((lats + 90.) // self.cellsize).astype(int)
+
+    def query(self, lon, lat, distance, tmin=-np.inf, tmax=np.inf):
+        """
+        :param lon: longitude of the point
+        :param lat: latitude of the point
+        :param distance: maximum distance from the point in km
+        :param tmin: minimum time
+        :param tmax: maximum time
+        :returns: the sorted indices of the candidate events
+        """
+        # angular radius with a margin for the rounding errors
+        delta = np.degrees(distance / self.earth_rad) * (1. + 1E-6) + 1E-6
+        min_lat, max_lat = lat - delta, lat + delta
+        rows = np.arange(self._rows(min_lat), self._rows(max_lat) + 1)
+        sin_delta = np.sin(np.radians(delta))
+        cos_lat = np.cos(np.radians(lat))
+        if min_lat <= -90. or max_lat >= 90. or sin_delta >= cos_lat:
+            # the circle contains a pole, consider all the longitudes
+            cols = np.arange(self.ncols)
+        else:
+            dlon = np.degrees(np.arcsin(sin_delta / cos_lat))
+            first = int(self._cols(lon - dlon))
+            ncols = min(int(2. * dlon // self.cellsize) + 2, self.ncols)
+            cols = (first + np.arange(ncols)) % self.ncols
+        cells = (rows[:, None] * self.ncols + cols).ravel()
+        # clip the times to stay inside the band of keys of each cell
+        lo = min(max(tmin - self.t0 - self.margin, -.5), self.span + .5)
+        hi = max(min(tmax - self.t0 + self.margin, self.span + .5), -.5)
+        starts = self.keys.searchsorted(cells * self.period + lo, 'left')
+        stops = self.keys.searchsorted(cells * self.period + hi, 'right')
+        lens = stops - starts
+        total = lens.sum()
+        if total == 0:
+            return np.zeros(0, int)
+        idx = np.arange(total) + np.repeat(starts - lens.cumsum() + lens, lens)
+        return np.sort(self.order[idx])
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#
+# LICENSE
+#
+# Copyright (c) 2010-2017, GEM Foundation, G. Weatherill, M. Pagani,
+# D. Monelli.
+#
+# The Hazard Modeller's Toolkit is free software: you can redistribute
+# it and/or modify it under the terms of the GNU Affero General Public
+# License as published by the Free Software Foundation, either version
+# 3 of the License, or (at your option) any later version.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with OpenQuake. If not, see <http://www.gnu.org/licenses/>
+#
+# DISCLAIMER
+#
+# The software Hazard Modeller's Toolkit (openquake.hmtk) provided herein
+# is released as a prototype implementation on behalf of
+# scientists and engineers working within the GEM Foundation (Global
+# Earthquake Model).
+#
+# It is distributed for the purpose of open collaboration and in the
+# hope that it will be useful to the scientific, engineering, disaster
+# risk and software design communities.
+#
+# The software is NOT distributed as part of GEM’s OpenQuake suite
+# (https://www.globalquakemodel.org/tools-products) and must be considered as a
+# separate entity. The software provided herein is designed and implemented
+# by scientific staff. It is not developed to the design standards, nor
+# subject to same level of critical review by professional software
+# developers, as GEM’s OpenQuake software suite.
+#
+# Feedback and contribution to the software is welcome, and can be
+# directed to the hazard scientific staff of the GEM Model Facility
+# (hazard@globalquakemodel.org).
+#
+# The Hazard Modeller's Toolkit (openquake.hmtk) is therefore distributed WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# The GEM Foundation, and the authors of the software, assume no
+# liability for use of the software.
+
+import os
+import unittest
+import numpy as np
+from openquake.hmtk.seismicity.catalogue import Catalogue
+from openquake.hmtk.seismicity.occurrence.weichert import Weichert
+from openquake.hmtk.seismicity import bootstrap
+
+DATA = os.path.join(os.path.dirname(__file__), 'occurrence', 'data',
+                    'completeness_test_cat.csv')
+
+
+class BootstrapRecurrenceTestCase(unittest.TestCase):
+    """
+    Tests the batch driver against the Weichert method applied to each
+    bootstrap sample separately
+    """
+
+    def setUp(self):
+        test_data = np.genfromtxt(DATA, delimiter=',', skip_header=1)
+        keys = ['year', 'month', 'day', 'hour', 'minute', 'second']
+        self.data = dict((key, test_data[:, 3 + i].astype(int))
+                         for i, key in enumerate(keys[:-1]))
+        self.data['second'] = test_data[:, 8]
+        self.data['magnitude'] = test_data[:, 17]
+        self.data['sigmaMagnitude'] = test_data[:, 18]
+        self.catalogue = Catalogue.make_from_dict(self.data)
+        self.tables = [np.array([[1990., 4.0], [1960., 5.0], [1930., 6.0]]),
+                       np.array([[1980., 4.0]])]
+
+    def test_against_weichert(self):
+        config = {'reference_magnitude': 4.0, 'magnitude_interval': 0.1}
+        res = bootstrap.bootstrap_recurrence(
+            self.catalogue, self.tables, config, 5, seed=7,
+            samples_per_task=2)
+        self.assertEqual(res.shape, (2, 5))
+        dtime = self.catalogue.get_decimal_time()
+        for sample in range(5):
+            rng = np.random.RandomState(7 + sample)
+            idx = rng.randint(0, len(dtime), len(dtime))
+            cat = Catalogue.make_from_dict(
+                dict((key, val[idx]) for key, val in self.data.items()))
+            cat.end_year = self.catalogue.end_year
+            cat.data['dtime'] = dtime[idx]
+            for ctab, table in enumerate(self.tables):
+                expected = Weichert().calculate(cat, dict(config), table)
+                computed = [res[field][ctab, sample] for field in
+                            ['bvalue', 'sigma_b', 'rate', 'sigma_rate']]
+                np.testing.assert_allclose(computed, expected, rtol=1E-9)
+        self.assertTrue(np.isnan(res['mmax']).all())
+
+    def test_independent_of_blocks(self):
+        res1 = bootstrap.bootstrap_recurrence(
+            self.catalogue, self.tables, {}, 6, perturb=True)
+        res2 = bootstrap.bootstrap_recurrence(
+            self.catalogue, self.tables, {}, 6, perturb=True,
+            samples_per_task=4)
+        np.testing.assert_allclose(res1['bvalue'], res2['bvalue'])
+        # the samples are different
+        self.assertEqual(len(np.unique(res1['bvalue'][0])), 6)
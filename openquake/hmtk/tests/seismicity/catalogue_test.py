@@ -51,6 +51,8 @@
 Tests for the catalogue module
 """
 
+import os
+import tempfile
 import unittest
 import numpy as np
 from openquake.hazardlib.pmf import PMF
@@ -98,6 +100,37 @@ class CatalogueTestCase(unittest.TestCase):
         data = cat.load_to_array(['year', 'magnitude'])
         np.testing.assert_allclose(data, self.data_array)
 
+    def test_save_load(self):
+        # Tests the storage of the catalogue as a memory-mapped .npy file
+        cat = Catalogue()
+        cat.load_from_array(['year', 'magnitude'], self.data_array)
+        cat.data['eventID'] = ['a%d' % i for i in range(7)]
+        fname = os.path.join(tempfile.mkdtemp(), 'cat.npy')
+        cat.save(fname)
+        cat2 = Catalogue.load(fname)
+        self.assertIsInstance(cat2.data['magnitude'], np.memmap)
+        self.assertEqual(cat2.data['eventID'], cat.data['eventID'])
+        np.testing.assert_allclose(cat2.data['magnitude'],
+                                   cat.data['magnitude'])
+        self.assertEqual(cat2.end_year, 1970)
+        self.assertEqual(len(cat2.data['depth']), 0)
+
+    def test_copy(self):
+        # Tests that a copy of a subset of the catalogue is independent,
+        # as well as an in-place selection of a range of events
+        cat = Catalogue()
+        cat.load_from_array(['year', 'magnitude'], self.data_array)
+        cat.data['eventID'] = list(range(7))
+        cat2 = cat.copy(np.arange(2, 5))
+        self.assertEqual(cat2.data['eventID'], [2, 3, 4])
+        self.assertFalse(np.may_share_memory(cat2.data['magnitude'],
+                                             cat.data['magnitude']))
+        mags = cat.data['magnitude']
+        cat.select_catalogue_events(np.arange(2, 5))
+        self.assertFalse(np.may_share_memory(cat.data['magnitude'], mags))
+        np.testing.assert_allclose(cat.data['magnitude'],
+                                   cat2.data['magnitude'])
+
     def test_catalogue_mt_filter(self):
         # Tests the catalogue magnitude-time filter
         cat = Catalogue()
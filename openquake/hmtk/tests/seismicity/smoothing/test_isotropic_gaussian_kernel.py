@@ -52,6 +52,7 @@ import os
 import unittest
 import numpy as np
 
+from openquake.hmtk.seismicity.utils import haversine
 from openquake.hmtk.seismicity.smoothing.kernels.isotropic_gaussian import \
     IsotropicGaussian
 
@@ -126,3 +127,29 @@ class TestIsotropicGaussian(unittest.TestCase):
         # Assert that sum of the smoothing is equal to the sum of the
         # data values to 2 dp
         self.assertAlmostEqual(sum_data, sum_smooth, 2)
+
+    def test_kernel_tiles(self):
+        # the smoothing by tiles must be the same as the smoothing
+        # considering all the points, also across the date line
+        [gx, gy] = np.meshgrid(np.arange(175., 185., 0.2),
+                               np.arange(-3., 3., 0.2))
+        ngp = gx.size
+        data = np.column_stack([(gx.flatten() + 180.) % 360. - 180.,
+                                gy.flatten(),
+                                10. + 10. * (np.arange(ngp) % 2),
+                                (np.arange(ngp) % 7 == 0).astype(float)])
+        config = {'Length_Limit': 3.0, 'BandWidth': 30.0}
+        self.model.block_size = 1.
+        for is_3d in (False, True):
+            smoothed_array = self.model.smooth_data(data, config, is_3d)[0]
+            expected_array = np.zeros(ngp)
+            for iloc in range(ngp):
+                dist = haversine(data[:, 0], data[:, 1],
+                                 data[iloc, 0], data[iloc, 1]).flatten()
+                if is_3d:
+                    dist = np.sqrt(dist ** 2 +
+                                   (data[:, 2] - data[iloc, 2]) ** 2)
+                w_val = np.exp(-dist ** 2 / 900.) * (dist <= 90.)
+                expected_array[iloc] = (np.sum(w_val * data[:, 3]) /
+                                        np.sum(w_val))
+            np.testing.assert_allclose(smoothed_array, expected_array)
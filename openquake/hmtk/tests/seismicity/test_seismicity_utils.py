@@ -444,3 +444,35 @@ class Testlonlat2laea(unittest.TestCase):
         calc_x, calc_y = utils.lonlat_to_laea(5.0, 50.0, 9.0, 53.0)
         self.assertAlmostEqual(calc_x, expected_x / 1000.0)
         self.assertAlmostEqual(calc_y, expected_y / 1000.0)
+
+
+class TestSpaceTimeIndex(unittest.TestCase):
+    """
+    Tests the spatio-temporal index of the events of a catalogue
+    """
+
+    def test_superset(self):
+        """
+        Checks that the candidates contain all the events inside the
+        distance and time windows, including points close to the date line
+        and to the poles
+        """
+        rng = np.random.RandomState(42)
+        lons = rng.uniform(-180., 180., 5000)
+        lats = np.degrees(np.arcsin(rng.uniform(-1., 1., 5000)))
+        times = rng.uniform(1900., 2000., 5000)
+        index = utils.SpaceTimeIndex(lons, lats, times, cellsize=2.)
+        for lon, lat in [(0., 0.), (179.9, 10.), (-179.9, -45.),
+                         (30., 89.5), (-120., -88.)]:
+            for dist in [10., 300., 2000.]:
+                cands = index.query(lon, lat, dist, 1950., 1960.)
+                self.assertTrue(np.all(np.diff(cands) > 0))
+                dists = utils.haversine(lons, lats, lon, lat)[:, 0]
+                ok = (dists <= dist) & (times >= 1950.) & (times <= 1960.)
+                self.assertTrue(set(np.where(ok)[0]) <= set(cands))
+        # without time bounds
+        cands = index.query(10., 20., 500.)
+        dists = utils.haversine(lons, lats, 10., 20.)[:, 0]
+        np.testing.assert_array_equal(
+            np.intersect1d(cands, np.where(dists <= 500.)[0]),
+            np.where(dists <= 500.)[0])
@@ -276,6 +276,42 @@ class TestSelector(unittest.TestCase):
         np.testing.assert_array_almost_equal(
             test_cat_100.data['depth'], np.array([1.0, 1.0, 1.0, 1.0]))
 
+    def test_zone_membership(self):
+        # Tests the batched selection against the selection zone by zone
+        rng = np.random.RandomState(42)
+        self.catalogue.data['longitude'] = rng.uniform(3., 8., 2000)
+        self.catalogue.data['latitude'] = rng.uniform(3., 8., 2000)
+        self.catalogue.data['depth'] = rng.uniform(0., 30., 2000)
+        self.catalogue.data['eventID'] = np.arange(2000)
+        selector0 = CatalogueSelector(self.catalogue)
+        polygons = [Polygon([Point(lon, lat), Point(lon + 1., lat),
+                             Point(lon + .5, lat - 1.)])
+                    for lon, lat in rng.uniform(4., 7., (10, 2))]
+        points = [Point(lon, lat) for lon, lat in
+                  rng.uniform(4., 7., (5, 2))]
+        trace = Line([Point(5.5, 6.0), Point(5.5, 5.0)])
+        faults = [SimpleFaultSurface.from_fault_data(trace, 0., 20., dip, 1.)
+                  for dip in (30., 90.)]
+        for zones, method, kwargs in [
+                (polygons, 'within_polygon', dict(lower_depth=20.)),
+                (polygons, 'within_polygon', dict(distance=20.)),
+                (points, 'circular_distance_from_point',
+                 dict(distance=50., distance_type='epicentral')),
+                (points, 'circular_distance_from_point',
+                 dict(distance=50., distance_type='hypocentral')),
+                (faults, 'within_joyner_boore_distance', dict(distance=30.)),
+                (faults, 'within_rupture_distance',
+                 dict(distance=30., distance_type='rupture'))]:
+            membership = selector0.zone_membership(zones, cellsize=.5,
+                                                   **kwargs)
+            self.assertEqual(membership.shape, (2000, len(zones)))
+            for i, zone in enumerate(zones):
+                expected = getattr(selector0, method)(zone, **kwargs)
+                selected = selector0.within_zone(membership, i)
+                self.assertGreater(expected.get_number_events(), 0)
+                np.testing.assert_array_equal(
+                    selected.data['longitude'], expected.data['longitude'])
+
     def test_select_within_time(self):
         # Tests the function to select within a time period
 
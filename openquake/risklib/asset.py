@@ -327,6 +327,18 @@ class TagCollection(object):
                     {tag: idx for idx, tag in enumerate(dic[tagname])})
             setattr(self, tagname, dic[tagname].value)
 
+    def get_tagidx(self):
+        """
+        :returns:
+            an array of shape (T, 2) with the index of the tagname and the
+            index of the tagvalue of each tag, in the order of iteration
+        """
+        tags = []
+        for i, tagname in enumerate(self.tagnames):
+            for idx, tagvalue in enumerate(getattr(self, tagname)):
+                tags.append(('%s=%s' % (tagname, tagvalue), i, idx))
+        return numpy.array([tag[1:] for tag in sorted(tags)], U32)
+
     def __iter__(self):
         tags = []
         for tagname in self.tagnames:
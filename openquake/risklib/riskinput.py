@@ -239,6 +239,19 @@ class CompositeRiskModel(collections.Mapping):
         if hasattr(hazard_getter, 'gmdata'):  # for event based risk
             riskinput.gmdata = hazard_getter.gmdata
 
+    def _get_curves(self, riskmodel, hazard, imti, imt_lt, triples):
+        # compute the loss ratio curves of all the sites and realizations
+        # of the block at once, with a single call per loss type
+        keys = [(sid, rlzi) for sid, _assets, _eps in triples
+                for rlzi in sorted(hazard[sid])]
+        curves = {}
+        for lti, (lt, imt) in enumerate(zip(self.loss_types, imt_lt)):
+            hcurves = [hazard[sid][rlzi][imti[imt]] for sid, rlzi in keys]
+            lrcurves = riskmodel.get_loss_ratio_curves(lt, hcurves)
+            for (sid, rlzi), lrcurve in zip(keys, lrcurves):
+                curves[sid, rlzi, lti] = lrcurve
+        return curves
+
     def _gen_outputs(self, hazard_getter, dic, gsim):
         with self.monitor('building hazard'):
             hazard = hazard_getter.get_hazard(gsim)
@@ -248,17 +261,27 @@ class CompositeRiskModel(collections.Mapping):
                 riskmodel = self[taxonomy]
                 imt_lt = [riskmodel.risk_functions[lt].imt
                           for lt in self.loss_types]  # imt for each loss type
+                if hasattr(riskmodel, 'get_loss_ratio_curves'):  # classical
+                    curves = self._get_curves(
+                        riskmodel, hazard, imti, imt_lt, dic[taxonomy])
                 for sid, assets, epsgetter in dic[taxonomy]:
                     for rlzi, haz in sorted(hazard[sid].items()):
+                        lrcurves = False
                         if isinstance(haz, numpy.ndarray):  # gmf-based calc
                             data = [(haz['gmv'][:, imti[imt]], haz['eid'])
                                     for imt in imt_lt]
                         elif not haz:  # no hazard for this site
                             data = [(numpy.zeros(hazard_getter.E),
                                      hazard_getter.eids) for imt in imt_lt]
-                        else:  # classical
+                        elif hasattr(riskmodel, 'get_loss_ratio_curves'):
+                            # classical, curves computed in _get_curves
+                            data = [curves[sid, rlzi, lti]
+                                    for lti in range(len(imt_lt))]
+                            lrcurves = True
+                        else:  # classical damage
                             data = [haz[imti[imt]] for imt in imt_lt]
-                        out = riskmodel.get_output(assets, data, epsgetter)
+                        out = riskmodel.get_output(
+                            assets, data, epsgetter, curves=lrcurves)
                         out.sid = sid
                         out.rlzi = rlzi
                         try:
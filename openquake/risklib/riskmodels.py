@@ -18,7 +18,6 @@
 
 from __future__ import division
 import inspect
-import functools
 import numpy
 
 from openquake.baselib.general import CallableDict
@@ -69,15 +68,22 @@ class RiskModel(object):
         return [lt for lt in self.loss_types
                 if self.risk_functions[lt].imt == imt]
 
-    def get_output(self, assets, data_by_lt, epsgetter):
+    def get_output(self, assets, data_by_lt, epsgetter, curves=False):
         """
         :param assets: a list of assets with the same taxonomy
         :param data_by_lt: hazards for each loss type
         :param epsgetter: an epsilon getter function
+        :param curves:
+            if True, data_by_lt contains the loss ratio curves computed by
+            the .get_loss_ratio_curves method of the classical riskmodels
         :returns: an ArrayWrapper of shape (L, ...)
         """
-        out = [self(lt, assets, data, epsgetter)
-               for lt, data in zip(self.loss_types, data_by_lt)]
+        if curves:
+            out = [self.from_curves(lt, assets, data)
+                   for lt, data in zip(self.loss_types, data_by_lt)]
+        else:
+            out = [self(lt, assets, data, epsgetter)
+                   for lt, data in zip(self.loss_types, data_by_lt)]
         return ArrayWrapper(numpy.array(out), dict(assets=assets))
 
     def __toh5__(self):
@@ -149,6 +155,21 @@ class Classical(RiskModel):
             lt: vf.mean_loss_ratios_with_steps(self.lrem_steps_per_interval)
             for lt, vf in self.risk_functions.items()}
 
+    def get_loss_ratio_curves(self, loss_type, hazard_curves):
+        """
+        :param str loss_type:
+            the loss type considered
+        :param hazard_curves:
+            an array of shape (N, L) with the hazard curves of N
+            (site, realization) pairs
+        :returns:
+            an array of shape (N, 2, C) with the loss ratio curves
+        """
+        vf = self.risk_functions[loss_type]
+        return scientific.classical_curves(
+            vf, self.hazard_imtls[vf.imt], hazard_curves,
+            self.lrem_steps_per_interval)
+
     def __call__(self, loss_type, assets, hazard_curve, _eps=None):
         """
         :param str loss_type:
@@ -163,13 +184,26 @@ class Classical(RiskModel):
         :returns:
             an array of shape (C, N, 2)
         """
+        # the assets are co-located, so the curve is computed only once
+        [curve] = self.get_loss_ratio_curves(loss_type, [hazard_curve])
+        return self.from_curves(loss_type, assets, curve)
+
+    def from_curves(self, loss_type, assets, curve):
+        """
+        :param str loss_type:
+            the loss type considered
+        :param assets:
+            assets is an iterator over N
+            :class:`openquake.risklib.scientific.Asset` instances
+        :param curve:
+            a loss ratio curve of shape (2, C) computed by
+            :meth:`get_loss_ratio_curves`
+        :returns:
+            an array of shape (C, N, 2)
+        """
         n = len(assets)
-        vf = self.risk_functions[loss_type]
-        imls = self.hazard_imtls[vf.imt]
         values = get_values(loss_type, assets)
-        lrcurves = numpy.array(
-            [scientific.classical(
-                vf, imls, hazard_curve, self.lrem_steps_per_interval)] * n)
+        lrcurves = numpy.array([curve] * n)
 
         # if in the future we wanted to implement insured_losses the
         # following lines could be useful
@@ -258,6 +292,23 @@ class ClassicalBCR(RiskModel):
         self.hazard_imtls = hazard_imtls
         self.lrem_steps_per_interval = lrem_steps_per_interval
 
+    def get_loss_ratio_curves(self, loss_type, hazard_curves):
+        """
+        :param loss_type: the loss type
+        :param hazard_curves: an array of shape (N, L) with N hazard curves
+        :returns:
+            an array of shape (N, 2, 2, C) with the original and the
+            retrofitted loss ratio curves
+        """
+        vf = self.risk_functions[loss_type]
+        vf_retro = self.retro_functions[loss_type]
+        imls = self.hazard_imtls[vf.imt]
+        orig = scientific.classical_curves(
+            vf, imls, hazard_curves, self.lrem_steps_per_interval)
+        retro = scientific.classical_curves(
+            vf_retro, imls, hazard_curves, self.lrem_steps_per_interval)
+        return numpy.array([orig, retro]).transpose(1, 0, 2, 3)
+
     def __call__(self, loss_type, assets, hazard, _eps=None, _eids=None):
         """
         :param loss_type: the loss type
@@ -267,23 +318,26 @@ class ClassicalBCR(RiskModel):
         :param _eids: dummy parameter, unused
         :returns: a list of triples (eal_orig, eal_retro, bcr_result)
         """
+        # the assets are co-located, so the curves are computed only once
+        [curves] = self.get_loss_ratio_curves(loss_type, [hazard])
+        return self.from_curves(loss_type, assets, curves)
+
+    def from_curves(self, loss_type, assets, curves):
+        """
+        :param loss_type: the loss type
+        :param assets: a list of N assets of the same taxonomy
+        :param curves:
+            the original and retrofitted loss ratio curves, an array of
+            shape (2, 2, C) computed by :meth:`get_loss_ratio_curves`
+        :returns: a list of triples (eal_orig, eal_retro, bcr_result)
+        """
         n = len(assets)
         self.assets = assets
-        vf = self.risk_functions[loss_type]
-        imls = self.hazard_imtls[vf.imt]
-        vf_retro = self.retro_functions[loss_type]
-        curves_orig = functools.partial(scientific.classical, vf, imls,
-                                        steps=self.lrem_steps_per_interval)
-        curves_retro = functools.partial(scientific.classical, vf_retro, imls,
-                                         steps=self.lrem_steps_per_interval)
-        original_loss_curves = utils.numpy_map(curves_orig, [hazard] * n)
-        retrofitted_loss_curves = utils.numpy_map(curves_retro, [hazard] * n)
-
-        eal_original = utils.numpy_map(
-            scientific.average_loss, original_loss_curves)
-
-        eal_retrofitted = utils.numpy_map(
-            scientific.average_loss, retrofitted_loss_curves)
+        curve_orig, curve_retro = curves
+        eal_original = numpy.array(
+            [scientific.average_loss(curve_orig)] * n)
+        eal_retrofitted = numpy.array(
+            [scientific.average_loss(curve_retro)] * n)
 
         bcr_results = [
             scientific.bcr(
@@ -923,11 +923,9 @@ def classical_damage(
     """
     spi = fragility_functions.steps_per_interval
     if spi and spi > 1:  # interpolate
-        imls = numpy.array(fragility_functions.interp_imls)
-        min_val, max_val = hazard_imls[0], hazard_imls[-1]
-        numpy.putmask(imls, imls < min_val, min_val)
-        numpy.putmask(imls, imls > max_val, max_val)
-        poes = interpolate.interp1d(hazard_imls, hazard_poes)(imls)
+        imls = numpy.clip(fragility_functions.interp_imls,
+                          hazard_imls[0], hazard_imls[-1])
+        [poes] = interp_curves(hazard_imls, [hazard_poes], imls)
     else:
         imls = (hazard_imls if fragility_functions.format == 'continuous'
                 else fragility_functions.imls)
@@ -966,24 +964,61 @@ def classical(vulnerability_function, hazard_imls, hazard_poes, steps=10):
     """
     assert len(hazard_imls) == len(hazard_poes), (
         len(hazard_imls), len(hazard_poes))
-    vf = vulnerability_function
-    imls = vf.mean_imls()
-    loss_ratios, lrem = vf.loss_ratio_exceedance_matrix(steps)
+    [curve] = classical_curves(
+        vulnerability_function, hazard_imls, [hazard_poes], steps)
+    return curve
 
-    # saturate imls to hazard imls
-    min_val, max_val = hazard_imls[0], hazard_imls[-1]
-    numpy.putmask(imls, imls < min_val, min_val)
-    numpy.putmask(imls, imls > max_val, max_val)
 
-    # interpolate the hazard curve
-    poes = interpolate.interp1d(hazard_imls, hazard_poes)(imls)
+def interp_curves(hazard_imls, hazard_poes, imls):
+    """
+    Linearly interpolate N hazard curves at once, saturating the
+    intensity levels to the range of the hazard levels.
 
-    # compute the poos
-    pos = pairwise_diff(poes)
-    lrem_po = numpy.empty(lrem.shape)
-    for idx, po in enumerate(pos):
-        lrem_po[:, idx] = lrem[:, idx] * po  # column * po
-    return numpy.array([loss_ratios, lrem_po.sum(axis=1)])
+    :param hazard_imls: L increasing intensity measure levels
+    :param hazard_poes: an array of shape (N, L)
+    :param imls: M intensity measure levels where to interpolate
+    :returns: an array of shape (N, M)
+    """
+    x = numpy.array(hazard_imls, float)
+    imls = numpy.clip(imls, x[0], x[-1])
+    # index of the right point of the interval containing each iml
+    right = numpy.clip(numpy.searchsorted(x, imls, 'right'), 1, len(x) - 1)
+    left = right - 1
+    weight = (imls - x[left]) / (x[right] - x[left])
+    poes = numpy.array(hazard_poes, float)
+    return poes[:, left] * (1. - weight) + poes[:, right] * weight
+
+
+def classical_curves(vulnerability_function, hazard_imls, hazard_poes,
+                     steps=10):
+    """
+    Compute the loss ratio curves for N hazard curves at once, with a
+    single matrix product. Co-located assets with the same taxonomy
+    share the same curve, so the calculators compute the curves of all
+    the sites and realizations of a block with one call per taxonomy
+    and loss type.
+
+    :param vulnerability_function:
+        an instance of
+        :py:class:`openquake.risklib.scientific.VulnerabilityFunction`
+        representing the vulnerability function used to compute the curves.
+    :param hazard_imls:
+        the hazard intensity measure levels
+    :param hazard_poes:
+        an array of shape (N, L) with N hazard curves
+    :param int steps:
+        Number of steps between loss ratios.
+    :returns:
+        an array of shape (N, 2, C) with loss ratios and poes
+    """
+    vf = vulnerability_function
+    loss_ratios, lrem = vf.loss_ratio_exceedance_matrix(steps)
+    poes = interp_curves(hazard_imls, hazard_poes, vf.mean_imls())
+    pos = poes[:, :-1] - poes[:, 1:]  # shape (N, I)
+    curves = numpy.empty((len(poes), 2, len(loss_ratios)))
+    curves[:, 0] = loss_ratios
+    curves[:, 1] = pos.dot(lrem.T)  # shape (N, C)
+    return curves
 
 
 def conditional_loss_ratio(loss_ratios, poes, probability):
@@ -20,7 +20,8 @@ import unittest
 import numpy
 from scipy.interpolate import interp1d
 
-from openquake.risklib import scientific
+from openquake.risklib import scientific, riskmodels
+from openquake.risklib.asset import Asset
 
 
 class ClassicalTestCase(unittest.TestCase):
@@ -192,3 +193,53 @@ class ClassicalTestCase(unittest.TestCase):
         for loss, poe in expected_curve:
             numpy.testing.assert_allclose(
                 poe, actual_poes_interp(loss), atol=0.005)
+
+    def test_classical_curves(self):
+        hazard_imls = [0.01, 0.08, 0.17, 0.26, 0.36, 0.55, 0.7]
+        hazard_curves = numpy.array([
+            [0.99, 0.96, 0.89, 0.82, 0.7, 0.4, 0.01],
+            [0.98, 0.90, 0.80, 0.60, 0.4, 0.2, 0.05],
+            [0.50, 0.40, 0.30, 0.20, 0.1, 0.0, 0.00]])
+        vf = scientific.VulnerabilityFunction(
+            'VF', 'PGA', [0.1, 0.2, 0.4, 0.6], [0.05, 0.08, 0.2, 0.4],
+            [0.5, 0.3, 0.2, 0.1], "LN")
+        curves = scientific.classical_curves(vf, hazard_imls, hazard_curves, 2)
+        self.assertEqual(curves.shape, (3, 2, 11))
+
+        # compare with the interpolation with scipy, one curve at the time
+        imls = numpy.clip(vf.mean_imls(), hazard_imls[0], hazard_imls[-1])
+        loss_ratios, lrem = vf.loss_ratio_exceedance_matrix(2)
+        for curve, hazard_curve in zip(curves, hazard_curves):
+            poes = interp1d(hazard_imls, hazard_curve)(imls)
+            numpy.testing.assert_allclose(curve[0], loss_ratios)
+            numpy.testing.assert_allclose(
+                curve[1], (lrem * -numpy.diff(poes)).sum(axis=1))
+
+    def test_riskmodels_batch(self):
+        # the loss ratio curves computed in a batch for many sites give
+        # the same results as the curves computed site by site
+        hazard_imtls = {'PGA': [0.01, 0.08, 0.17, 0.26, 0.36, 0.55, 0.7]}
+        hazard_curves = numpy.array([
+            [0.99, 0.96, 0.89, 0.82, 0.7, 0.4, 0.01],
+            [0.98, 0.90, 0.80, 0.60, 0.4, 0.2, 0.05]])
+        vf = scientific.VulnerabilityFunction(
+            'VF', 'PGA', [0.1, 0.2, 0.4, 0.6], [0.05, 0.08, 0.2, 0.4],
+            [0.5, 0.3, 0.2, 0.1], "LN")
+        vf_retro = scientific.VulnerabilityFunction(
+            'VF', 'PGA', [0.1, 0.2, 0.4, 0.6], [0.01, 0.04, 0.1, 0.3],
+            [0.5, 0.3, 0.2, 0.1], "LN")
+        assets = [Asset('a%d' % i, [1], 1, (0, 0),
+                        {'structural': 10. * (i + 1)},
+                        retrofitteds={'structural': 5.})
+                  for i in range(2)]
+        classical = riskmodels.Classical(
+            'tax', {'structural': vf}, hazard_imtls, 2, [], [])
+        bcr = riskmodels.ClassicalBCR(
+            'tax', {'structural': vf}, {'structural': vf_retro},
+            hazard_imtls, 2, 0.05, 40)
+        for rm in (classical, bcr):
+            curves = rm.get_loss_ratio_curves('structural', hazard_curves)
+            for curve, hazard_curve in zip(curves, hazard_curves):
+                numpy.testing.assert_allclose(
+                    rm.from_curves('structural', assets, curve),
+                    rm('structural', assets, hazard_curve))
@@ -164,6 +164,11 @@ LOGGING = {
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = 1
 
+# directory and maximum size (in bytes) of the cache of the .npz files
+# returned by the /extract API; the least recently used files are removed
+EXTRACT_CACHE_DIR = os.path.join(datastore.get_datadir(), 'extract_cache')
+EXTRACT_CACHE_SIZE = 1024 ** 3
+
 # OpenQuake Standalone tools (IPT, Taxtweb, Taxonomy Glossary)
 if STANDALONE:
     INSTALLED_APPS += (
@@ -33,7 +33,8 @@ import zlib
 import tempfile
 import string
 import random
-from django.test import Client
+import shutil
+from django.test import Client, override_settings
 from openquake.baselib.general import writetmp
 from openquake.engine.export import core
 from openquake.server.db import actions
@@ -205,6 +206,34 @@ class EngineServerTestCase(unittest.TestCase):
         url = '/v1/calc/%s/extract/hazard/rlzs' % job_id
         resp = self.c.get(url)
         self.assertEqual(resp.status_code, 200)
+        data = b''.join(resp.streaming_content)
+
+        # the result is cached and can be validated or read in ranges
+        etag = resp['ETag']
+        resp = self.c.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        resp = self.c.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(b''.join(resp.streaming_content), data[:10])
+        resp = self.c.get(url + '?compressed=0')
+        self.assertNotEqual(resp['ETag'], etag)
+
+        # a cache smaller than a single result still serves the data
+        cachedir = tempfile.mkdtemp()
+        with override_settings(EXTRACT_CACHE_DIR=cachedir,
+                               EXTRACT_CACHE_SIZE=1):
+            for _ in range(2):
+                resp = self.c.get(url)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(b''.join(resp.streaming_content), data)
+            self.assertEqual(len(os.listdir(cachedir)), 1)
+        shutil.rmtree(cachedir)
+
+        # invalid site windows are rejected
+        url = '/v1/calc/%s/extract/hcurves/mean' % job_id
+        for query in ('sids=-1', 'sids=100000', 'stride=0', 'bbox=1,2,3'):
+            resp = self.c.get(url + '?' + query)
+            self.assertEqual(resp.status_code, 400)
 
     def test_abort(self):
         resp = self.c.post('/v1/calc/0/abort')  # 0 is a non-existing job
@@ -27,6 +27,7 @@ import subprocess
 import threading
 import signal
 import zlib
+import hashlib
 try:
     import urllib.parse as urlparse
 except ImportError:
@@ -37,7 +38,8 @@ import psutil
 
 from xml.parsers.expat import ExpatError
 from django.http import (
-    HttpResponse, HttpResponseNotFound, HttpResponseBadRequest)
+    HttpResponse, HttpResponseNotFound, HttpResponseBadRequest,
+    HttpResponseNotModified)
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.shortcuts import render
@@ -658,12 +660,99 @@ def _array(v):
     return v
 
 
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _evict(cachedir, maxsize, keep):
+    # remove the least recently used files until the cache fits in maxsize;
+    # the file `keep`, which is being served, is never removed
+    items = []
+    for fname in os.listdir(cachedir):
+        path = os.path.join(cachedir, fname)
+        if fname.endswith('.npz') and path != keep:
+            try:
+                st = os.stat(path)
+            except OSError:  # already removed by another process
+                continue
+            items.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in items)
+    for _, size, path in sorted(items):
+        if total <= maxsize:
+            break
+        try:
+            os.remove(path)
+        except OSError:  # already removed by another process
+            pass
+        total -= size
+
+
+def _save_npz(ds, what, fname, compressed):
+    # extract the data and save them atomically on the given .npz file;
+    # returns the file opened for reading, so that the data can be served
+    # even if the file is evicted from the cache in the meantime
+    obj = _extract(ds, what)
+    if inspect.isgenerator(obj):
+        array, attrs = 0, {k: _array(v) for k, v in obj}
+    elif hasattr(obj, '__toh5__'):
+        array, attrs = obj.__toh5__()
+    else:  # assume obj is an array
+        array, attrs = obj, {}
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fname), suffix='.tmp')
+    os.close(fd)
+    savez = numpy.savez_compressed if compressed else numpy.savez
+    try:
+        with open(tmp, 'wb') as f:
+            savez(f, array=array, **attrs)
+        reader = open(tmp, 'rb')
+        os.rename(tmp, fname)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return reader
+
+
+def _open_npz(cachedir, fname, save):
+    # open the cached file, or call save() to build it if it is missing;
+    # then evict the least recently used files, except the open one
+    try:
+        f = open(fname, 'rb')
+    except (IOError, OSError):  # missing or evicted by another request
+        f = save()
+    else:
+        try:
+            os.utime(fname, None)  # mark the file as recently used
+        except OSError:  # evicted after being opened, it can still be read
+            pass
+    _evict(cachedir, settings.EXTRACT_CACHE_SIZE, fname)
+    return f
+
+
+def _read(f, start, stop, blocksize=1024 * 1024):
+    # yield the bytes of the open file in the range [start, stop)
+    try:
+        f.seek(start)
+        while start < stop:
+            data = f.read(min(blocksize, stop - start))
+            if not data:
+                break
+            start += len(data)
+            yield data
+    finally:
+        f.close()
+
+
 @cross_domain_ajax
 @require_http_methods(['GET', 'HEAD'])
 def extract(request, calc_id, what):
     """
     Wrapper over the `oq extract` command. If setting.LOCKDOWN is true
     only calculations owned by the current user can be retrieved.
+
+    The .npz files are cached on the server, keyed by the calculation,
+    the query and the modification time of the datastore; the responses
+    have an ETag and support If-None-Match and single range requests.
+    Passing `compressed=0` in the query string returns an uncompressed
+    .npz file, which is bigger but faster to produce and to read.
     """
     user = utils.get_user_data(request)
     username = user['name'] if user['acl_on'] else None
@@ -671,28 +760,66 @@ def extract(request, calc_id, what):
     if job is None:
         return HttpResponseNotFound()
 
-    # read the data and save them on a temporary .pik file
-    with datastore.read(job.ds_calc_dir + '.hdf5') as ds:
-        fd, fname = tempfile.mkstemp(
-            prefix=what.replace('/', '-'), suffix='.npz')
-        os.close(fd)
-        n = len(request.path_info)
-        query_string = request.get_full_path()[n:]
-        obj = _extract(ds, what + query_string)
-        if inspect.isgenerator(obj):
-            array, attrs = 0, {k: _array(v) for k, v in obj}
-        elif hasattr(obj, '__toh5__'):
-            array, attrs = obj.__toh5__()
-        else:  # assume obj is an array
-            array, attrs = obj, {}
-        numpy.savez_compressed(fname, array=array, **attrs)
-
-    # stream the data back
-    stream = FileWrapper(open(fname, 'rb'))
-    stream.close = lambda: (FileWrapper.close(stream), os.remove(fname))
-    response = FileResponse(stream, content_type='application/octet-stream')
+    n = len(request.path_info)
+    params = request.get_full_path()[n:].lstrip('?').split('&')
+    compressed = True
+    for param in params:
+        if param.startswith('compressed='):
+            compressed = param[11:].lower() not in ('0', 'false', 'no')
+    query_string = '&'.join(p for p in params
+                            if p and not p.startswith('compressed='))
+    query_string = '?' + query_string if query_string else ''
+    hdf5path = job.ds_calc_dir + '.hdf5'
+    key = repr((int(calc_id), what, query_string,
+                os.path.getmtime(hdf5path), compressed))
+    etag = '"%s"' % hashlib.sha1(key.encode('utf8')).hexdigest()
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    # read the data and save them on a cached .npz file
+    cachedir = settings.EXTRACT_CACHE_DIR
+    if not os.path.exists(cachedir):
+        os.makedirs(cachedir)
+    fname = os.path.join(cachedir, etag[1:-1] + '.npz')
+
+    def save():
+        with datastore.read(hdf5path) as ds:
+            return _save_npz(ds, what + query_string, fname, compressed)
+    try:
+        f = _open_npz(cachedir, fname, save)
+    except ValueError as exc:  # invalid parameters in the query string
+        return HttpResponseBadRequest(str(exc))
+
+    # stream the data back, possibly only the requested range
+    size = os.fstat(f.fileno()).st_size
+    start, stop = 0, size
+    mo = RANGE.match(request.META.get('HTTP_RANGE', ''))
+    if mo and (mo.group(1) or mo.group(2)):
+        first, last = mo.groups()
+        if first:
+            start = int(first)
+            stop = min(int(last) + 1, size) if last else size
+        else:  # suffix range, i.e. the last bytes
+            start = max(size - int(last), 0)
+        if start >= stop:
+            f.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+        response = FileResponse(_read(f, start, stop), status=206,
+                                content_type='application/octet-stream')
+        response['Content-Range'] = 'bytes %d-%d/%d' % (
+            start, stop - 1, size)
+    else:
+        response = FileResponse(FileWrapper(f),
+                                content_type='application/octet-stream')
+    response['Content-Length'] = stop - start
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
     response['Content-Disposition'] = (
-        'attachment; filename=%s' % os.path.basename(fname))
+        'attachment; filename=%s.npz' % what.replace('/', '-'))
     return response
 
 